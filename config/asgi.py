@@ -0,0 +1,26 @@
+"""
+ASGI config for core project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+The student API (``exams.views.StudentAPIView``) is asynchronous: served
+from here, a slow connection does not hold a worker. In production it runs
+under gunicorn with uvicorn workers::
+
+    gunicorn config.asgi --worker-class uvicorn_worker.UvicornWorker
+
+For more information on this file, see
+https://docs.djangoproject.com/en/dev/howto/deployment/asgi/
+
+"""
+
+import os
+import sys
+from pathlib import Path
+
+from django.core.asgi import get_asgi_application
+
+BASE_DIR = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(BASE_DIR / "core"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.production")
+
+application = get_asgi_application()
@@ -168,6 +168,22 @@ MEDIA_ROOT = str(APPS_DIR / "media")
 # https://docs.djangoproject.com/en/dev/ref/settings/#media-url
 MEDIA_URL = "/media/"
 
+# STORAGES
+# ------------------------------------------------------------------------------
+# https://docs.djangoproject.com/en/dev/ref/settings/#storages
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+    # Imágenes de ítems y subpreguntas, guardadas una vez por contenido
+    "exam_media": {
+        "BACKEND": "core.exams.storage.ContentAddressedStorage",
+    },
+}
+
 # TEMPLATES
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#templates
@@ -290,3 +306,53 @@ SOCIALACCOUNT_FORMS = {"signup": "core.users.forms.UserSocialSignupForm"}
 
 # Your stuff...
 # ------------------------------------------------------------------------------
+# Tiempo de vida de los fragmentos renderizados por versión de examen; las
+# llaves incluyen la versión, así que expiran solo para liberar memoria.
+EXAMS_RENDER_CACHE_TIMEOUT = env.int("EXAMS_RENDER_CACHE_TIMEOUT", default=60 * 60 * 24)
+# Ingesta de respuestas: filas por INSERT y máximo de filas por petición
+EXAMS_INGEST_BATCH_SIZE = env.int("EXAMS_INGEST_BATCH_SIZE", default=1000)
+EXAMS_INGEST_MAX_ROWS = env.int("EXAMS_INGEST_MAX_ROWS", default=5000)
+# Importación de bancos de ítems: ítems por lote de bulk_create
+EXAMS_IMPORT_BATCH_SIZE = env.int("EXAMS_IMPORT_BATCH_SIZE", default=500)
+# Claves de respuestas compiladas que conserva en memoria cada proceso
+EXAMS_ANSWER_KEY_CACHE_SIZE = env.int("EXAMS_ANSWER_KEY_CACHE_SIZE", default=128)
+# Versiones reducidas de imágenes: anchos en píxeles e hilos que las generan
+EXAMS_IMAGE_WIDTHS = env.list("EXAMS_IMAGE_WIDTHS", cast=int, default=[160, 320, 640, 1280])
+EXAMS_RENDITION_WORKERS = env.int("EXAMS_RENDITION_WORKERS", default=2)
+# Cuadernillos PDF: resolución, procesos que dibujan y fuentes TrueType
+# (sin ruta se usa la fuente incluida en Pillow)
+EXAMS_BOOKLET_DPI = env.int("EXAMS_BOOKLET_DPI", default=150)
+EXAMS_BOOKLET_WORKERS = env.int("EXAMS_BOOKLET_WORKERS", default=2)
+EXAMS_BOOKLET_FONT = env("EXAMS_BOOKLET_FONT", default=None)
+EXAMS_BOOKLET_BOLD_FONT = env("EXAMS_BOOKLET_BOLD_FONT", default=None)
+# Hojas de respuestas: resolución de impresión, dígitos del folio y procesos
+# que leen las hojas escaneadas
+EXAMS_OMR_DPI = env.int("EXAMS_OMR_DPI", default=200)
+EXAMS_OMR_ID_DIGITS = env.int("EXAMS_OMR_ID_DIGITS", default=8)
+EXAMS_OMR_WORKERS = env.int("EXAMS_OMR_WORKERS", default=4)
+# Exámenes serializados y comprimidos para los alumnos que conserva cada proceso
+EXAMS_DELIVERY_CACHE_SIZE = env.int("EXAMS_DELIVERY_CACHE_SIZE", default=32)
+# Guardado automático: búfer ("memory" por proceso o "redis") y eventos que
+# se leen del stream en cada vaciado
+EXAMS_AUTOSAVE_BUFFER = env("EXAMS_AUTOSAVE_BUFFER", default="memory")
+EXAMS_AUTOSAVE_REDIS_URL = env("EXAMS_AUTOSAVE_REDIS_URL", default="")
+EXAMS_AUTOSAVE_FLUSH_SIZE = env.int("EXAMS_AUTOSAVE_FLUSH_SIZE", default=10000)
+# Aplicación adaptativa: estimador ("eap" o "mle"), error estándar con el que
+# termina, mínimo y máximo de ítems, y bancos compilados por proceso
+EXAMS_CAT_ESTIMATOR = env("EXAMS_CAT_ESTIMATOR", default="eap")
+EXAMS_CAT_MAX_SE = env.float("EXAMS_CAT_MAX_SE", default=0.3)
+EXAMS_CAT_MIN_ITEMS = env.int("EXAMS_CAT_MIN_ITEMS", default=5)
+EXAMS_CAT_MAX_ITEMS = env.int("EXAMS_CAT_MAX_ITEMS", default=40)
+EXAMS_CAT_POOL_CACHE_SIZE = env.int("EXAMS_CAT_POOL_CACHE_SIZE", default=16)
+# Control de exposición: contadores ("memory" por proceso o "redis"), tasa
+# máxima de aplicación de un ítem (0 lo desactiva), segundos de la foto de
+# los contadores en cada worker y eventos que se envían juntos
+EXAMS_EXPOSURE_COUNTERS = env("EXAMS_EXPOSURE_COUNTERS", default="memory")
+EXAMS_EXPOSURE_REDIS_URL = env("EXAMS_EXPOSURE_REDIS_URL", default="")
+EXAMS_EXPOSURE_MAX_RATE = env.float("EXAMS_EXPOSURE_MAX_RATE", default=0.25)
+EXAMS_EXPOSURE_SNAPSHOT_TTL = env.float("EXAMS_EXPOSURE_SNAPSHOT_TTL", default=5)
+EXAMS_EXPOSURE_FLUSH_SIZE = env.int("EXAMS_EXPOSURE_FLUSH_SIZE", default=200)
+# Segundos que se reutiliza el total de un listado paginado por llave
+EXAMS_COUNT_CACHE_TIMEOUT = env.int("EXAMS_COUNT_CACHE_TIMEOUT", default=60 * 5)
+# Exámenes que puede paginar el listado en una búsqueda
+EXAMS_SEARCH_MAX_EXAMS = env.int("EXAMS_SEARCH_MAX_EXAMS", default=500)
@@ -106,6 +106,20 @@ STORAGES = {
             "default_acl": "public-read",
         },
     },
+    "exam_media": {
+        "BACKEND": "core.exams.storage.ContentAddressedStorage",
+        "OPTIONS": {
+            "backend": "storages.backends.s3.S3Storage",
+            "options": {
+                "location": "media",
+                # El nombre es el hash del contenido: nunca se sobrescribe
+                "file_overwrite": True,
+                "object_parameters": {
+                    "CacheControl": "public, max-age=31536000, immutable",
+                },
+            },
+        },
+    },
 }
 MEDIA_URL = f"https://{aws_s3_domain}/media/"
 COLLECTFASTA_STRATEGY = "collectfasta.strategies.boto3.Boto3Strategy"
@@ -193,3 +207,9 @@ LOGGING = {
 
 # Your stuff...
 # ------------------------------------------------------------------------------
+# Guardado automático de respuestas en streams de Redis
+EXAMS_AUTOSAVE_BUFFER = "redis"
+EXAMS_AUTOSAVE_REDIS_URL = env("REDIS_URL")
+# Contadores de exposición de la aplicación adaptativa, comunes a los workers
+EXAMS_EXPOSURE_COUNTERS = "redis"
+EXAMS_EXPOSURE_REDIS_URL = env("REDIS_URL")
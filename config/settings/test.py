@@ -36,3 +36,9 @@ TEMPLATES[0]["OPTIONS"]["debug"] = True  # type: ignore[index]
 MEDIA_URL = "http://media.testserver"
 # Your stuff...
 # ------------------------------------------------------------------------------
+# Versiones de imágenes en el mismo hilo, al confirmar
+EXAMS_RENDITION_WORKERS = 0
+# Cuadernillos sin procesos hijos y a baja resolución
+EXAMS_BOOKLET_WORKERS = 0
+EXAMS_BOOKLET_DPI = 72
+EXAMS_OMR_WORKERS = 0
@@ -1,5 +1,9 @@
 import pytest
+from django.core.cache import cache
 
+from core.exams.adaptive import forget_item_pool
+from core.exams.delivery import forget_payload
+from core.exams.scoring import forget_answer_key
 from core.users.models import User
 from core.users.tests.factories import UserFactory
 
@@ -9,6 +13,14 @@ def _media_storage(settings, tmpdir) -> None:
     settings.MEDIA_ROOT = tmpdir.strpath
 
 
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+    forget_answer_key()
+    forget_payload()
+    forget_item_pool()
+
+
 @pytest.fixture
 def user(db) -> User:
     return UserFactory()
@@ -0,0 +1,343 @@
+"""
+Aplicación adaptativa (CAT) sobre los ítems calibrados de un examen.
+
+El banco de una calibración se compila una vez por proceso en una tabla
+con la información de Fisher de cada ítem en cada punto de una grilla de
+habilidad. Elegir el siguiente ítem es leer la fila del punto más cercano
+a la habilidad actual y tomar el máximo entre los ítems no aplicados; no
+se evalúa el modelo sobre el banco en cada paso, así que con miles de
+ítems la selección toma decenas de microsegundos.
+
+La habilidad se estima sobre la misma grilla: cada respuesta suma la
+log-verosimilitud de su ítem (una fila de la grilla) y la estimación es
+la EAP con previa normal estándar o la máxima verosimilitud. La MLE no
+existe mientras todas las respuestas son correctas o todas incorrectas;
+en ese caso se usa la EAP.
+
+Los ítems dicotómicos siguen el modelo de Rasch y los politómicos el de
+crédito parcial, con las dificultades de paso de ``ItemCalibration``.
+
+Con control de exposición (ver ``exposure.py``) los ítems más
+informativos se aplican con una probabilidad que limita su exposición.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+
+from .exposure import exposure_control
+from .models import Calibration
+from .models import ItemCalibration
+
+ESTIMATOR_EAP = "eap"
+ESTIMATOR_MLE = "mle"
+# Estimador de la habilidad: "eap" o "mle"
+CAT_ESTIMATOR = getattr(settings, "EXAMS_CAT_ESTIMATOR", ESTIMATOR_EAP)
+# Reglas de término: error estándar objetivo y cantidad de ítems
+CAT_MAX_SE = getattr(settings, "EXAMS_CAT_MAX_SE", 0.3)
+CAT_MIN_ITEMS = getattr(settings, "EXAMS_CAT_MIN_ITEMS", 5)
+CAT_MAX_ITEMS = getattr(settings, "EXAMS_CAT_MAX_ITEMS", 40)
+# Bancos compilados que conserva cada proceso
+CAT_POOL_CACHE_SIZE = getattr(settings, "EXAMS_CAT_POOL_CACHE_SIZE", 16)
+
+# Grilla de habilidad en logits
+THETA_MIN = -6.0
+THETA_MAX = 6.0
+GRID_STEP = 0.05
+THETA_GRID = np.linspace(
+    THETA_MIN,
+    THETA_MAX,
+    round((THETA_MAX - THETA_MIN) / GRID_STEP) + 1,
+)
+LOG_PRIOR = -0.5 * THETA_GRID**2
+# Ítems por bloque al compilar la tabla, que usa grilla x ítems x categorías
+ITEM_BLOCK = 2000
+
+_pools = OrderedDict()
+_pools_lock = threading.Lock()
+
+
+def _category_logits(theta, steps):
+    """
+    Logits de cada categoría, ``theta`` x ítems x categorías.
+
+    ``steps`` es ítems x pasos con ``nan`` en los pasos que el ítem no
+    tiene; esas categorías quedan en ``-inf``.
+    """
+    categories = np.arange(steps.shape[1] + 1)
+    cumulative = np.concatenate(
+        [np.zeros((len(steps), 1)), np.nan_to_num(steps).cumsum(axis=1)],
+        axis=1,
+    )
+    logits = theta[:, None, None] * categories - cumulative[None]
+    valid = np.concatenate(
+        [np.ones((len(steps), 1), dtype=bool), ~np.isnan(steps)],
+        axis=1,
+    )
+    return np.where(valid[None], logits, -np.inf)
+
+
+def _probabilities(theta, steps):
+    logits = _category_logits(theta, steps)
+    p = np.exp(logits - logits.max(axis=2, keepdims=True))
+    return p / p.sum(axis=2, keepdims=True)
+
+
+def information_table(steps):
+    """
+    Información de Fisher grilla x ítems (``float32``).
+
+    En Rasch y crédito parcial la información es la varianza del puntaje
+    del ítem a esa habilidad.
+    """
+    table = np.empty((len(THETA_GRID), len(steps)), dtype=np.float32)
+    categories = np.arange(steps.shape[1] + 1)
+    for start in range(0, len(steps), ITEM_BLOCK):
+        p = _probabilities(THETA_GRID, steps[start : start + ITEM_BLOCK])
+        mean = p @ categories
+        table[:, start : start + ITEM_BLOCK] = p @ categories**2 - mean**2
+    return table
+
+
+class ItemPool:
+    """
+    Banco compilado de una calibración.
+
+    ``steps`` tiene las dificultades de paso de cada ítem, una columna por
+    paso y ``nan`` en los que no tiene; un ítem dicotómico tiene un paso.
+    """
+
+    def __init__(self, item_ids, steps, calibration_id=None):
+        self.calibration_id = calibration_id
+        self.item_ids = np.asarray(item_ids, dtype=np.int64)
+        self.steps = np.asarray(steps, dtype=float).reshape(len(self.item_ids), -1)
+        self.max_scores = (~np.isnan(self.steps)).sum(axis=1)
+        self.information = information_table(self.steps)
+        # Control de exposición del banco en este proceso, si hay
+        self.exposure = None
+        self._positions = {pk: n for n, pk in enumerate(self.item_ids.tolist())}
+
+    def __len__(self):
+        return len(self.item_ids)
+
+    def position(self, item_id):
+        try:
+            return self._positions[item_id]
+        except KeyError:
+            msg = f"El ítem {item_id} no está en el banco"
+            raise ValueError(msg) from None
+
+    def log_likelihood(self, position, score):
+        """Log-verosimilitud del puntaje en el ítem sobre la grilla"""
+        if not 0 <= score <= self.max_scores[position]:
+            msg = f"Puntaje {score} fuera de rango para el ítem"
+            raise ValueError(msg)
+        steps = self.steps[position : position + 1]
+        logits = _category_logits(THETA_GRID, steps)[:, 0]
+        top = logits.max(axis=1)
+        normalizer = top + np.log(np.exp(logits - top[:, None]).sum(axis=1))
+        return logits[:, score] - normalizer
+
+
+def _grid_index(theta):
+    index = round((theta - THETA_MIN) / GRID_STEP)
+    return min(max(index, 0), len(THETA_GRID) - 1)
+
+
+class AdaptiveSession:
+    """
+    Estado de una aplicación adaptativa.
+
+    Se reconstruye con ``resume`` a partir de las respuestas ya dadas, de
+    modo que entre peticiones hay que guardar ``(ítem, puntaje)`` y, con
+    control de exposición, ``rejected_ids``: sin ellos la sesión retomada
+    vuelve a considerar ítems que ya se le descartaron.
+    """
+
+    def __init__(
+        self,
+        pool,
+        *,
+        estimator=CAT_ESTIMATOR,
+        max_se=CAT_MAX_SE,
+        min_items=CAT_MIN_ITEMS,
+        max_items=CAT_MAX_ITEMS,
+    ):
+        if estimator not in {ESTIMATOR_EAP, ESTIMATOR_MLE}:
+            msg = f"Estimador desconocido: {estimator}"
+            raise ValueError(msg)
+        self.pool = pool
+        self.estimator = estimator
+        self.max_se = max_se
+        self.min_items = min_items
+        self.max_items = max_items
+        self.administered = np.zeros(len(pool), dtype=bool)
+        # Ítems que el control de exposición descartó para esta sesión
+        self.rejected = np.zeros(len(pool), dtype=bool)
+        self.positions = []
+        self.scores = []
+        self.log_likelihood = np.zeros(len(THETA_GRID))
+        self.theta, self.se = self._estimate()
+
+    @classmethod
+    def resume(cls, pool, responses, *, rejected=(), **kwargs):
+        """
+        Sesión con las respuestas ``[(ítem, puntaje)]`` ya registradas y los
+        ítems que el control de exposición ya había descartado
+        """
+        session = cls(pool, **kwargs)
+        for item_id in rejected:
+            session.rejected[pool.position(item_id)] = True
+        for item_id, score in responses:
+            session.record(item_id, score, estimate=False)
+        session.theta, session.se = session._estimate()
+        return session
+
+    @property
+    def item_ids(self):
+        return self.pool.item_ids[self.positions].tolist()
+
+    @property
+    def rejected_ids(self):
+        return self.pool.item_ids[self.rejected].tolist()
+
+    @property
+    def finished(self):
+        answered = len(self.positions)
+        return answered >= min(self.max_items, len(self.pool)) or (
+            answered >= self.min_items and self.se <= self.max_se
+        )
+
+    def next_item(self):
+        """Ítem no aplicado más informativo, o ``None`` si terminó"""
+        if self.finished:
+            return None
+        row = self.pool.information[_grid_index(self.theta)]
+        if self.pool.exposure is not None:
+            if (self.administered | self.rejected).all():
+                self.rejected[:] = False
+            row = np.where(self.administered | self.rejected, -np.inf, row)
+            position, considered = self.pool.exposure.choose(
+                row,
+                first=not self.positions,
+            )
+            self.rejected |= considered
+        else:
+            position = int(np.where(self.administered, -1, row).argmax())
+        return int(self.pool.item_ids[position])
+
+    def record(self, item_id, score, *, estimate=True):
+        """Registra el puntaje del ítem y actualiza la habilidad"""
+        position = self.pool.position(item_id)
+        if self.administered[position]:
+            msg = f"El ítem {item_id} ya se aplicó"
+            raise ValueError(msg)
+        self.log_likelihood += self.pool.log_likelihood(position, score)
+        self.administered[position] = True
+        self.positions.append(position)
+        self.scores.append(score)
+        if estimate:
+            self.theta, self.se = self._estimate()
+
+    def _estimate(self):
+        """``(habilidad, error estándar)`` con el estimador de la sesión"""
+        total = sum(self.scores)
+        mixed = 0 < total < self.pool.max_scores[self.positions].sum()
+        if self.estimator == ESTIMATOR_MLE and mixed:
+            return self._mle()
+        posterior = self.log_likelihood + LOG_PRIOR
+        weights = np.exp(posterior - posterior.max())
+        weights /= weights.sum()
+        theta = float(weights @ THETA_GRID)
+        return theta, float(np.sqrt(weights @ (THETA_GRID - theta) ** 2))
+
+    def _mle(self):
+        index = int(self.log_likelihood.argmax())
+        theta = THETA_GRID[index]
+        if 0 < index < len(THETA_GRID) - 1:
+            # Vértice de la parábola por los tres puntos alrededor del máximo
+            before, peak, after = self.log_likelihood[index - 1 : index + 2]
+            curvature = before - 2 * peak + after
+            if curvature < 0:
+                theta += GRID_STEP * (before - after) / (2 * curvature)
+        information = self.pool.information[_grid_index(theta), self.positions].sum()
+        return float(theta), float(1 / np.sqrt(information))
+
+
+def latest_calibration_id(exam):
+    """Calibración más reciente del examen, o ``None``"""
+    return exam.calibrations.order_by("-pk").values_list("pk", flat=True).first()
+
+
+def compile_item_pool(calibration_id):
+    """
+    Banco de la calibración en una consulta.
+
+    Se excluyen los ítems sin medida y los de puntaje extremo, cuya medida
+    es una extrapolación.
+    """
+    rows = list(
+        ItemCalibration.objects.filter(
+            calibration_id=calibration_id,
+            measure__isnull=False,
+            is_extreme=False,
+        )
+        .order_by("item_id")
+        .values_list("item_id", "measure", "thresholds"),
+    )
+    n_steps = max((len(thresholds) for _, _, thresholds in rows), default=1)
+    steps = np.full((len(rows), max(n_steps, 1)), np.nan)
+    for n, (_, measure, thresholds) in enumerate(rows):
+        # Los umbrales de Andrich son relativos a la medida del ítem
+        taus = thresholds or [0.0]
+        steps[n, : len(taus)] = measure + np.asarray(taus)
+    pool = ItemPool([row[0] for row in rows], steps, calibration_id)
+    pool.exposure = exposure_control(pool)
+    return pool
+
+
+def get_item_pool(calibration_id):
+    """
+    Banco compilado de la calibración, desde el LRU del proceso.
+
+    Una calibración no cambia después de creada, así que no hace falta
+    versionar la llave.
+    """
+    with _pools_lock:
+        pool = _pools.get(calibration_id)
+        if pool is not None:
+            _pools.move_to_end(calibration_id)
+            return pool
+    pool = compile_item_pool(calibration_id)
+    with _pools_lock:
+        _pools[calibration_id] = pool
+        while len(_pools) > CAT_POOL_CACHE_SIZE:
+            _pools.popitem(last=False)
+    return pool
+
+
+def forget_item_pool(calibration_id=None):
+    """Descarta del LRU del proceso el banco de la calibración (o todos)"""
+    with _pools_lock:
+        if calibration_id is None:
+            _pools.clear()
+        else:
+            _pools.pop(calibration_id, None)
+
+
+def start_session(exam, responses=(), calibration_id=None, **kwargs):
+    """
+    Sesión adaptativa con la calibración indicada o la última del examen.
+
+    Para retomar una sesión hay que pasar ``session.pool.calibration_id``
+    (si el examen se recalibra a mitad de la aplicación, el alumno sigue con
+    el banco con que empezó) y ``rejected=session.rejected_ids``. Lanza
+    ``Calibration.DoesNotExist`` si el examen no está calibrado.
+    """
+    calibration_id = calibration_id or latest_calibration_id(exam)
+    if calibration_id is None:
+        msg = f"El examen {exam.pk} no tiene calibraciones"
+        raise Calibration.DoesNotExist(msg)
+    return AdaptiveSession.resume(get_item_pool(calibration_id), responses, **kwargs)
@@ -1,9 +1,15 @@
 from django.contrib import admin
 
+from .models import Administration
+from .models import Calibration
 from .models import Exam
+from .models import Examinee
 from .models import Item
+from .models import ItemCalibration
 from .models import Option
+from .models import Response
 from .models import SubQuestion
+from .services import clone_exam
 
 
 class ItemInline(admin.TabularInline):
@@ -20,6 +26,7 @@ class ExamAdmin(admin.ModelAdmin):
     search_fields = ["name"]
     readonly_fields = ["created_at", "updated_at"]
     inlines = [ItemInline]
+    actions = ["clone_exams"]
 
     fieldsets = (
         (None, {"fields": ("name",)}),
@@ -27,6 +34,12 @@ class ExamAdmin(admin.ModelAdmin):
         ("Fechas", {"fields": ("created_at", "updated_at")}),
     )
 
+    @admin.action(description="Duplicar exámenes seleccionados")
+    def clone_exams(self, request, queryset):
+        for exam in queryset:
+            clone_exam(exam, created_by=request.user)
+        self.message_user(request, f"{len(queryset)} exámenes duplicados")
+
 
 class OptionInline(admin.TabularInline):
     model = Option
@@ -64,7 +77,8 @@ class ItemAdmin(admin.ModelAdmin):
 
     @admin.display(description="Instruccion")
     def instruction_short(self, obj):
-        return obj.instruction[:60] + "..." if len(obj.instruction) > 60 else obj.instruction
+        text = obj.instruction_plain
+        return text[:60] + "..." if len(text) > 60 else text
 
 
 @admin.register(SubQuestion)
@@ -79,3 +93,59 @@ class OptionAdmin(admin.ModelAdmin):
     list_display = ["label", "text", "is_correct", "subquestion"]
     list_filter = ["is_correct", "subquestion__item__exam"]
     search_fields = ["text"]
+
+
+@admin.register(Administration)
+class AdministrationAdmin(admin.ModelAdmin):
+    list_display = ["name", "exam", "is_open", "created_at"]
+    list_filter = ["is_open"]
+    list_select_related = ["exam"]
+    search_fields = ["name", "exam__name"]
+    readonly_fields = ["created_at"]
+    raw_id_fields = ["exam", "created_by"]
+
+
+@admin.register(Examinee)
+class ExamineeAdmin(admin.ModelAdmin):
+    list_display = ["code", "name", "administration", "created_at"]
+    list_select_related = ["administration__exam"]
+    search_fields = ["code", "name"]
+    raw_id_fields = ["administration"]
+
+
+@admin.register(Response)
+class ResponseAdmin(admin.ModelAdmin):
+    list_display = ["examinee", "subquestion", "option", "answered_at"]
+    list_select_related = ["examinee", "subquestion__item", "option"]
+    search_fields = ["examinee__code"]
+    raw_id_fields = ["examinee", "subquestion", "option"]
+    # La tabla puede tener millones de filas
+    show_full_result_count = False
+
+
+class ItemCalibrationInline(admin.TabularInline):
+    model = ItemCalibration
+    extra = 0
+    fields = ["item", "measure", "standard_error", "thresholds", "is_extreme"]
+    readonly_fields = fields
+    can_delete = False
+
+
+@admin.register(Calibration)
+class CalibrationAdmin(admin.ModelAdmin):
+    list_display = ["exam", "model", "created_at", "n_items", "n_persons", "converged"]
+    list_filter = ["model", "converged"]
+    list_select_related = ["exam"]
+    readonly_fields = [
+        "exam",
+        "model",
+        "created_at",
+        "warm_start",
+        "iterations",
+        "converged",
+        "max_residual",
+        "max_change",
+        "n_persons",
+        "n_items",
+    ]
+    inlines = [ItemCalibrationInline]
@@ -0,0 +1,167 @@
+"""
+Hojas de respuestas de las aplicaciones en papel.
+
+``render_answer_sheet`` imprime la hoja de un examen a partir del orden de
+sus subpreguntas y opciones. ``scan_answer_sheets`` lee lotes de hojas
+escaneadas en un pool de procesos (ver ``omr.py``) y pasa las respuestas a
+``ingestion.ingest_responses`` a medida que llegan, en bloques de hasta
+``INGEST_MAX_ROWS`` filas: la memoria no crece con el tamaño del lote y
+cada bloque se confirma por separado.
+"""
+
+import hashlib
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Any
+from typing import NamedTuple
+
+from django.conf import settings
+
+from .blocks import to_pdf
+from .ingestion import INGEST_MAX_ROWS
+from .ingestion import ingest_responses
+from .models import Option
+from .models import SubQuestion
+from .omr import FINGERPRINT_BITS
+from .omr import draw_sheet
+from .omr import read_sheet_file
+
+logger = logging.getLogger(__name__)
+
+OMR_DPI = getattr(settings, "EXAMS_OMR_DPI", 200)
+OMR_ID_DIGITS = getattr(settings, "EXAMS_OMR_ID_DIGITS", 8)
+# Procesos que leen hojas; con 0 se leen en el proceso actual
+OMR_WORKERS = getattr(settings, "EXAMS_OMR_WORKERS", 4)
+# Hojas que recibe cada proceso por envío
+OMR_CHUNK_SIZE = 16
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".tif", ".tiff"}
+
+
+class ScanSummary(NamedTuple):
+    read: int
+    created: int
+    # [(archivo, motivo)] de las hojas que no se pudieron leer
+    rejected: list
+    # [(archivo, [número de pregunta, ...])] de las preguntas con doble marca
+    ambiguous: list
+
+
+def layout_fingerprint(questions):
+    """16 bits que identifican las subpreguntas y opciones de la hoja"""
+    data = ";".join(
+        f"{q['subquestion']}:{','.join(str(pk) for pk, _ in q['options'])}"
+        for q in questions
+    )
+    digest = hashlib.sha256(data.encode()).digest()
+    return int.from_bytes(digest[:4]) % (1 << FINGERPRINT_BITS)
+
+
+def sheet_layout(exam):
+    """Diseño de la hoja del examen, en dos consultas"""
+    by_subquestion: dict[int, dict[str, Any]] = {
+        pk: {"subquestion": pk, "options": []}
+        for pk in SubQuestion.objects.filter(item__exam=exam)
+        .order_by("item__order", "item_id", "order", "id")
+        .values_list("id", flat=True)
+    }
+    for subq_id, option_id, label in (
+        Option.objects.filter(subquestion__item__exam=exam)
+        .order_by("order", "id")
+        .values_list("subquestion_id", "id", "label")
+    ):
+        by_subquestion[subq_id]["options"].append([option_id, label])
+    questions = list(by_subquestion.values())
+    return {
+        "title": exam.name,
+        "id_digits": OMR_ID_DIGITS,
+        "fingerprint": layout_fingerprint(questions),
+        "questions": questions,
+    }
+
+
+def render_answer_sheet(exam):
+    """PDF de la hoja de respuestas en blanco del examen"""
+    page = draw_sheet(
+        sheet_layout(exam),
+        OMR_DPI,
+        getattr(settings, "EXAMS_BOOKLET_FONT", None),
+    )
+    return to_pdf([page], OMR_DPI, exam.name)
+
+
+def _read_all(paths, layout, workers):
+    if not workers:
+        for path in paths:
+            yield path, read_sheet_file(path, layout)
+        return
+    # spawn: los hijos solo importan omr.py, sin heredar conexiones
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        results = pool.map(
+            read_sheet_file,
+            paths,
+            repeat(layout),
+            chunksize=OMR_CHUNK_SIZE,
+        )
+        yield from zip(paths, results, strict=True)
+
+
+def scan_answer_sheets(administration, paths, workers=OMR_WORKERS):
+    """
+    Lee las hojas escaneadas en ``paths`` e ingesta sus respuestas.
+
+    Las hojas sin marcas de registro, con el folio ilegible o impresas para
+    otra versión del examen se rechazan; las preguntas en blanco o con
+    doble marca se registran sin opción.
+    """
+    layout = sheet_layout(administration.exam)
+    paths = [str(path) for path in paths]
+    read = created = 0
+    rejected, ambiguous = [], []
+    rows: list[dict[str, Any]] = []
+
+    def flush():
+        nonlocal created
+        count, errors = ingest_responses(administration, rows)
+        created += count
+        for error in errors:
+            logger.warning("Respuesta de hoja rechazada: %s", error)
+        rows.clear()
+
+    for path, sheet in _read_all(paths, layout, workers):
+        if sheet["error"]:
+            rejected.append((path, sheet["error"]))
+            continue
+        read += 1
+        if sheet["ambiguous"]:
+            ambiguous.append((path, sheet["ambiguous"]))
+        for question, choice in zip(layout["questions"], sheet["answers"], strict=True):
+            rows.append(
+                {
+                    "examinee": sheet["code"],
+                    "subquestion": question["subquestion"],
+                    "option": None
+                    if choice is None
+                    else question["options"][choice][0],
+                },
+            )
+        if len(rows) >= INGEST_MAX_ROWS:
+            flush()
+    if rows:
+        flush()
+    return ScanSummary(read, created, rejected, ambiguous)
+
+
+def image_paths(paths):
+    """Archivos de imagen de ``paths``; los directorios se recorren completos"""
+    for path in paths:
+        if path.is_dir():
+            yield from sorted(
+                child
+                for child in path.rglob("*")
+                if child.suffix.lower() in IMAGE_EXTENSIONS
+            )
+        else:
+            yield path
@@ -5,3 +5,7 @@ class ExamsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core.exams"
     verbose_name = "Exámenes Psicométricos"
+
+    def ready(self):
+        import core.exams.renditions
+        import core.exams.signals  # noqa: F401
@@ -0,0 +1,308 @@
+"""
+Guardado automático de las respuestas durante la aplicación.
+
+Cada cambio de respuesta de un alumno se agrega a un búfer rápido en lugar
+de abrir una transacción: un stream de Redis en producción o un diccionario
+en memoria en desarrollo. Periódicamente (``manage.py flush_autosave``) y
+siempre al entregar, el búfer de cada aplicación se vacía en la tabla de
+respuestas con una sola llamada a ``ingestion.ingest_responses``.
+
+Al vaciar se conserva solo el último valor de cada examinado y subpregunta.
+``Response`` es de solo inserción y la respuesta vigente es la de mayor
+``id``, así que insertar ese último valor en bloque equivale a actualizar
+la respuesta.
+
+Los eventos se descartan del búfer solo después de confirmar la escritura:
+si falla, quedan para el siguiente vaciado. Las filas inválidas se
+descartan sin detener el resto del lote.
+
+Al entregar, el vaciado sigue hasta pasar el último evento que había en el
+stream, así que incluye todas las respuestas del alumno que entrega aunque
+la aplicación tenga más de ``AUTOSAVE_FLUSH_SIZE`` eventos pendientes.
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+from typing import cast
+
+import redis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .ingestion import ingest_responses
+from .models import Administration
+
+if TYPE_CHECKING:
+    from redis.typing import EncodableT
+    from redis.typing import FieldT
+
+logger = logging.getLogger(__name__)
+
+# "memory" (un búfer por proceso, para desarrollo) o "redis"
+AUTOSAVE_BUFFER = getattr(settings, "EXAMS_AUTOSAVE_BUFFER", "memory")
+AUTOSAVE_REDIS_URL = getattr(settings, "EXAMS_AUTOSAVE_REDIS_URL", "")
+# Eventos que se leen del stream por vaciado
+AUTOSAVE_FLUSH_SIZE = getattr(settings, "EXAMS_AUTOSAVE_FLUSH_SIZE", 10000)
+KEY_PREFIX = "exams:autosave"
+# Segundos que un vaciado puede retener el stream de una aplicación
+LOCK_TIMEOUT = 60
+# Segundos que un vaciado espera a que termine otro de la misma aplicación
+LOCK_WAIT = 5
+# Segundos que se recuerda la última señal de cada examinado
+PRESENCE_TIMEOUT = 60 * 60 * 6
+
+
+class BufferBusyError(Exception):
+    """Otro vaciado de la aplicación no terminó a tiempo"""
+
+
+def coalesce(events, answers=None):
+    """``{(examinado, subpregunta): opción}`` con el último valor de cada par"""
+    answers = {} if answers is None else answers
+    for code, subquestion_id, option_id in events:
+        answers[code, subquestion_id] = option_id
+    return answers
+
+
+class MemoryBuffer:
+    """
+    Búfer en la memoria del proceso, ya combinado.
+
+    Sirve para desarrollo y pruebas: con varios procesos cada uno tiene su
+    propio búfer.
+    """
+
+    def __init__(self):
+        self._answers = {}
+        self._lock = threading.Lock()
+
+    def append(self, administration_id, events):
+        with self._lock:
+            coalesce(events, self._answers.setdefault(administration_id, {}))
+
+    def pending(self):
+        with self._lock:
+            return [pk for pk, answers in self._answers.items() if answers]
+
+    def tail(self, administration_id):
+        # Un vaciado se lleva todo el búfer de la aplicación
+        return None
+
+    @contextmanager
+    def drain(self, administration_id, until=None):
+        with self._lock:
+            answers = self._answers.pop(administration_id, {})
+        try:
+            yield answers
+        except BaseException:
+            with self._lock:
+                # Lo que llegó mientras tanto es más reciente
+                newer = self._answers.setdefault(administration_id, {})
+                self._answers[administration_id] = {**answers, **newer}
+            raise
+
+
+class RedisStreamBuffer:
+    """
+    Un stream de Redis por aplicación más un conjunto con las aplicaciones
+    que tienen eventos pendientes.
+
+    Los eventos se combinan al vaciar; cada vaciado lee a lo sumo
+    ``AUTOSAVE_FLUSH_SIZE`` eventos, los más antiguos, y borra solo los que
+    leyó.
+    """
+
+    def __init__(self, url=AUTOSAVE_REDIS_URL, client=None):
+        self.client = client or redis.Redis.from_url(url, decode_responses=True)
+        self.pending_key = f"{KEY_PREFIX}:pending"
+
+    def _stream(self, administration_id):
+        return f"{KEY_PREFIX}:{administration_id}"
+
+    def append(self, administration_id, events):
+        stream = self._stream(administration_id)
+        pipe = self.client.pipeline(transaction=False)
+        for code, subquestion_id, option_id in events:
+            fields: dict[FieldT, EncodableT] = {
+                "e": code,
+                "s": subquestion_id,
+                "o": option_id or "",
+            }
+            pipe.xadd(stream, fields)
+        pipe.sadd(self.pending_key, administration_id)
+        pipe.execute()
+
+    def pending(self):
+        return [int(pk) for pk in self.client.smembers(self.pending_key)]
+
+    def tail(self, administration_id):
+        """Id del último evento del stream, o ``None`` si está vacío"""
+        last = self.client.xrevrange(self._stream(administration_id), count=1)
+        return last[0][0] if last else None
+
+    @contextmanager
+    def drain(self, administration_id, until=None):
+        """
+        Entrega los eventos más antiguos, hasta ``until`` si se indica.
+
+        Si otro vaciado ya pasó de ``until`` no toma el candado. Lanza
+        ``BufferBusyError`` si el candado no se libera en ``LOCK_WAIT`` segundos.
+        """
+        stream = self._stream(administration_id)
+        until = until or "+"
+        if until != "+" and not self.client.xrange(stream, max=until, count=1):
+            yield {}
+            return
+        lock = self.client.lock(
+            f"{stream}:lock",
+            timeout=LOCK_TIMEOUT,
+            blocking_timeout=LOCK_WAIT,
+        )
+        if not lock.acquire():
+            raise BufferBusyError(administration_id)
+        try:
+            # Se quita antes de leer: un evento nuevo vuelve a agregarla
+            self.client.srem(self.pending_key, administration_id)
+            try:
+                # Con decode_responses, ``[(id, {campo: valor})]``
+                entries = cast(
+                    "list[tuple[str, dict[str, str]]]",
+                    self.client.xrange(stream, max=until, count=AUTOSAVE_FLUSH_SIZE),
+                )
+                yield coalesce(
+                    (
+                        fields["e"],
+                        int(fields["s"]),
+                        int(fields["o"]) if fields["o"] else None,
+                    )
+                    for _, fields in entries
+                )
+            except BaseException:
+                self.client.sadd(self.pending_key, administration_id)
+                raise
+            if entries:
+                self.client.xdel(stream, *(entry_id for entry_id, _ in entries))
+            if self.client.xlen(stream):
+                self.client.sadd(self.pending_key, administration_id)
+        finally:
+            lock.release()
+
+
+BUFFERS = {
+    "memory": MemoryBuffer,
+    "redis": RedisStreamBuffer,
+}
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    """Búfer configurado en ``EXAMS_AUTOSAVE_BUFFER``, uno por proceso"""
+    global _buffer  # noqa: PLW0603
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = BUFFERS[AUTOSAVE_BUFFER]()
+        return _buffer
+
+
+def record_answers(administration_id, code, answers):
+    """
+    Agrega al búfer los cambios de respuesta de un examinado.
+
+    ``answers`` es una lista de ``(subpregunta, opción)``, con la opción
+    nula cuando el alumno borra su respuesta.
+    """
+    events = [
+        (code, subquestion_id, option_id) for subquestion_id, option_id in answers
+    ]
+    if events:
+        get_buffer().append(administration_id, events)
+    return len(events)
+
+
+async def arecord_answers(administration_id, code, answers):
+    """``record_answers`` para vistas async; Redis se escribe en otro hilo"""
+    return await sync_to_async(record_answers, thread_sensitive=False)(
+        administration_id,
+        code,
+        answers,
+    )
+
+
+def presence_key(administration_id, code):
+    return f"{KEY_PREFIX}:seen:{administration_id}:{code}"
+
+
+async def aheartbeat(administration_id, code):
+    """Anota que el examinado sigue conectado"""
+    await cache.aset(
+        presence_key(administration_id, code),
+        timezone.now().isoformat(),
+        PRESENCE_TIMEOUT,
+    )
+
+
+def last_seen(administration_id, codes):
+    """``{código: fecha ISO}`` de la última señal de cada examinado"""
+    keys = {presence_key(administration_id, code): code for code in codes}
+    return {keys[key]: seen for key, seen in cache.get_many(keys).items()}
+
+
+def _flush_chunk(administration_id, until):
+    with get_buffer().drain(administration_id, until) as answers:
+        if not answers:
+            return 0, 0, []
+        administration = Administration.objects.filter(pk=administration_id).first()
+        if administration is None:
+            logger.warning(
+                "Se descartan %s respuestas de la aplicación borrada %s",
+                len(answers),
+                administration_id,
+            )
+            return len(answers), 0, []
+        rows = [
+            {"examinee": code, "subquestion": subquestion_id, "option": option_id}
+            for (code, subquestion_id), option_id in answers.items()
+        ]
+        created, errors = ingest_responses(administration, rows)
+    for error in errors:
+        logger.warning("Respuesta guardada descartada: %s", error)
+    return len(answers), created, errors
+
+
+def flush(administration_id, *, complete=False):
+    """
+    Escribe las respuestas pendientes de la aplicación.
+
+    Devuelve ``(creadas, errores)`` como ``ingest_responses``; las filas
+    inválidas (por ejemplo, de una subpregunta que ya no existe) se
+    registran en el log y se descartan. Con ``complete`` (al entregar)
+    vacía por bloques hasta el último evento que había al empezar.
+    """
+    until = get_buffer().tail(administration_id) if complete else None
+    created, errors = 0, []
+    while True:
+        drained, chunk_created, chunk_errors = _flush_chunk(administration_id, until)
+        created += chunk_created
+        errors += chunk_errors
+        if not (drained and until):
+            return created, errors
+
+
+aflush = sync_to_async(flush)
+
+
+def flush_all():
+    """Vacía el búfer de todas las aplicaciones; devuelve las filas creadas"""
+    created = 0
+    for administration_id in get_buffer().pending():
+        try:
+            created += flush(administration_id)[0]
+        except BufferBusyError:
+            logger.info("Aplicación %s en vaciado; se omite", administration_id)
+    return created
@@ -0,0 +1,197 @@
+"""
+Dibujo con Pillow de los bloques de los impresos (cuadernillos y hojas).
+
+Este módulo no importa Django: sus funciones corren en procesos hijos y
+reciben todo lo que dibujan como datos simples (textos, bytes de imágenes y
+un ``style`` con resolución, ancho y fuentes). Las medidas se expresan en
+milímetros y los tamaños de letra en puntos.
+"""
+
+from bisect import bisect_right
+from functools import lru_cache
+from io import BytesIO
+from itertools import accumulate
+
+from PIL import Image
+from PIL import ImageDraw
+from PIL import ImageFont
+
+MM_PER_INCH = 25.4
+POINTS_PER_INCH = 72
+INK = 0
+PAPER = 255
+GRAY = 140
+# Alto máximo de una imagen dentro de un bloque
+IMAGE_MAX_HEIGHT_MM = 70
+
+
+def mm(value, dpi):
+    """Milímetros a píxeles"""
+    return round(value * dpi / MM_PER_INCH)
+
+
+def pt(value, dpi):
+    """Puntos tipográficos a píxeles"""
+    return round(value * dpi / POINTS_PER_INCH)
+
+
+@lru_cache(maxsize=32)
+def font(path, size):
+    """Fuente TrueType de ``path`` o, sin ruta, la incluida en Pillow"""
+    if path:
+        return ImageFont.truetype(path, size)
+    return ImageFont.load_default(size=size)
+
+
+def split_word(word, face, width):
+    """
+    Corta por caracteres una palabra más ancha que la línea.
+
+    Los cortes se buscan con bisección sobre los anchos acumulados de los
+    caracteres y se confirman midiendo el trozo, así que el costo es lineal
+    en el largo de la palabra (una URL o un base64 no traba el dibujo).
+    """
+    sizes = {char: face.getlength(char) for char in set(word)}
+    offsets = list(accumulate(sizes[char] for char in word))
+    pieces, start, base = [], 0, 0
+    while offsets[-1] - base > width and len(word) - start > 1:
+        cut = max(bisect_right(offsets, base + width, lo=start), start + 1)
+        # El interletraje puede ensanchar el trozo respecto a la suma
+        while cut > start + 1 and face.getlength(word[start:cut]) > width:
+            cut -= 1
+        pieces.append(word[start:cut])
+        start, base = cut, offsets[cut - 1]
+    pieces.append(word[start:])
+    return pieces
+
+
+def wrap(text, face, width):
+    """Parte ``text`` en líneas que caben en ``width`` píxeles"""
+    lines = []
+    for paragraph in (text or "").splitlines() or [""]:
+        line = ""
+        for word in paragraph.split():
+            candidate = f"{line} {word}" if line else word
+            if face.getlength(candidate) <= width:
+                line = candidate
+                continue
+            if line:
+                lines.append(line)
+            *pieces, line = split_word(word, face, width)
+            lines += pieces
+        lines.append(line)
+    return lines
+
+
+class Layout:
+    """
+    Lista de operaciones de dibujo con su posición vertical.
+
+    Se arma primero y se dibuja al final, cuando ya se conoce el alto total
+    del bloque.
+    """
+
+    def __init__(self, style):
+        self.dpi = style["dpi"]
+        self.width = mm(style["width_mm"], self.dpi)
+        size = pt(style["font_size"], self.dpi)
+        self.regular = font(style.get("font"), size)
+        self.bold = font(style.get("bold_font") or style.get("font"), size)
+        self.line_height = round(size * 1.35)
+        self.y = 0
+        self.ops = []
+
+    def space(self, millimeters):
+        self.y += mm(millimeters, self.dpi)
+
+    def text(self, text, x=0, *, bold=False, fill=INK):
+        face = self.bold if bold else self.regular
+        for line in wrap(text, face, self.width - x):
+            self.ops.append(("text", (x, self.y), line, face, fill))
+            self.y += self.line_height
+
+    def rule(self):
+        self.ops.append(("line", [(0, self.y), (self.width - 1, self.y)], GRAY))
+        self.y += mm(1.5, self.dpi)
+
+    def bubble(self, x, diameter=None):
+        """Círculo para marcar, alineado con la línea de texto actual"""
+        diameter = diameter or round(self.line_height * 0.75)
+        top = self.y + (self.line_height - diameter) // 2
+        self.ops.append(("circle", [x, top, x + diameter, top + diameter]))
+        return diameter
+
+    def image(self, data, x=0):
+        if not data:
+            return
+        with Image.open(BytesIO(data)) as source:
+            picture = source.convert("L")
+        max_width = self.width - x
+        max_height = mm(IMAGE_MAX_HEIGHT_MM, self.dpi)
+        picture.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
+        self.ops.append(("image", (x, self.y), picture))
+        self.y += picture.height + mm(1, self.dpi)
+
+    def render(self):
+        canvas = Image.new("L", (self.width, max(self.y, 1)), PAPER)
+        draw = ImageDraw.Draw(canvas)
+        for op in self.ops:
+            kind = op[0]
+            if kind == "text":
+                _, position, line, face, fill = op
+                draw.text(position, line, font=face, fill=fill)
+            elif kind == "line":
+                draw.line(op[1], fill=op[2], width=max(1, self.dpi // 100))
+            elif kind == "circle":
+                draw.ellipse(op[1], outline=INK, width=max(1, self.dpi // 75))
+            elif kind == "image":
+                canvas.paste(op[2], op[1])
+        return canvas
+
+
+def to_png(image):
+    buffer = BytesIO()
+    image.save(buffer, "PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def to_pdf(pages, dpi, title):
+    """PDF con una página por imagen"""
+    buffer = BytesIO()
+    pages[0].save(
+        buffer,
+        "PDF",
+        save_all=True,
+        append_images=pages[1:],
+        resolution=dpi,
+        title=title,
+    )
+    return buffer.getvalue()
+
+
+def render_item_block(block, style):
+    """
+    PNG del bloque de un ítem: código, instrucción, imagen y subpreguntas
+    numeradas con sus opciones, cada una con su círculo para marcar.
+    """
+    layout = Layout(style)
+    layout.text(block["code"], bold=True)
+    layout.rule()
+    layout.text(block["instruction"])
+    layout.image(block.get("image"))
+    indent = mm(6, layout.dpi)
+    option_indent = indent + mm(5, layout.dpi)
+    for number, subq in enumerate(block["subquestions"], start=1):
+        layout.space(1.5)
+        layout.ops.append(
+            ("text", (0, layout.y), f"{number}.", layout.bold, INK),
+        )
+        if subq["context"]:
+            layout.text(subq["context"], indent)
+        layout.image(subq.get("image"), indent)
+        for option in subq["options"]:
+            layout.bubble(indent)
+            label = f"{option['label']}) " if option["label"] else ""
+            layout.text(f"{label}{option['text']}", option_indent)
+    layout.space(4)
+    return to_png(layout.render())
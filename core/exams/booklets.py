@@ -0,0 +1,237 @@
+"""
+Cuadernillos impresos en PDF.
+
+Cada ítem se dibuja como un bloque independiente (ver ``blocks.py``) y se
+guarda en el almacenamiento con el hash de su contenido y del estilo de
+impresión como nombre. Al reimprimir un examen solo se dibujan los bloques
+que cambiaron, y los que faltan se dibujan en paralelo en un pool de
+procesos. Los bloques se acomodan luego en páginas A4 que Pillow une en un
+PDF.
+
+Las páginas son imágenes a ``BOOKLET_DPI``: no hay una biblioteca de PDF
+entre las dependencias y Pillow ya dibuja el texto y las imágenes.
+"""
+
+import hashlib
+import json
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from itertools import repeat
+from typing import Any
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+from PIL import ImageDraw
+
+from .blocks import GRAY
+from .blocks import PAPER
+from .blocks import Layout
+from .blocks import mm
+from .blocks import render_item_block
+from .blocks import to_pdf
+from .models import Item
+from .models import Option
+from .models import SubQuestion
+from .models import exam_media_storage
+
+logger = logging.getLogger(__name__)
+
+# Cambiarlo invalida los bloques guardados (por ejemplo, al cambiar el dibujo)
+RENDER_VERSION = 1
+BOOKLET_DPI = getattr(settings, "EXAMS_BOOKLET_DPI", 150)
+# Procesos que dibujan bloques; con 0 se dibujan en el proceso actual
+BOOKLET_WORKERS = getattr(settings, "EXAMS_BOOKLET_WORKERS", 2)
+BOOKLET_FONT = getattr(settings, "EXAMS_BOOKLET_FONT", None)
+BOOKLET_BOLD_FONT = getattr(settings, "EXAMS_BOOKLET_BOLD_FONT", None)
+BLOCK_PREFIX = "exams/booklets/blocks"
+PAGE_MM = (210, 297)
+MARGIN_MM = 15
+FONT_SIZE = 11
+
+
+def booklet_style():
+    """Parámetros de dibujo; forman parte de la llave de cada bloque"""
+    return {
+        "dpi": BOOKLET_DPI,
+        "width_mm": PAGE_MM[0] - 2 * MARGIN_MM,
+        "font": BOOKLET_FONT,
+        "bold_font": BOOKLET_BOLD_FONT,
+        "font_size": FONT_SIZE,
+    }
+
+
+def item_blocks(exam_id):
+    """
+    Contenido de cada ítem en el orden del examen, en tres consultas.
+
+    Las imágenes van por nombre; sus bytes se leen solo para los bloques
+    que hay que dibujar.
+    """
+    items: dict[int, dict[str, Any]] = {
+        row["id"]: {
+            "code": row["code"],
+            "instruction": row["instruction_plain"],
+            "image": row["image"] or None,
+            "subquestions": [],
+        }
+        for row in Item.objects.filter(exam_id=exam_id)
+        .order_by("order", "id")
+        .values("id", "code", "instruction_plain", "image")
+    }
+    subquestions: dict[int, dict[str, Any]] = {}
+    for subq_row in (
+        SubQuestion.objects.filter(item__exam_id=exam_id)
+        .order_by("order", "id")
+        .values("id", "item_id", "context_plain", "image")
+    ):
+        subq: dict[str, Any] = {
+            "context": subq_row["context_plain"],
+            "image": subq_row["image"] or None,
+            "options": [],
+        }
+        subquestions[subq_row["id"]] = subq
+        items[subq_row["item_id"]]["subquestions"].append(subq)
+    for option_row in (
+        Option.objects.filter(subquestion__item__exam_id=exam_id)
+        .order_by("order", "id")
+        .values("subquestion_id", "label", "text")
+    ):
+        subquestions[option_row["subquestion_id"]]["options"].append(
+            {"label": option_row["label"], "text": option_row["text"]},
+        )
+    return list(items.values())
+
+
+def block_key(block, style):
+    """Hash del contenido del bloque y del estilo con que se dibuja"""
+    data = json.dumps([RENDER_VERSION, style, block], sort_keys=True)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def _block_name(key):
+    return f"{BLOCK_PREFIX}/{key[:2]}/{key}.png"
+
+
+def _with_image_bytes(block):
+    """Copia del bloque con los bytes de sus imágenes en lugar del nombre"""
+    storage = exam_media_storage()
+
+    def read(name):
+        if not name:
+            return None
+        try:
+            with storage.open(name, "rb") as stream:
+                return stream.read()
+        except OSError:
+            logger.warning("Imagen no disponible para el cuadernillo: %s", name)
+            return None
+
+    return {
+        **block,
+        "image": read(block["image"]),
+        "subquestions": [
+            {**subq, "image": read(subq["image"])} for subq in block["subquestions"]
+        ],
+    }
+
+
+def render_blocks(blocks, style, workers=BOOKLET_WORKERS, storage=default_storage):
+    """
+    PNG de cada bloque, tomados del almacenamiento o dibujados.
+
+    Devuelve ``(pngs, dibujados)``; los que faltan se dibujan en un pool de
+    ``workers`` procesos y se guardan para la próxima impresión.
+    """
+    keys = [block_key(block, style) for block in blocks]
+    pngs = [None] * len(blocks)
+    missing = []
+    for index, key in enumerate(keys):
+        name = _block_name(key)
+        if storage.exists(name):
+            with storage.open(name, "rb") as stream:
+                pngs[index] = stream.read()
+        else:
+            missing.append(index)
+
+    payloads = [_with_image_bytes(blocks[index]) for index in missing]
+    if workers and len(missing) > 1:
+        # spawn: los hijos solo importan blocks.py, sin heredar conexiones
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(missing)),
+            mp_context=context,
+        ) as pool:
+            rendered = list(pool.map(render_item_block, payloads, repeat(style)))
+    else:
+        rendered = [render_item_block(payload, style) for payload in payloads]
+
+    for index, png in zip(missing, rendered, strict=True):
+        pngs[index] = png
+        storage.save(_block_name(keys[index]), ContentFile(png))
+    return pngs, len(missing)
+
+
+def paginate(pngs, style, title):
+    """
+    Acomoda los bloques en páginas A4 sin partirlos.
+
+    Un bloque más alto que una página se reduce hasta caber. El título va
+    en la primera página y el número de página al pie de todas.
+    """
+    dpi = style["dpi"]
+    page_width, page_height = (mm(value, dpi) for value in PAGE_MM)
+    margin = mm(MARGIN_MM, dpi)
+    bottom = page_height - margin
+    header = Layout({**style, "font_size": FONT_SIZE + 5})
+    header.text(title, bold=True)
+    header.space(2)
+    header_image = header.render()
+
+    placements: list[list[tuple[Image.Image, int]]] = [[]]
+    y = margin + header_image.height
+    for png in pngs:
+        block: Image.Image = Image.open(BytesIO(png))
+        if block.height > bottom - margin:
+            ratio = (bottom - margin) / block.height
+            block = block.resize(
+                (round(block.width * ratio), bottom - margin),
+                Image.Resampling.LANCZOS,
+            )
+        if y + block.height > bottom and placements[-1]:
+            placements.append([])
+            y = margin
+        placements[-1].append((block, y))
+        y += block.height
+
+    pages = []
+    footer = Layout({**style, "font_size": FONT_SIZE - 2})
+    for number, blocks in enumerate(placements, start=1):
+        page = Image.new("L", (page_width, page_height), PAPER)
+        if number == 1:
+            page.paste(header_image, (margin, margin))
+        for block, top in blocks:
+            page.paste(block, (margin, top))
+        label = f"Página {number} de {len(placements)}"
+        draw = ImageDraw.Draw(page)
+        width = footer.regular.getlength(label)
+        draw.text(
+            ((page_width - width) / 2, bottom + margin // 3),
+            label,
+            font=footer.regular,
+            fill=GRAY,
+        )
+        pages.append(page)
+    return pages
+
+
+def render_booklet(exam, workers=BOOKLET_WORKERS):
+    """PDF del cuadernillo del examen"""
+    style = booklet_style()
+    pngs, rendered = render_blocks(item_blocks(exam.pk), style, workers)
+    logger.info("Cuadernillo del examen %s: %s bloques dibujados", exam.pk, rendered)
+    pages = paginate(pngs, style, exam.name)
+    return to_pdf(pages, style["dpi"], exam.name)
@@ -0,0 +1,80 @@
+"""Llaves y helpers de caché por versión de contenido del examen"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Exam
+
+RENDER_CACHE_TIMEOUT = getattr(settings, "EXAMS_RENDER_CACHE_TIMEOUT", 60 * 60 * 24)
+
+
+def version_key(exam_id):
+    return f"exams:version:{exam_id}"
+
+
+def fragment_key(name, exam_id, version):
+    return f"exams:{name}:{exam_id}:v{version}"
+
+
+def _stamp_query(exam_id):
+    return Exam.objects.filter(pk=exam_id).values_list("content_version", "updated_at")
+
+
+def get_content_stamp(exam_id):
+    """
+    ``(content_version, updated_at)`` del examen, leídos de la caché cuando
+    es posible. Devuelve ``None`` si el examen no existe.
+
+    Al fallar la caché se guarda con ``add``: si entretanto se confirmó un
+    cambio, ``refresh_content_stamp`` ya escribió la versión nueva y la leída
+    aquí, quizá anterior al commit, no la pisa.
+    """
+    stamp = cache.get(version_key(exam_id))
+    if stamp is None:
+        stamp = _stamp_query(exam_id).first()
+        if stamp is not None:
+            cache.add(version_key(exam_id), stamp, RENDER_CACHE_TIMEOUT)
+    return stamp
+
+
+def get_content_version(exam_id):
+    """Versión vigente del examen o ``None`` si no existe"""
+    stamp = get_content_stamp(exam_id)
+    return stamp[0] if stamp is not None else None
+
+
+async def aget_content_stamp(exam_id):
+    """``get_content_stamp`` para vistas async"""
+    stamp = await cache.aget(version_key(exam_id))
+    if stamp is None:
+        stamp = await _stamp_query(exam_id).afirst()
+        if stamp is not None:
+            await cache.aadd(version_key(exam_id), stamp, RENDER_CACHE_TIMEOUT)
+    return stamp
+
+
+async def aget_content_version(exam_id):
+    stamp = await aget_content_stamp(exam_id)
+    return stamp[0] if stamp is not None else None
+
+
+def refresh_content_stamp(exam_id):
+    """
+    Escribe en la caché la versión confirmada del examen (o la borra si el
+    examen ya no existe). Se llama tras el commit de cada cambio.
+    """
+    stamp = _stamp_query(exam_id).first()
+    if stamp is None:
+        cache.delete(version_key(exam_id))
+    else:
+        cache.set(version_key(exam_id), stamp, RENDER_CACHE_TIMEOUT)
+
+
+def get_or_render(name, exam_id, version, render):
+    """Devuelve el fragmento cacheado para esta versión o lo genera"""
+    key = fragment_key(name, exam_id, version)
+    fragment = cache.get(key)
+    if fragment is None:
+        fragment = render()
+        cache.set(key, fragment, RENDER_CACHE_TIMEOUT)
+    return fragment
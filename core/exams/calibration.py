@@ -0,0 +1,194 @@
+"""Calibración Rasch de un examen a partir de las respuestas almacenadas"""
+
+import math
+from itertools import islice
+
+import numpy as np
+from django.db import transaction
+
+from .models import Calibration
+from .models import Examinee
+from .models import ItemCalibration
+from .models import PersonMeasure
+from .rasch import calibrate_dichotomous
+from .rasch import calibrate_partial_credit
+from .scoring import PERSON_CHUNK_SIZE
+from .scoring import get_answer_key
+from .scoring import load_responses
+from .scoring import score_matrix
+
+PERSON_BATCH_SIZE = 1000
+
+
+def load_score_matrix(key, examinees, chunk_size=PERSON_CHUNK_SIZE):
+    """
+    Matriz de puntajes personas x ítems de los examinados.
+
+    Las respuestas se leen por bloques de examinados; solo la matriz de
+    puntajes (``int8``) queda completa en memoria.
+    """
+    examinee_ids = np.fromiter(
+        examinees.order_by("id")
+        .values_list("id", flat=True)
+        .iterator(
+            chunk_size=chunk_size,
+        ),
+        dtype=np.int64,
+    )
+    scores = np.empty((len(examinee_ids), key.n_items), dtype=np.int8)
+    for start in range(0, len(examinee_ids), chunk_size):
+        chunk = examinee_ids[start : start + chunk_size]
+        scores[start : start + chunk_size] = score_matrix(
+            key,
+            load_responses(key, chunk),
+        )
+    return examinee_ids, scores
+
+
+def _nullable(value):
+    return None if math.isnan(value) else float(value)
+
+
+def _initial_values(previous, item_ids, max_scores, examinee_ids):
+    """
+    Valores iniciales tomados de una calibración anterior.
+
+    Devuelve ``(pasos, medidas de personas)`` alineados con ``item_ids`` y
+    ``examinee_ids``, con ``nan`` para lo que no se calibró entonces.
+    """
+    steps = np.full((len(item_ids), int(max_scores.max(initial=1))), np.nan)
+    position = {item_id: n for n, item_id in enumerate(item_ids.tolist())}
+    rows = previous.item_measures.filter(measure__isnull=False).values_list(
+        "item_id",
+        "measure",
+        "thresholds",
+    )
+    for item_id, measure, thresholds in rows:
+        n = position.get(item_id)
+        if n is None:
+            continue
+        # Un ítem sin umbrales guardados (dicotómico) parte de pasos iguales
+        taus = thresholds or [0.0] * int(max_scores[n])
+        if len(taus) == max_scores[n]:
+            steps[n, : len(taus)] = measure + np.asarray(taus)
+
+    theta = np.full(len(examinee_ids), np.nan)
+    rows = np.array(
+        previous.person_measures.filter(measure__isnull=False).values_list(
+            "examinee_id",
+            "measure",
+        ),
+    ).reshape(-1, 2)
+    if len(rows) and len(examinee_ids):
+        pos = np.minimum(
+            np.searchsorted(examinee_ids, rows[:, 0]),
+            len(examinee_ids) - 1,
+        )
+        found = examinee_ids[pos] == rows[:, 0]
+        theta[pos[found]] = rows[found, 1]
+    return steps, theta
+
+
+@transaction.atomic
+def calibrate_exam(exam, *, warm_start=True):
+    """
+    Calibra el examen con todas sus respuestas y guarda medidas de ítems,
+    umbrales, medidas de personas y errores estándar.
+
+    Sin ítems politómicos se usa Rasch dicotómico; con ellos, crédito
+    parcial sobre todos los ítems. Con ``warm_start`` se parte de la última
+    calibración del examen, de modo que recalibrar tras unas pocas
+    respuestas nuevas converge en pocas iteraciones.
+    """
+    key = get_answer_key(exam.pk)
+    examinee_ids, scores = load_score_matrix(
+        key,
+        Examinee.objects.filter(administration__exam=exam),
+    )
+    previous = exam.calibrations.order_by("-pk").first() if warm_start else None
+    model = (
+        Calibration.MODEL_PARTIAL_CREDIT
+        if key.polytomous.any()
+        else Calibration.MODEL_RASCH
+    )
+    item_ids = key.item_ids
+    max_scores = key.max_scores
+    initial_steps = initial_theta = None
+    if previous is not None:
+        initial_steps, initial_theta = _initial_values(
+            previous,
+            item_ids,
+            max_scores,
+            examinee_ids,
+        )
+
+    if model == Calibration.MODEL_PARTIAL_CREDIT:
+        result = calibrate_partial_credit(
+            scores,
+            max_scores,
+            initial_steps=initial_steps,
+            initial_theta=initial_theta,
+        )
+        thresholds = [
+            t.tolist() if m > 1 and np.isfinite(t).all() else []
+            for t, m in zip(result.item_thresholds, max_scores, strict=True)
+        ]
+    else:
+        result = calibrate_dichotomous(
+            scores,
+            initial_measures=None if initial_steps is None else initial_steps[:, 0],
+            initial_theta=initial_theta,
+        )
+        thresholds = [[]] * len(item_ids)
+
+    calibration = Calibration.objects.create(
+        exam=exam,
+        model=model,
+        warm_start=previous,
+        iterations=result.iterations,
+        converged=result.converged,
+        max_residual=result.max_residual,
+        max_change=result.max_change,
+        n_persons=len(examinee_ids),
+        n_items=len(item_ids),
+    )
+    ItemCalibration.objects.bulk_create(
+        ItemCalibration(
+            calibration=calibration,
+            item_id=item_id,
+            measure=_nullable(measure),
+            standard_error=_nullable(se),
+            thresholds=item_thresholds,
+            is_extreme=bool(extreme),
+        )
+        for item_id, measure, se, item_thresholds, extreme in zip(
+            item_ids.tolist(),
+            result.item_measures.tolist(),
+            result.item_se.tolist(),
+            thresholds,
+            result.item_extreme.tolist(),
+            strict=True,
+        )
+    )
+    persons = (
+        PersonMeasure(
+            calibration=calibration,
+            examinee_id=examinee_id,
+            raw_score=int(raw),
+            measure=_nullable(measure),
+            standard_error=_nullable(se),
+            is_extreme=bool(extreme),
+        )
+        for examinee_id, raw, measure, se, extreme in zip(
+            examinee_ids.tolist(),
+            result.raw_scores.tolist(),
+            result.person_measures.tolist(),
+            result.person_se.tolist(),
+            result.person_extreme.tolist(),
+            strict=True,
+        )
+    )
+    # Por lotes para no instanciar todas las filas a la vez
+    while batch := list(islice(persons, PERSON_BATCH_SIZE)):
+        PersonMeasure.objects.bulk_create(batch)
+    return calibration
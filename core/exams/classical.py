@@ -0,0 +1,244 @@
+"""
+Estadísticos de teoría clásica de los tests (TCT), actualizados en línea.
+
+Antes de calibrar con Rasch se revisan la dificultad (valor p) de cada
+ítem, su correlación punto-biserial corregida (ítem contra el total sin el
+ítem), el alfa del examen sin el ítem y el alfa de Cronbach del examen,
+que con ítems dicotómicos es el KR-20. Todo sale de unas pocas sumas sobre
+los examinados, guardadas en ``ClassicalStatistics``: la cantidad de
+personas y, por ítem, Σx, Σx² y Σx·T, más ΣT y ΣT² (T es el puntaje
+total).
+
+Las sumas son aditivas por examinado. ``ingest_responses`` llama a
+``update_statistics`` antes de insertar un lote: los examinados del lote
+se califican con sus respuestas anteriores y con el lote aplicado encima,
+y se suma la diferencia. El costo depende del lote, no de la tabla de
+respuestas, y leer los estadísticos es O(ítems) sin importar cuántos
+examinados haya. Si el contenido del examen cambió (otra clave, otros
+ítems), o si se borraron examinados o respuestas, las sumas se recalculan
+completas la próxima vez que se leen.
+
+Un ítem sin responder cuenta como 0; los examinados sin ningún ítem
+respondido no cuentan.
+"""
+
+from itertools import islice
+from typing import NamedTuple
+
+import numpy as np
+from django.db import transaction
+
+from .models import ClassicalStatistics
+from .models import Examinee
+from .scoring import MISSING_SCORE
+from .scoring import NO_ANSWER
+from .scoring import PERSON_CHUNK_SIZE
+from .scoring import fill_responses
+from .scoring import get_answer_key
+from .scoring import load_responses
+from .scoring import score_matrix
+
+SUM_FIELDS = ["n_persons", "sums", "squares", "item_total", "total", "total_squares"]
+# Ítems necesarios para calcular el alfa
+MIN_ALPHA_ITEMS = 2
+
+
+class ItemStatistics(NamedTuple):
+    item_id: int
+    code: str
+    # Puntaje medio sobre el máximo del ítem
+    p_value: float | None
+    mean: float | None
+    sd: float | None
+    # Correlación con el total sin el ítem
+    point_biserial: float | None
+    alpha_if_deleted: float | None
+
+
+class ExamStatistics(NamedTuple):
+    n_persons: int
+    mean: float | None
+    sd: float | None
+    alpha: float | None
+    # Igual al alfa si todos los ítems son dicotómicos; si no, ``None``
+    kr20: float | None
+    items: list
+
+
+def sufficient_statistics(scores):
+    """Sumas de una matriz personas x ítems de ``score_matrix``"""
+    scores = np.asarray(scores)
+    answered = (scores != MISSING_SCORE).any(axis=1)
+    x = np.where(scores == MISSING_SCORE, 0, scores)[answered].astype(np.int64)
+    totals = x.sum(axis=1)
+    return {
+        "n_persons": len(x),
+        "sums": x.sum(axis=0),
+        "squares": (x * x).sum(axis=0),
+        "item_total": totals @ x,
+        "total": int(totals.sum()),
+        "total_squares": int(totals @ totals),
+    }
+
+
+def _combine(current, delta, sign=1):
+    return {name: current[name] + sign * delta[name] for name in SUM_FIELDS}
+
+
+def _stored_sums(stats):
+    return {
+        name: np.asarray(value, dtype=np.int64) if isinstance(value, list) else value
+        for name, value in ((f, getattr(stats, f)) for f in SUM_FIELDS)
+    }
+
+
+def _store(stats, key, sums):
+    stats.content_version = key.version
+    stats.item_ids = key.item_ids.tolist()
+    for name in SUM_FIELDS:
+        value = sums[name]
+        setattr(stats, name, value.tolist() if hasattr(value, "tolist") else value)
+    stats.save()
+
+
+def _score_chunks(key, examinee_ids):
+    examinee_ids = iter(examinee_ids)
+    while chunk := list(islice(examinee_ids, PERSON_CHUNK_SIZE)):
+        yield score_matrix(key, load_responses(key, chunk))
+
+
+@transaction.atomic
+def rebuild_statistics(exam_id):
+    """
+    Recalcula las sumas del examen con todas sus respuestas.
+
+    Los examinados se califican por bloques, en memoria constante. La fila
+    queda bloqueada mientras tanto: las ingestas del examen esperan y luego
+    suman sobre el resultado.
+    """
+    key = get_answer_key(exam_id)
+    ClassicalStatistics.objects.get_or_create(exam_id=exam_id)
+    stats = ClassicalStatistics.objects.select_for_update().get(exam_id=exam_id)
+    examinee_ids = (
+        Examinee.objects.filter(administration__exam_id=exam_id)
+        .order_by("id")
+        .values_list("id", flat=True)
+        .iterator(chunk_size=PERSON_CHUNK_SIZE)
+    )
+    sums = sufficient_statistics(np.zeros((0, key.n_items), dtype=np.int8))
+    for scores in _score_chunks(key, examinee_ids):
+        sums = _combine(sums, sufficient_statistics(scores))
+    _store(stats, key, sums)
+    return stats
+
+
+def update_statistics(exam_id, examinee_ids, subquestion_ids, option_ids):
+    """
+    Suma a los estadísticos del examen el efecto de un lote de respuestas.
+
+    Debe llamarse dentro de la transacción de la ingesta y antes de
+    insertar el lote. Si el examen no tiene estadísticos vigentes no hace
+    nada: se recalculan al leerlos.
+    """
+    stats = (
+        ClassicalStatistics.objects.select_for_update().filter(exam_id=exam_id).first()
+    )
+    if stats is None:
+        return
+    key = get_answer_key(exam_id)
+    if key is None or stats.content_version != key.version:
+        return
+    examinee_ids = np.asarray(examinee_ids, dtype=np.int64)
+    people = np.unique(examinee_ids)
+    before = load_responses(key, people)
+    after = before.copy()
+    # En el orden del lote: la última respuesta de cada par es la vigente
+    fill_responses(
+        key,
+        after,
+        np.searchsorted(people, examinee_ids),
+        subquestion_ids,
+        [NO_ANSWER if pk is None else pk for pk in option_ids],
+    )
+    delta = _combine(
+        sufficient_statistics(score_matrix(key, after)),
+        sufficient_statistics(score_matrix(key, before)),
+        sign=-1,
+    )
+    _store(stats, key, _combine(_stored_sums(stats), delta))
+
+
+def _nullable(value):
+    return None if not np.isfinite(value) else float(value)
+
+
+def summarize(sums, key):
+    """``ExamStatistics`` a partir de las sumas, en O(ítems)"""
+    n = sums["n_persons"]
+    n_items = key.n_items
+    if not n:
+        items = [
+            ItemStatistics(pk, code, None, None, None, None, None)
+            for pk, code in zip(key.item_ids.tolist(), key.item_codes, strict=True)
+        ]
+        return ExamStatistics(0, None, None, None, None, items)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = sums["sums"] / n
+        variance = sums["squares"] / n - mean**2
+        total_mean = sums["total"] / n
+        total_variance = sums["total_squares"] / n - total_mean**2
+        covariance = sums["item_total"] / n - mean * total_mean
+        # Total sin el ítem: T - x
+        rest_variance = total_variance - 2 * covariance + variance
+        point_biserial = (covariance - variance) / np.sqrt(variance * rest_variance)
+        p_value = mean / key.max_scores
+        alpha = np.nan
+        if n_items >= MIN_ALPHA_ITEMS:
+            alpha = n_items / (n_items - 1) * (1 - variance.sum() / total_variance)
+        alpha_if_deleted = np.full(n_items, np.nan)
+        if n_items - 1 >= MIN_ALPHA_ITEMS:
+            alpha_if_deleted = (
+                (n_items - 1)
+                / (n_items - 2)
+                * (1 - (variance.sum() - variance) / rest_variance)
+            )
+
+    items = [
+        ItemStatistics(pk, code, *(_nullable(v) for v in values))
+        for pk, code, *values in zip(
+            key.item_ids.tolist(),
+            key.item_codes,
+            p_value,
+            mean,
+            np.sqrt(variance),
+            point_biserial,
+            alpha_if_deleted,
+            strict=True,
+        )
+    ]
+    alpha = _nullable(alpha)
+    return ExamStatistics(
+        n,
+        float(total_mean),
+        float(np.sqrt(total_variance)),
+        alpha,
+        None if key.polytomous.any() else alpha,
+        items,
+    )
+
+
+def get_classical_statistics(exam_id):
+    """
+    Estadísticos clásicos vigentes del examen, o ``None`` si no existe.
+
+    Con las sumas al día es una consulta más la clave de respuestas
+    cacheada; si faltan o son de otra versión se recalculan una vez.
+    """
+    key = get_answer_key(exam_id)
+    if key is None:
+        return None
+    stats = ClassicalStatistics.objects.filter(exam_id=exam_id).first()
+    if stats is None or stats.content_version != key.version:
+        stats = rebuild_statistics(exam_id)
+    return summarize(_stored_sums(stats), key)
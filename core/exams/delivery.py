@@ -0,0 +1,281 @@
+"""
+Contenido del examen para los alumnos.
+
+Al empezar una aplicación todo un grupo pide el mismo examen en el mismo
+minuto. El contenido se serializa una vez por versión a JSON compacto y se
+comprime ahí mismo con gzip y, si está instalado, con Brotli; las
+peticiones siguientes solo eligen los bytes según ``Accept-Encoding``.
+
+Como la clave de respuestas (ver ``scoring.py``), el resultado se guarda en
+un LRU de cada proceso y, debajo, en la caché compartida, ambos indexados
+por versión de contenido. Con la versión también en la caché, servir el
+examen no consulta la base de datos. Tras un cambio, un solo proceso lo
+construye (un candado con ``cache.add``) y los demás esperan su resultado.
+
+El contenido no incluye qué opción es correcta ni los criterios de
+calificación.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+from .cache import RENDER_CACHE_TIMEOUT
+from .cache import aget_content_version
+from .cache import fragment_key
+from .cache import get_content_version
+from .models import Exam
+from .models import Item
+from .models import Option
+from .models import SubQuestion
+from .renditions import image_srcset
+
+try:
+    import brotli
+except ImportError:  # Brotli es opcional: sin él se sirve gzip
+    brotli = None
+
+# Exámenes ya comprimidos que conserva cada proceso
+DELIVERY_CACHE_SIZE = getattr(settings, "EXAMS_DELIVERY_CACHE_SIZE", 32)
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+# Segundos que vence el candado de construcción y que los demás esperan
+BUILD_LOCK_TIMEOUT = 30
+BUILD_WAIT = 5
+BUILD_POLL = 0.05
+
+_payloads = OrderedDict()
+_payloads_lock = threading.Lock()
+
+
+class Payload(NamedTuple):
+    version: int
+    digest: str
+    # Codificación ("identity", "gzip", "br") -> bytes
+    bodies: dict
+
+    def encode(self, accept_encoding):
+        """``(codificación, bytes)`` más chicos que acepta el cliente"""
+        accepted = _accepted_codings(accept_encoding)
+        for coding in ("br", "gzip"):
+            if coding in self.bodies and coding in accepted:
+                return coding, self.bodies[coding]
+        return "identity", self.bodies["identity"]
+
+
+def _accepted_codings(header):
+    accepted = set()
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = params.strip().removeprefix("q=")
+        if coding and quality not in {"0", "0.0", "0.00", "0.000"}:
+            accepted.add(coding.strip().lower())
+    if "*" in accepted:
+        accepted |= {"br", "gzip"}
+    return accepted
+
+
+def _image(image, renditions):
+    if not image:
+        return None
+    return {"url": image.url, "srcset": image_srcset(image, renditions)}
+
+
+def serialize_delivery(exam):
+    """Contenido del examen para los alumnos, en cuatro consultas"""
+    options = Prefetch(
+        "options",
+        queryset=Option.objects.only("id", "subquestion_id", "label", "text"),
+    )
+    subquestions = Prefetch(
+        "subquestions",
+        queryset=SubQuestion.objects.only(
+            "id",
+            "item_id",
+            "context_html",
+            "image",
+            "image_renditions",
+        ).prefetch_related(options),
+    )
+    items = Item.objects.filter(exam=exam).only(
+        "id",
+        "exam_id",
+        "code",
+        "instruction_html",
+        "image",
+        "image_renditions",
+        "scoring_type",
+    )
+    return {
+        "id": exam.pk,
+        "name": exam.name,
+        "content_version": exam.content_version,
+        "items": [
+            {
+                "id": item.id,
+                "code": item.code,
+                "instruction": item.instruction_html,
+                "image": _image(item.image, item.image_renditions),
+                "scoring_type": item.scoring_type,
+                "subquestions": [
+                    {
+                        "id": subq.id,
+                        "context": subq.context_html,
+                        "image": _image(subq.image, subq.image_renditions),
+                        "options": [
+                            {
+                                "id": option.id,
+                                "label": option.label,
+                                "text": option.text,
+                            }
+                            for option in subq.options.all()
+                        ],
+                    }
+                    for subq in item.subquestions.all()
+                ],
+            }
+            for item in items.prefetch_related(subquestions)
+        ],
+    }
+
+
+def build_payload(exam):
+    """Serializa y comprime el examen"""
+    body = json.dumps(
+        serialize_delivery(exam),
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode()
+    bodies = {
+        "identity": body,
+        # mtime fijo: los mismos bytes en todos los procesos
+        "gzip": gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0),
+    }
+    if brotli is not None:
+        bodies["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    return Payload(exam.content_version, digest, bodies)
+
+
+def _recall(exam_id, version):
+    with _payloads_lock:
+        payload = _payloads.get((exam_id, version))
+        if payload is not None:
+            _payloads.move_to_end((exam_id, version))
+        return payload
+
+
+def _remember(exam_id, payload):
+    with _payloads_lock:
+        for stale in [k for k in _payloads if k[0] == exam_id]:
+            del _payloads[stale]
+        _payloads[(exam_id, payload.version)] = payload
+        while len(_payloads) > DELIVERY_CACHE_SIZE:
+            _payloads.popitem(last=False)
+    return payload
+
+
+def _build_and_share(exam_id, lock=None):
+    try:
+        exam = Exam.objects.filter(pk=exam_id).first()
+        if exam is None:
+            return None
+        payload = build_payload(exam)
+        # La caché compartida guarda una tupla simple, no la clase. Si el
+        # examen cambió mientras tanto, se guarda con su nueva versión.
+        cache.set(
+            fragment_key("delivery", exam_id, payload.version),
+            tuple(payload),
+            RENDER_CACHE_TIMEOUT,
+        )
+        return payload
+    finally:
+        if lock is not None:
+            cache.delete(lock)
+
+
+def _shared(cached):
+    return Payload(*cached) if cached is not None else None
+
+
+def _wait_shared(key):
+    deadline = time.monotonic() + BUILD_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(BUILD_POLL)
+        payload = _shared(cache.get(key))
+        if payload is not None:
+            return payload
+    return None
+
+
+async def _await_shared(key):
+    deadline = time.monotonic() + BUILD_WAIT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(BUILD_POLL)
+        payload = _shared(await cache.aget(key))
+        if payload is not None:
+            return payload
+    return None
+
+
+def get_payload(exam_id):
+    """
+    Contenido comprimido de la versión vigente, o ``None`` si el examen no
+    existe. Solo la primera petición de cada versión consulta la base.
+    """
+    version = get_content_version(exam_id)
+    if version is None:
+        return None
+    payload = _recall(exam_id, version)
+    if payload is not None:
+        return payload
+    key = fragment_key("delivery", exam_id, version)
+    lock = f"{key}:building"
+    payload = _shared(cache.get(key))
+    if payload is None and cache.add(lock, 1, BUILD_LOCK_TIMEOUT):
+        payload = _build_and_share(exam_id, lock)
+    elif payload is None:
+        # Otro proceso lo está construyendo; si no termina a tiempo se
+        # construye aquí también
+        payload = _wait_shared(key) or _build_and_share(exam_id)
+    return payload and _remember(exam_id, payload)
+
+
+async def aget_payload(exam_id):
+    """``get_payload`` para vistas async; solo la construcción usa un hilo"""
+    version = await aget_content_version(exam_id)
+    if version is None:
+        return None
+    payload = _recall(exam_id, version)
+    if payload is not None:
+        return payload
+    key = fragment_key("delivery", exam_id, version)
+    lock = f"{key}:building"
+    payload = _shared(await cache.aget(key))
+    if payload is None and await cache.aadd(lock, 1, BUILD_LOCK_TIMEOUT):
+        payload = await sync_to_async(_build_and_share)(exam_id, lock)
+    elif payload is None:
+        payload = await _await_shared(key)
+        if payload is None:
+            payload = await sync_to_async(_build_and_share)(exam_id)
+    return payload and _remember(exam_id, payload)
+
+
+def forget_payload(exam_id=None):
+    """Descarta del LRU del proceso el contenido del examen (o todos)"""
+    with _payloads_lock:
+        if exam_id is None:
+            _payloads.clear()
+            return
+        for stale in [k for k in _payloads if k[0] == exam_id]:
+            del _payloads[stale]
@@ -0,0 +1,250 @@
+"""
+Control de exposición de ítems en la aplicación adaptativa (Sympson-Hetter).
+
+Elegir siempre el ítem más informativo hace que miles de alumnos
+simultáneos vean los mismos pocos ítems. Con Sympson-Hetter los candidatos
+se recorren de mayor a menor información y cada uno se aplica con
+probabilidad ``K``; si se rechaza se pasa al siguiente. ``K`` se ajusta en
+línea: con ``P(S)`` la fracción de sesiones en que el ítem fue candidato,
+``K = min(1, r / P(S))`` mantiene la tasa de aplicación ``K·P(S)`` por
+debajo de ``EXPOSURE_MAX_RATE``.
+
+Los contadores (sesiones, veces que cada ítem fue candidato y aplicado)
+son comunes a todos los workers: un hash de Redis por calibración en
+producción (HINCRBY) o un diccionario del proceso en desarrollo y pruebas.
+Cada worker acumula sus incrementos y los envía en un solo pipeline, junto
+con la lectura de todos los contadores, cuando junta
+``EXPOSURE_FLUSH_SIZE`` eventos o cuando su foto de los contadores tiene
+más de ``EXPOSURE_SNAPSHOT_TTL`` segundos. Elegir un ítem no hace viajes
+de red: las ``K`` se calculan una vez por foto, como arreglo. El envío se
+hace sin el candado del worker, y si Redis falla se sigue con la última
+foto.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# "memory" (contadores por proceso, para desarrollo) o "redis"
+EXPOSURE_COUNTERS = getattr(settings, "EXAMS_EXPOSURE_COUNTERS", "memory")
+EXPOSURE_REDIS_URL = getattr(settings, "EXAMS_EXPOSURE_REDIS_URL", "")
+# Tasa máxima de aplicación de un ítem; con 0 no se controla la exposición
+EXPOSURE_MAX_RATE = getattr(settings, "EXAMS_EXPOSURE_MAX_RATE", 0.25)
+# Segundos que vive la foto de los contadores de cada worker
+EXPOSURE_SNAPSHOT_TTL = getattr(settings, "EXAMS_EXPOSURE_SNAPSHOT_TTL", 5)
+# Eventos que acumula un worker antes de enviarlos
+EXPOSURE_FLUSH_SIZE = getattr(settings, "EXAMS_EXPOSURE_FLUSH_SIZE", 200)
+KEY_PREFIX = "exams:exposure"
+# Segundos que se conservan los contadores de una calibración sin uso
+COUNTERS_TIMEOUT = 60 * 60 * 24 * 30
+# Sesiones antes de empezar a limitar: con pocas las tasas son ruido
+MIN_SESSIONS = 50
+SESSIONS = "sessions"
+
+
+class MemoryCounters:
+    """Contadores en la memoria del proceso, para desarrollo y pruebas"""
+
+    def __init__(self):
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def add_and_read(self, calibration_id, increments):
+        with self._lock:
+            counters = self._counters.setdefault(calibration_id, Counter())
+            counters.update(increments)
+            return dict(counters)
+
+
+class RedisCounters:
+    """Un hash de Redis por calibración; un viaje por envío"""
+
+    def __init__(self, url=EXPOSURE_REDIS_URL):
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+
+    def add_and_read(self, calibration_id, increments):
+        key = f"{KEY_PREFIX}:{calibration_id}"
+        pipe = self.client.pipeline(transaction=False)
+        for field, amount in increments.items():
+            pipe.hincrby(key, field, amount)
+        if increments:
+            pipe.expire(key, COUNTERS_TIMEOUT)
+        pipe.hgetall(key)
+        counters = pipe.execute()[-1]
+        return {field: int(value) for field, value in counters.items()}
+
+
+COUNTERS = {
+    "memory": MemoryCounters,
+    "redis": RedisCounters,
+}
+
+_counters = None
+_counters_lock = threading.Lock()
+
+
+def get_counters():
+    """Contadores configurados en ``EXAMS_EXPOSURE_COUNTERS``, uno por proceso"""
+    global _counters  # noqa: PLW0603
+    with _counters_lock:
+        if _counters is None:
+            _counters = COUNTERS[EXPOSURE_COUNTERS]()
+        return _counters
+
+
+class ExposureControl:
+    """
+    Sympson-Hetter para el banco de una calibración en este worker.
+
+    Los campos del hash son ``sessions``, ``s:<ítem>`` (veces candidato) y
+    ``a:<ítem>`` (veces aplicado).
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        pool,
+        *,
+        counters=None,
+        max_rate=EXPOSURE_MAX_RATE,
+        snapshot_ttl=EXPOSURE_SNAPSHOT_TTL,
+        flush_size=EXPOSURE_FLUSH_SIZE,
+        seed=None,
+    ):
+        self.pool = pool
+        # Sin contadores propios se usan los de EXAMS_EXPOSURE_COUNTERS
+        self.counters = counters
+        self.max_rate = max_rate
+        self.snapshot_ttl = snapshot_ttl
+        self.flush_size = flush_size
+        self.acceptance = np.ones(len(pool))
+        self.selected = np.zeros(len(pool), dtype=np.int64)
+        self.administered = np.zeros(len(pool), dtype=np.int64)
+        self.sessions = 0
+        self._pending: Counter[str] = Counter()
+        self._pending_events = 0
+        self._read_at = None
+        # Un envío en curso: los demás hilos siguen con la foto anterior
+        self._reading = False
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+    def choose(self, information, *, first=False):
+        """
+        Posición del ítem a aplicar.
+
+        ``information`` es la fila de información de la sesión con
+        ``-inf`` en los ítems ya aplicados o descartados; ``first`` indica
+        que es el primer ítem de la sesión. Sortear todos los ítems y tomar
+        el más informativo entre los aceptados equivale a recorrerlos en
+        orden.
+
+        Devuelve ``(posición, rechazados)``: la máscara de los candidatos
+        rechazados, que como en Sympson-Hetter no vuelven a ofrecerse en
+        la sesión; así cada ítem es candidato a lo sumo una vez por sesión
+        y ``P(S)`` es una tasa por sesión.
+        """
+        self._refresh()
+        with self._lock:
+            accepted = self._rng.random(len(information)) < self.acceptance
+            available = np.isfinite(information)
+            if (accepted & available).any():
+                position = int(np.where(accepted, information, -np.inf).argmax())
+            else:
+                position = int(information.argmax())
+            # Candidatos: el aplicado y los más informativos rechazados
+            considered = information >= information[position]
+            considered &= available
+            item_ids = self.pool.item_ids[considered].tolist()
+            if first:
+                self._pending[SESSIONS] += 1
+            self._pending.update(f"s:{item_id}" for item_id in item_ids)
+            self._pending[f"a:{self.pool.item_ids[position]}"] += 1
+            self._pending_events += 1
+        considered[position] = False
+        return position, considered
+
+    def exposure_rates(self):
+        """Tasa de aplicación de cada ítem según la última foto"""
+        with self._lock:
+            return self.administered / max(self.sessions, 1)
+
+    def flush(self):
+        """Envía los incrementos pendientes y renueva la foto"""
+        with self._lock:
+            increments = self._take()
+        self._read(increments)
+
+    def _refresh(self):
+        with self._lock:
+            stale = (
+                self._read_at is None
+                or time.monotonic() - self._read_at >= self.snapshot_ttl
+            )
+            due = stale or self._pending_events >= self.flush_size
+            if not due or self._reading:
+                return
+            increments = self._take()
+        self._read(increments)
+
+    def _take(self):
+        # Con el candado: los incrementos pasan al envío en curso
+        increments = self._pending
+        self._pending = Counter()
+        self._pending_events = 0
+        self._reading = True
+        return increments
+
+    def _read(self, increments):
+        """
+        Envía ``increments`` y cambia la foto; la red se usa sin el candado.
+
+        Si los contadores fallan se conserva la foto anterior (al inicio,
+        aceptación 1) y los incrementos se reenvían en el siguiente intento.
+        """
+        try:
+            counters = (self.counters or get_counters()).add_and_read(
+                self.pool.calibration_id,
+                increments,
+            )
+        except redis.RedisError as error:
+            logger.warning("Contadores de exposición no disponibles: %s", error)
+            with self._lock:
+                self._pending.update(increments)
+                self._read_at = time.monotonic()
+                self._reading = False
+            return
+        sessions = counters.get(SESSIONS, 0)
+        selected = self._column(counters, "s")
+        administered = self._column(counters, "a")
+        if sessions < MIN_SESSIONS:
+            acceptance = np.ones(len(self.pool))
+        else:
+            with np.errstate(divide="ignore"):
+                acceptance = np.minimum(1, self.max_rate / (selected / sessions))
+        with self._lock:
+            self.sessions = sessions
+            self.selected = selected
+            self.administered = administered
+            self.acceptance = acceptance
+            self._read_at = time.monotonic()
+            self._reading = False
+
+    def _column(self, counters, prefix):
+        return np.array(
+            [counters.get(f"{prefix}:{pk}", 0) for pk in self.pool.item_ids.tolist()],
+            dtype=np.int64,
+        )
+
+
+def exposure_control(pool):
+    """Control de exposición del banco, o ``None`` si está desactivado"""
+    if not EXPOSURE_MAX_RATE:
+        return None
+    return ExposureControl(pool)
@@ -0,0 +1,135 @@
+"""
+Ingesta masiva de respuestas.
+
+Las respuestas llegan en lotes (un arreglo por petición) y se insertan con
+``bulk_create`` por bloques; nunca se hace un ``save()`` por fila. En la
+misma transacción se actualizan los estadísticos clásicos del examen (ver
+``classical.py``).
+"""
+
+from django.conf import settings
+from django.db import transaction
+
+from .classical import update_statistics
+from .models import Examinee
+from .models import Response
+from .models import SubQuestion
+
+INGEST_BATCH_SIZE = getattr(settings, "EXAMS_INGEST_BATCH_SIZE", 1000)
+INGEST_MAX_ROWS = getattr(settings, "EXAMS_INGEST_MAX_ROWS", 5000)
+CODE_MAX_LENGTH = Examinee._meta.get_field("code").max_length  # noqa: SLF001
+
+
+def exam_option_map(exam_id):
+    """``{subquestion_id: {option_id, ...}}`` del examen en una consulta"""
+    option_map = {}
+    rows = SubQuestion.objects.filter(item__exam_id=exam_id).values_list(
+        "id",
+        "options__id",
+    )
+    for subq_id, option_id in rows:
+        options = option_map.setdefault(subq_id, set())
+        if option_id is not None:
+            options.add(option_id)
+    return option_map
+
+
+def resolve_examinees(administration, codes):
+    """
+    ``{código: id}`` de los examinados, creando los que faltan.
+
+    Son a lo sumo tres consultas sin importar cuántos códigos lleguen.
+    """
+    codes = set(codes)
+    examinee_ids = dict(
+        Examinee.objects.filter(
+            administration=administration,
+            code__in=codes,
+        ).values_list("code", "id"),
+    )
+    missing = codes - examinee_ids.keys()
+    if missing:
+        # Otro lote concurrente puede crear el mismo examinado
+        Examinee.objects.bulk_create(
+            [Examinee(administration=administration, code=code) for code in missing],
+            ignore_conflicts=True,
+        )
+        examinee_ids.update(
+            Examinee.objects.filter(
+                administration=administration,
+                code__in=missing,
+            ).values_list("code", "id"),
+        )
+    return examinee_ids
+
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _validate_row(index, row, option_map):
+    if not isinstance(row, dict):
+        return None, {"index": index, "error": "Formato inválido"}
+    code = str(row.get("examinee") or "").strip()
+    subq_id = row.get("subquestion")
+    option_id = row.get("option")
+    error = None
+    if not code:
+        error = "Falta el código del examinado"
+    elif len(code) > CODE_MAX_LENGTH:
+        error = "El código del examinado es muy largo"
+    elif not _is_id(subq_id) or not (option_id is None or _is_id(option_id)):
+        error = "Formato inválido"
+    elif subq_id not in option_map:
+        error = "La subpregunta no es de este examen"
+    elif option_id is not None and option_id not in option_map[subq_id]:
+        error = "La opción no es de la subpregunta"
+    if error:
+        return None, {"index": index, "error": error}
+    return (code, subq_id, option_id), None
+
+
+def ingest_responses(administration, rows, batch_size=INGEST_BATCH_SIZE):
+    """
+    Valida e inserta un lote de respuestas.
+
+    Cada fila es ``{"examinee": código, "subquestion": id, "option": id}``
+    (``option`` nulo para una subpregunta sin responder). Las filas
+    inválidas se reportan con su índice y no detienen el resto del lote.
+
+    Devuelve ``(creadas, errores)``.
+    """
+    option_map = exam_option_map(administration.exam_id)
+
+    valid, errors = [], []
+    for index, row in enumerate(rows):
+        parsed, error = _validate_row(index, row, option_map)
+        if error:
+            errors.append(error)
+        else:
+            valid.append(parsed)
+
+    if not valid:
+        return 0, errors
+
+    with transaction.atomic():
+        examinee_ids = resolve_examinees(administration, (v[0] for v in valid))
+        # Antes de insertar: compara con las respuestas anteriores del lote
+        update_statistics(
+            administration.exam_id,
+            [examinee_ids[code] for code, _, _ in valid],
+            [subq_id for _, subq_id, _ in valid],
+            [option_id for _, _, option_id in valid],
+        )
+        Response.objects.bulk_create(
+            [
+                Response(
+                    examinee_id=examinee_ids[code],
+                    subquestion_id=subq_id,
+                    option_id=option_id,
+                )
+                for code, subq_id, option_id in valid
+            ],
+            batch_size=batch_size,
+        )
+    return len(valid), errors
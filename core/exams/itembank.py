@@ -0,0 +1,459 @@
+"""
+Importación masiva de bancos de ítems.
+
+Formatos aceptados:
+
+* JSON Lines: un ítem por línea con la forma de ``serialize_exam``
+  (``code``, ``instruction``, ``subquestions`` con sus ``options``...);
+* JSON: la exportación del examen (``{"exam": {"items": [...]}}``), un
+  documento ``{"items": [...]}`` o una lista de ítems;
+* CSV y XLSX: una fila por opción con las columnas de ``FLAT_COLUMNS``.
+  Las filas consecutivas con el mismo ``code`` forman un ítem y, dentro de
+  él, las que tienen el mismo ``subquestion`` forman una subpregunta.
+
+El ``image`` de ítems y subpreguntas puede ser el nombre o la URL de una
+imagen ya guardada (como la publica la exportación): el ítem importado
+apunta al mismo archivo, sin volver a subirlo. Las imágenes de cada lote
+se validan juntas, con una sola lectura de ``MediaBlob``.
+
+Salvo el JSON, que se carga completo, los archivos se leen en streaming y
+los ítems se insertan por lotes con ``bulk_create`` (tres INSERT por lote:
+ítems, subpreguntas y opciones). Un ítem inválido se reporta con su fila y
+no detiene el resto de la carga.
+"""
+
+import csv
+import io
+import json
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from .models import Item
+from .models import MediaBlob
+from .models import Option
+from .models import SubQuestion
+from .ordering import ORDER_GAP
+from .ordering import next_order
+from .richtext import compile_fields
+from .signals import batch_content_changes
+from .storage import BLOB_PREFIX
+
+IMPORT_BATCH_SIZE = getattr(settings, "EXAMS_IMPORT_BATCH_SIZE", 500)
+FORMATS = ["jsonl", "json", "csv", "xlsx"]
+FLAT_COLUMNS = [
+    "code",
+    "scoring_type",
+    "instruction",
+    "correct_criteria",
+    "partial_criteria",
+    "incorrect_criteria",
+    "subquestion",
+    "context_text",
+    "label",
+    "text",
+    "is_correct",
+]
+ITEM_TEXT_FIELDS = [
+    "instruction",
+    "correct_criteria",
+    "partial_criteria",
+    "incorrect_criteria",
+]
+TRUE_VALUES = {"1", "true", "verdadero", "si", "sí", "x"}
+FALSE_VALUES = {"", "0", "false", "falso", "no"}
+CODE_MAX_LENGTH = Item._meta.get_field("code").max_length  # noqa: SLF001
+LABEL_MAX_LENGTH = Option._meta.get_field("label").max_length  # noqa: SLF001
+TEXT_MAX_LENGTH = Option._meta.get_field("text").max_length  # noqa: SLF001
+
+
+class ImportFormatError(ValueError):
+    """El archivo no se puede leer en el formato indicado"""
+
+
+def detect_format(filename):
+    """Formato a partir de la extensión del archivo"""
+    suffix = Path(filename).suffix.lower().lstrip(".")
+    if suffix not in FORMATS:
+        msg = f"Formato no soportado: {suffix or filename}"
+        raise ImportFormatError(msg)
+    return suffix
+
+
+# =============================================================================
+# Lectura
+# =============================================================================
+# Cada lector produce ``(fila, ítem)``, donde ``ítem`` es un diccionario con
+# la forma de ``save_item_tree`` o un ``str`` con el error de esa fila.
+
+
+ENCODING_ERROR = "El archivo no está en UTF-8 (en Excel: Guardar como CSV UTF-8)"
+
+
+def _text(stream):
+    if isinstance(stream, io.TextIOBase):
+        return stream
+    return io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+
+def _lines(stream):
+    """Líneas del archivo; la decodificación falla a mitad de la lectura"""
+    try:
+        yield from _text(stream)
+    except UnicodeDecodeError as exc:
+        raise ImportFormatError(ENCODING_ERROR) from exc
+
+
+def iter_jsonl(stream):
+    for row, line in enumerate(_lines(stream), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield row, json.loads(line)
+        except json.JSONDecodeError:
+            yield row, "JSON inválido"
+
+
+def iter_json(stream):
+    try:
+        data = json.load(_text(stream))
+    except UnicodeDecodeError as exc:
+        raise ImportFormatError(ENCODING_ERROR) from exc
+    except json.JSONDecodeError as exc:
+        msg = f"JSON inválido: {exc}"
+        raise ImportFormatError(msg) from exc
+    if isinstance(data, dict):
+        data = data.get("exam", data)
+    items = data.get("items") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        msg = "Se esperaba una lista de ítems"
+        raise ImportFormatError(msg)
+    yield from enumerate(items, start=1)
+
+
+def iter_csv(stream):
+    reader = csv.reader(_lines(stream))
+    # La fila 1 es el encabezado
+    yield from group_flat_rows(reader, first_row=1)
+
+
+def iter_xlsx(stream):
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except Exception as exc:
+        msg = "No se pudo leer el archivo XLSX"
+        raise ImportFormatError(msg) from exc
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        yield from group_flat_rows(rows, first_row=1)
+    finally:
+        workbook.close()
+
+
+READERS = {
+    "jsonl": iter_jsonl,
+    "json": iter_json,
+    "csv": iter_csv,
+    "xlsx": iter_xlsx,
+}
+
+
+def _cell(value):
+    return "" if value is None else str(value).strip()
+
+
+def group_flat_rows(rows, first_row=1):  # noqa: C901
+    """
+    Convierte filas planas (una por opción, con encabezado) en ítems.
+
+    Un ítem se emite al llegar la primera fila del siguiente, así que solo
+    uno está en memoria a la vez.
+    """
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = [_cell(name).lower() for name in header]
+    missing = {"code", "instruction"} - set(columns)
+    if missing:
+        msg = f"Faltan columnas: {', '.join(sorted(missing))}"
+        raise ImportFormatError(msg)
+
+    item, item_row, subq_key = None, None, None
+    for row, values in enumerate(rows, start=first_row + 1):
+        data = dict(zip(columns, (_cell(v) for v in values), strict=False))
+        if not any(data.values()):
+            continue
+        code = data.get("code", "")
+        if not code:
+            yield row, "Falta el código del ítem"
+            continue
+        if item is None or code != item["code"]:
+            if item is not None:
+                yield item_row, item
+            item = {
+                "code": code,
+                "scoring_type": data.get("scoring_type") or Item.SCORING_DICHOTOMOUS,
+                "subquestions": [],
+                **{field: data.get(field, "") for field in ITEM_TEXT_FIELDS},
+            }
+            item_row, subq_key = row, None
+        key = data.get("subquestion", "")
+        if not item["subquestions"] or key != subq_key:
+            item["subquestions"].append(
+                {"context_text": data.get("context_text", ""), "options": []},
+            )
+            subq_key = key
+        if data.get("label") or data.get("text"):
+            item["subquestions"][-1]["options"].append(
+                {
+                    "label": data.get("label", ""),
+                    "text": data.get("text", ""),
+                    "is_correct": data.get("is_correct", ""),
+                },
+            )
+    if item is not None:
+        yield item_row, item
+
+
+# =============================================================================
+# Validación
+# =============================================================================
+
+
+def _as_bool(value):
+    if isinstance(value, bool):
+        return value
+    text = _cell(value).lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    return None
+
+
+def _image_name(value):
+    """Nombre del archivo al que apunta ``value`` (nombre o URL), o ``""``"""
+    value = _cell(value)
+    start = value.find(BLOB_PREFIX + "/")
+    return value[start:] if start >= 0 else value
+
+
+def _renditions(model):
+    """Versiones reducidas de otra fila que ya use el archivo"""
+    return Subquery(
+        model.objects.filter(image=OuterRef("name"))
+        .exclude(image_renditions={})
+        .values("image_renditions")[:1],
+    )
+
+
+def _resolve_images(batch, errors):
+    """
+    Completa las imágenes de un lote con dos consultas, sin importar cuántas
+    traiga.
+
+    Descarta (con su error) los ítems que apuntan a un archivo desconocido.
+    Los archivos usados se marcan como recientes para que la recolección no
+    los borre mientras el lote se importa (ver ``media.py``).
+    """
+    names = {
+        name
+        for _, item in batch
+        for name in [item["image"]] + [s["image"] for s in item["subquestions"]]
+        if name
+    }
+    blobs = {}
+    if names:
+        blobs = {
+            name: item_renditions or subq_renditions or {}
+            for name, item_renditions, subq_renditions in MediaBlob.objects.filter(
+                name__in=names,
+            )
+            .annotate(
+                item_renditions=_renditions(Item),
+                subq_renditions=_renditions(SubQuestion),
+            )
+            .values_list("name", "item_renditions", "subq_renditions")
+        }
+        MediaBlob.objects.filter(name__in=blobs).update(used_at=timezone.now())
+
+    def image(name):
+        return {"image": name, "image_renditions": blobs[name]} if name else {}
+
+    resolved = []
+    for row, item in batch:
+        missing = [
+            name
+            for name in [item["image"]] + [s["image"] for s in item["subquestions"]]
+            if name and name not in blobs
+        ]
+        if missing:
+            errors.append({"row": row, "error": f"Imagen no disponible: {missing[0]}"})
+            continue
+        item["image"] = image(item["image"])
+        for subq in item["subquestions"]:
+            subq["image"] = image(subq["image"])
+        resolved.append(item)
+    return resolved
+
+
+def _clean_subquestion(number, subq):
+    """Subpregunta normalizada o el error que la invalida"""
+    options = subq.get("options") if isinstance(subq, dict) else None
+    if not options or not isinstance(options, list):
+        return None, f"La subpregunta {number} no tiene opciones"
+    clean_options = []
+    for option in options:
+        if not isinstance(option, dict):
+            return None, f"Opción inválida en la subpregunta {number}"
+        is_correct = _as_bool(option.get("is_correct", False))
+        if is_correct is None:
+            return None, f"Valor de is_correct inválido: {option['is_correct']}"
+        label = _cell(option.get("label"))
+        text = _cell(option.get("text"))
+        if len(label) > LABEL_MAX_LENGTH or len(text) > TEXT_MAX_LENGTH:
+            return None, f"Opción demasiado larga en la subpregunta {number}"
+        clean_options.append({"label": label, "text": text, "is_correct": is_correct})
+    if not any(option["is_correct"] for option in clean_options):
+        return None, f"La subpregunta {number} no tiene opción correcta"
+    return {
+        "context_text": _cell(subq.get("context_text")),
+        "image": _image_name(subq.get("image")),
+        "options": clean_options,
+    }, None
+
+
+def clean_item(data, taken_codes):  # noqa: PLR0911
+    """
+    Valida y normaliza un ítem importado.
+
+    Devuelve ``(ítem, None)`` o ``(None, error)``. ``taken_codes`` son los
+    códigos ya usados en el examen o antes en el archivo.
+    """
+    if not isinstance(data, dict):
+        return None, "Formato inválido"
+    code = _cell(data.get("code"))
+    if not code:
+        return None, "Falta el código del ítem"
+    if len(code) > CODE_MAX_LENGTH:
+        return None, f"El código supera {CODE_MAX_LENGTH} caracteres"
+    if code in taken_codes:
+        return None, f"El código {code} ya existe en el examen"
+    scoring_type = _cell(data.get("scoring_type")).upper() or Item.SCORING_DICHOTOMOUS
+    if scoring_type not in dict(Item.SCORING_CHOICES):
+        return None, f"Tipo de calificación inválido: {scoring_type}"
+    if not _cell(data.get("instruction")):
+        return None, "Falta la instrucción"
+
+    subquestions = data.get("subquestions") or []
+    if not isinstance(subquestions, list) or not subquestions:
+        return None, "El ítem no tiene subpreguntas"
+    clean_subqs = []
+    for number, subq in enumerate(subquestions, start=1):
+        clean_subq, error = _clean_subquestion(number, subq)
+        if error:
+            return None, error
+        clean_subqs.append(clean_subq)
+
+    return {
+        "code": code,
+        "scoring_type": scoring_type,
+        # Nombre del archivo; se valida por lote en ``_resolve_images``
+        "image": _image_name(data.get("image")),
+        "subquestions": clean_subqs,
+        **{field: _cell(data.get(field)) for field in ITEM_TEXT_FIELDS},
+    }, None
+
+
+# =============================================================================
+# Escritura
+# =============================================================================
+
+
+def _create_batch(exam, batch, first_order):
+    """Crea un lote de ítems con tres INSERT (uno por nivel)"""
+    items = [
+        Item(
+            exam=exam,
+            order=first_order + n * ORDER_GAP,
+            code=data["code"],
+            scoring_type=data["scoring_type"],
+            **data["image"],
+            **{field: data[field] for field in ITEM_TEXT_FIELDS},
+        )
+        for n, data in enumerate(batch)
+    ]
+    for item in items:
+        compile_fields(item)
+    Item.objects.bulk_create(items)
+    subquestions = []
+    for item, data in zip(items, batch, strict=True):
+        subquestions += [
+            (
+                SubQuestion(
+                    item=item,
+                    order=order * ORDER_GAP,
+                    context_text=subq["context_text"],
+                    **subq["image"],
+                ),
+                subq["options"],
+            )
+            for order, subq in enumerate(data["subquestions"], start=1)
+        ]
+    for subq, _ in subquestions:
+        compile_fields(subq)
+    SubQuestion.objects.bulk_create(subq for subq, _ in subquestions)
+    Option.objects.bulk_create(
+        Option(subquestion=subq, order=order * ORDER_GAP, **option)
+        for subq, options in subquestions
+        for order, option in enumerate(options, start=1)
+    )
+
+
+def _valid_items(exam, records, errors):
+    taken_codes = set(exam.items.values_list("code", flat=True))
+    for row, data in records:
+        if isinstance(data, str):
+            item, error = None, data
+        else:
+            item, error = clean_item(data, taken_codes)
+        if error:
+            errors.append({"row": row, "error": error})
+            continue
+        taken_codes.add(item["code"])
+        yield row, item
+
+
+@transaction.atomic
+def import_item_bank(exam, records, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Crea en el examen los ítems leídos por uno de los ``READERS``.
+
+    Los ítems se agregan al final del examen en el orden del archivo.
+    Devuelve ``(creados, errores)``, con un error ``{"row", "error"}`` por
+    ítem descartado.
+    """
+    errors = []
+    created = 0
+    first_order = next_order(exam)
+    items = _valid_items(exam, records, errors)
+    with batch_content_changes(exam.pk):
+        while batch := list(islice(items, batch_size)):
+            batch = _resolve_images(batch, errors)
+            if batch:
+                _create_batch(exam, batch, first_order + created * ORDER_GAP)
+                created += len(batch)
+    errors.sort(key=lambda error: error["row"])
+    return created, errors
+
+
+def import_item_bank_file(exam, stream, file_format):
+    """Importa un archivo abierto en modo binario"""
+    return import_item_bank(exam, READERS[file_format](stream))
@@ -0,0 +1,191 @@
+import asyncio
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.contrib.auth import HASH_SESSION_KEY
+from django.contrib.auth import SESSION_KEY
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.urls import reverse
+
+from core.exams.models import Exam
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara la entrega del examen a alumnos con conexiones lentas por "
+        "WSGI (un hilo por petición) y por ASGI (un solo proceso async)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("exam_id", type=int)
+        parser.add_argument("user_id", type=int, help="Usuario con el que se entra")
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=500,
+            help="Alumnos descargando a la vez",
+        )
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.2,
+            help="Segundos que tarda el alumno en recibir la respuesta",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=16,
+            help="Hilos WSGI, como los workers de gunicorn",
+        )
+
+    def handle(self, *args, **options):
+        if not Exam.objects.filter(pk=options["exam_id"]).exists():
+            msg = f"No existe el examen {options['exam_id']}"
+            raise CommandError(msg)
+        user = get_user_model().objects.filter(pk=options["user_id"]).first()
+        if user is None:
+            msg = f"No existe el usuario {options['user_id']}"
+            raise CommandError(msg)
+
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        request = {
+            "path": reverse("exams:api-exam-delivery", args=[options["exam_id"]]),
+            "host": next(
+                (host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"),
+                "localhost",
+            ),
+            "cookie": f"{settings.SESSION_COOKIE_NAME}={session.session_key}",
+        }
+        try:
+            for name, run in (("WSGI", self.run_wsgi), ("ASGI", self.run_asgi)):
+                started = time.perf_counter()
+                latencies = run(request, options)
+                self.report(name, latencies, time.perf_counter() - started)
+        finally:
+            session.delete()
+
+    def run_wsgi(self, request, options):
+        handler = WSGIHandler()
+        latency = options["latency"]
+
+        def fetch():
+            started = time.perf_counter()
+            status = []
+            body = handler(
+                {
+                    "REQUEST_METHOD": "GET",
+                    "PATH_INFO": request["path"],
+                    "SCRIPT_NAME": "",
+                    "QUERY_STRING": "",
+                    "SERVER_NAME": request["host"],
+                    "SERVER_PORT": "443",
+                    "SERVER_PROTOCOL": "HTTP/1.1",
+                    "HTTP_HOST": request["host"],
+                    "HTTP_COOKIE": request["cookie"],
+                    "HTTP_ACCEPT_ENCODING": "gzip",
+                    "wsgi.version": (1, 0),
+                    "wsgi.url_scheme": "https",
+                    "wsgi.input": BytesIO(),
+                    "wsgi.errors": sys.stderr,
+                    "wsgi.multithread": True,
+                    "wsgi.multiprocess": False,
+                    "wsgi.run_once": False,
+                },
+                lambda code, headers: status.append(int(code.split()[0])),
+            )
+            b"".join(body)
+            # El hilo queda ocupado mientras el cliente lento recibe
+            time.sleep(latency)
+            body.close()
+            return status[0], time.perf_counter() - started
+
+        # Sin servidor delante, la concurrencia la limitan los hilos
+        with ThreadPoolExecutor(max_workers=options["threads"]) as pool:
+            futures = [pool.submit(fetch) for _ in range(options["requests"])]
+            return self.statuses([future.result() for future in futures])
+
+    def run_asgi(self, request, options):
+        handler = ASGIHandler()
+        latency = options["latency"]
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "https",
+            "path": request["path"],
+            "raw_path": request["path"].encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [
+                (b"host", request["host"].encode()),
+                (b"cookie", request["cookie"].encode()),
+                (b"accept-encoding", b"gzip"),
+            ],
+            "client": ("127.0.0.1", 50000),
+            "server": (request["host"], 443),
+        }
+
+        async def fetch(slots):
+            async with slots:
+                started = time.perf_counter()
+                status = []
+                received = False
+
+                async def receive():
+                    nonlocal received
+                    if not received:
+                        received = True
+                        return {"type": "http.request", "body": b"", "more_body": False}
+                    # El cliente no se desconecta
+                    await asyncio.Event().wait()
+                    return None
+
+                async def send(message):
+                    if message["type"] == "http.response.start":
+                        status.append(message["status"])
+                    elif not message.get("more_body"):
+                        await asyncio.sleep(latency)
+
+                await handler(dict(scope), receive, send)
+                return status[0], time.perf_counter() - started
+
+        async def main():
+            slots = asyncio.Semaphore(options["concurrency"])
+            return await asyncio.gather(
+                *(fetch(slots) for _ in range(options["requests"])),
+            )
+
+        return self.statuses(asyncio.run(main()))
+
+    def statuses(self, results):
+        failed = [status for status, _ in results if status != HTTPStatus.OK]
+        if failed:
+            msg = f"{len(failed)} peticiones fallaron (estado {failed[0]})"
+            raise CommandError(msg)
+        return [elapsed for _, elapsed in results]
+
+    def report(self, name, latencies, elapsed):
+        latencies = sorted(latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        self.stdout.write(
+            f"{name}: {len(latencies) / elapsed:,.0f} peticiones/s, "
+            f"p50 {statistics.median(latencies) * 1000:.0f} ms, "
+            f"p95 {p95 * 1000:.0f} ms",
+        )
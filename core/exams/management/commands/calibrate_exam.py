@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from core.exams.calibration import calibrate_exam
+from core.exams.models import Exam
+
+
+class Command(BaseCommand):
+    help = "Calibra los ítems de un examen (Rasch o crédito parcial, JMLE)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("exam_id", type=int)
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help="No partir de la calibración anterior del examen",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            exam = Exam.objects.get(pk=options["exam_id"])
+        except Exam.DoesNotExist as exc:
+            msg = f"No existe el examen {options['exam_id']}"
+            raise CommandError(msg) from exc
+
+        calibration = calibrate_exam(exam, warm_start=not options["cold"])
+        status = "convergió" if calibration.converged else "NO convergió"
+        self.stdout.write(
+            f"Calibración {calibration.pk} ({calibration.get_model_display()}): "
+            f"{calibration.n_items} ítems, "
+            f"{calibration.n_persons} personas, {calibration.iterations} "
+            f"iteraciones ({status})",
+        )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core.exams.media import collect_unreferenced
+
+
+class Command(BaseCommand):
+    help = "Borra las imágenes guardadas por contenido que ya no usa ningún ítem"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo lista los archivos que se borrarían",
+        )
+
+    def handle(self, *args, **options):
+        blobs = collect_unreferenced(dry_run=options["dry_run"])
+        for blob in blobs:
+            self.stdout.write(blob.name)
+        verb = "por borrar" if options["dry_run"] else "borrados"
+        size = sum(blob.size for blob in blobs)
+        self.stdout.write(f"{len(blobs)} archivos {verb} ({size} bytes)")
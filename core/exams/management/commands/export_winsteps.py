@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from core.exams.models import Exam
+from core.exams.winsteps import exam_persons
+from core.exams.winsteps import iter_winsteps_lines
+
+
+class Command(BaseCommand):
+    help = "Exporta el archivo de control y datos de Winsteps de un examen"
+
+    def add_arguments(self, parser):
+        parser.add_argument("exam_id", type=int)
+        parser.add_argument(
+            "-o",
+            "--output",
+            help="Archivo de salida (por defecto la salida estándar)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            exam = Exam.objects.get(pk=options["exam_id"])
+        except Exam.DoesNotExist as exc:
+            msg = f"No existe el examen {options['exam_id']}"
+            raise CommandError(msg) from exc
+
+        lines = iter_winsteps_lines(exam, exam_persons(exam))
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as output:  # noqa: PTH123
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
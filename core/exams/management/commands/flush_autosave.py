@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.exams.autosave import flush_all
+
+
+class Command(BaseCommand):
+    help = "Escribe en la tabla de respuestas lo pendiente del guardado automático"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Segundos entre vaciados; sin intervalo se vacía una vez",
+        )
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+        while True:
+            created = flush_all()
+            if created or not interval:
+                self.stdout.write(f"{created} respuestas guardadas")
+            if not interval:
+                return
+            time.sleep(interval)
@@ -0,0 +1,42 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from core.exams.itembank import FORMATS
+from core.exams.itembank import ImportFormatError
+from core.exams.itembank import detect_format
+from core.exams.itembank import import_item_bank_file
+from core.exams.models import Exam
+
+
+class Command(BaseCommand):
+    help = "Importa un banco de ítems (JSON Lines, JSON, CSV o XLSX) a un examen"
+
+    def add_arguments(self, parser):
+        parser.add_argument("exam_id", type=int)
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="Formato del archivo (por defecto, según la extensión)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            exam = Exam.objects.get(pk=options["exam_id"])
+        except Exam.DoesNotExist as exc:
+            msg = f"No existe el examen {options['exam_id']}"
+            raise CommandError(msg) from exc
+
+        path = Path(options["path"])
+        try:
+            file_format = options["format"] or detect_format(path.name)
+            with path.open("rb") as stream:
+                created, errors = import_item_bank_file(exam, stream, file_format)
+        except (ImportFormatError, OSError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        for error in errors:
+            self.stderr.write(f"Fila {error['row']}: {error['error']}")
+        self.stdout.write(f"{created} ítems importados, {len(errors)} con errores")
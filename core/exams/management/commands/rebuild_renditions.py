@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from core.exams.models import Item
+from core.exams.models import SubQuestion
+from core.exams.renditions import render_image
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera las versiones reducidas de las imágenes que no las tienen "
+        "(por ejemplo, si un reinicio perdió la cola del generador)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo cuenta las imágenes sin versiones vigentes",
+        )
+
+    def handle(self, *args, **options):
+        missing = 0
+        for model in (Item, SubQuestion):
+            rows = (
+                model.objects.exclude(image="")
+                .exclude(image__isnull=True)
+                .values_list("pk", "image", "image_renditions")
+                .order_by("pk")
+                .iterator()
+            )
+            for pk, name, renditions in rows:
+                if (renditions or {}).get("source") == name:
+                    continue
+                missing += 1
+                if not options["dry_run"]:
+                    render_image(model, pk, name)
+        verb = "sin versiones" if options["dry_run"] else "procesadas"
+        self.stdout.write(f"{missing} imágenes {verb}")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.exams.models import Exam
+from core.exams.search import index_exam
+
+
+class Command(BaseCommand):
+    help = "Actualiza el índice de búsqueda de los exámenes indicados (o de todos)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("exam_ids", nargs="*", type=int)
+
+    def handle(self, *args, **options):
+        exam_ids = options["exam_ids"] or Exam.objects.values_list("pk", flat=True)
+        written = sum(index_exam(exam_id) for exam_id in exam_ids)
+        self.stdout.write(f"{written} documentos actualizados")
@@ -0,0 +1,33 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from core.exams.booklets import BOOKLET_WORKERS
+from core.exams.booklets import render_booklet
+from core.exams.models import Exam
+
+
+class Command(BaseCommand):
+    help = "Genera el cuadernillo PDF de un examen"
+
+    def add_arguments(self, parser):
+        parser.add_argument("exam_id", type=int)
+        parser.add_argument("path")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=BOOKLET_WORKERS,
+            help="Procesos que dibujan los ítems (0 para no usar procesos)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            exam = Exam.objects.get(pk=options["exam_id"])
+        except Exam.DoesNotExist as exc:
+            msg = f"No existe el examen {options['exam_id']}"
+            raise CommandError(msg) from exc
+
+        path = Path(options["path"])
+        path.write_bytes(render_booklet(exam, workers=options["workers"]))
+        self.stdout.write(f"Cuadernillo guardado en {path}")
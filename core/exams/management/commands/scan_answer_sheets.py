@@ -0,0 +1,52 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from core.exams.answer_sheets import OMR_WORKERS
+from core.exams.answer_sheets import image_paths
+from core.exams.answer_sheets import scan_answer_sheets
+from core.exams.models import Administration
+
+
+class Command(BaseCommand):
+    help = "Lee hojas de respuestas escaneadas e ingesta sus respuestas"
+
+    def add_arguments(self, parser):
+        parser.add_argument("administration_id", type=int)
+        parser.add_argument(
+            "paths",
+            nargs="+",
+            help="Imágenes de las hojas o directorios que las contienen",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=OMR_WORKERS,
+            help="Procesos que leen las hojas (0 para no usar procesos)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            administration = Administration.objects.select_related("exam").get(
+                pk=options["administration_id"],
+            )
+        except Administration.DoesNotExist as exc:
+            msg = f"No existe la aplicación {options['administration_id']}"
+            raise CommandError(msg) from exc
+
+        paths = list(image_paths(Path(path) for path in options["paths"]))
+        summary = scan_answer_sheets(
+            administration,
+            paths,
+            workers=options["workers"],
+        )
+        for path, error in summary.rejected:
+            self.stderr.write(f"{path}: {error}")
+        for path, numbers in summary.ambiguous:
+            listed = ", ".join(str(number) for number in numbers)
+            self.stdout.write(f"{path}: doble marca en {listed}")
+        self.stdout.write(
+            f"{summary.read} hojas leídas, {len(summary.rejected)} rechazadas, "
+            f"{summary.created} respuestas registradas",
+        )
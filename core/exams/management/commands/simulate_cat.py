@@ -0,0 +1,108 @@
+import statistics
+import time
+from collections import Counter
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from core.exams.adaptive import ESTIMATOR_EAP
+from core.exams.adaptive import ESTIMATOR_MLE
+from core.exams.adaptive import AdaptiveSession
+from core.exams.adaptive import compile_item_pool
+from core.exams.adaptive import latest_calibration_id
+from core.exams.exposure import EXPOSURE_MAX_RATE
+from core.exams.exposure import ExposureControl
+from core.exams.exposure import MemoryCounters
+from core.exams.models import Exam
+
+
+class Command(BaseCommand):
+    help = (
+        "Simula aplicaciones adaptativas con el banco calibrado de un examen "
+        "y reporta precisión, largo y tiempo de selección"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("exam_id", type=int)
+        parser.add_argument("--examinees", type=int, default=500)
+        parser.add_argument(
+            "--estimator",
+            choices=[ESTIMATOR_EAP, ESTIMATOR_MLE],
+            default=None,
+        )
+        parser.add_argument(
+            "--max-exposure",
+            type=float,
+            default=EXPOSURE_MAX_RATE,
+            help="Tasa máxima de aplicación de un ítem; 0 sin control",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        exam = Exam.objects.filter(pk=options["exam_id"]).first()
+        if exam is None:
+            msg = f"No existe el examen {options['exam_id']}"
+            raise CommandError(msg)
+        calibration_id = latest_calibration_id(exam)
+        if calibration_id is None:
+            msg = f"El examen {exam.pk} no tiene calibraciones"
+            raise CommandError(msg)
+        # Banco propio y contadores en memoria: la simulación no cuenta en
+        # la exposición de las aplicaciones reales
+        pool = compile_item_pool(calibration_id)
+        if not len(pool):
+            msg = "La calibración no tiene ítems utilizables"
+            raise CommandError(msg)
+        pool.exposure = None
+        if options["max_exposure"]:
+            pool.exposure = ExposureControl(
+                pool,
+                counters=MemoryCounters(),
+                max_rate=options["max_exposure"],
+                seed=options["seed"],
+            )
+        kwargs = {}
+        if options["estimator"]:
+            kwargs["estimator"] = options["estimator"]
+
+        rng = np.random.default_rng(options["seed"])
+        true_theta = rng.normal(0, 1, options["examinees"])
+        estimates, lengths, selections = [], [], []
+        exposures = Counter()
+        for theta in true_theta:
+            session = AdaptiveSession(pool, **kwargs)
+            while True:
+                started = time.perf_counter()
+                item_id = session.next_item()
+                selections.append(time.perf_counter() - started)
+                if item_id is None:
+                    break
+                exposures[item_id] += 1
+                session.record(item_id, self.answer(pool, item_id, theta, rng))
+            estimates.append(session.theta)
+            lengths.append(len(session.positions))
+
+        errors = np.array(estimates) - true_theta
+        selections.sort()
+        self.stdout.write(
+            f"{len(pool)} ítems, {len(true_theta)} examinados: "
+            f"{statistics.mean(lengths):.1f} ítems en promedio, "
+            f"RMSE {np.sqrt((errors**2).mean()):.3f}, sesgo {errors.mean():+.3f}",
+        )
+        self.stdout.write(
+            f"Exposición: {len(exposures)} ítems usados, tasa máxima "
+            f"{max(exposures.values()) / len(true_theta):.2f}",
+        )
+        self.stdout.write(
+            f"Selección: p50 {statistics.median(selections) * 1e6:.0f} µs, "
+            f"p99 {selections[int(len(selections) * 0.99) - 1] * 1e6:.0f} µs",
+        )
+
+    def answer(self, pool, item_id, theta, rng):
+        """Puntaje simulado según el modelo a la habilidad verdadera"""
+        steps = pool.steps[pool.position(item_id)]
+        steps = steps[~np.isnan(steps)]
+        logits = np.concatenate([[0.0], (theta - steps).cumsum()])
+        p = np.exp(logits - logits.max())
+        return int(rng.choice(len(p), p=p / p.sum()))
@@ -0,0 +1,104 @@
+"""
+Recolección de las imágenes guardadas por contenido (ver ``storage.py``).
+
+Un ``MediaBlob`` puede estar referenciado por cualquier cantidad de ítems y
+subpreguntas, de uno o varios exámenes; la cuenta se hace con subconsultas
+en lugar de un contador, así que no la desajustan las operaciones masivas
+(copias, importaciones, borrados en cascada) que no emiten señales.
+
+Quien vuelve a usar un archivo existente (una subida con el mismo contenido,
+una importación) actualiza ``used_at``; la recolección solo toma archivos
+sin uso dentro del margen y vuelve a comprobarlo con la fila bloqueada,
+justo antes de borrar.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count
+from django.db.models import IntegerField
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Item
+from .models import MediaBlob
+from .models import SubQuestion
+from .models import exam_media_storage
+from .renditions import FORMATS
+from .renditions import RENDITION_WIDTHS
+from .renditions import rendition_name
+
+# Un archivo recién subido o reutilizado aún puede no estar referenciado (la
+# transacción que lo usa no terminó); se respeta este margen antes de borrarlo
+COLLECT_GRACE = timedelta(days=1)
+
+
+def _references(model):
+    """Filas de ``model`` cuya imagen es el archivo"""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(image=OuterRef("name"))
+            .order_by()
+            .values("image")
+            .annotate(count=Count("pk"))
+            .values("count"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def with_reference_counts(queryset=None):
+    """``MediaBlob`` anotados con ``references``, las filas que los usan"""
+    queryset = MediaBlob.objects.all() if queryset is None else queryset
+    return queryset.annotate(references=_references(Item) + _references(SubQuestion))
+
+
+def _collect(blob, cutoff, backend):
+    """
+    Borra el archivo si sigue sin referencias ni uso desde ``cutoff``.
+
+    La fila queda bloqueada mientras se borran los archivos: una subida
+    concurrente del mismo contenido espera y, al no encontrar la fila, lo
+    vuelve a escribir.
+    """
+    with transaction.atomic():
+        locked = (
+            MediaBlob.objects.select_for_update()
+            .filter(pk=blob.pk, used_at__lt=cutoff)
+            .exists()
+        )
+        if not locked or with_reference_counts(
+            MediaBlob.objects.filter(pk=blob.pk),
+        ).filter(references__gt=0):
+            return False
+        names = [
+            rendition_name(blob.name, width, extension)
+            for width in RENDITION_WIDTHS
+            for _, extension, _ in FORMATS.values()
+        ]
+        # El original al final: si algo falla, la fila y el original quedan
+        for name in [*names, blob.name]:
+            if backend.exists(name):
+                backend.delete(name)
+        MediaBlob.objects.filter(pk=blob.pk).delete()
+    return True
+
+
+def collect_unreferenced(grace=COLLECT_GRACE, *, dry_run=False):
+    """
+    Borra los archivos sin referencias que no se usan hace más de ``grace``.
+
+    Devuelve los ``MediaBlob`` recolectados.
+    """
+    cutoff = timezone.now() - grace
+    blobs = list(
+        with_reference_counts().filter(references=0, used_at__lt=cutoff).order_by("pk"),
+    )
+    if dry_run:
+        return blobs
+    storage = exam_media_storage()
+    backend = getattr(storage, "backend", storage)
+    return [blob for blob in blobs if _collect(blob, cutoff, backend)]
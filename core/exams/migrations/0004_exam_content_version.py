@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0003_remove_exam_description_remove_exam_grade_level_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='content_version',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='Versión de contenido'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0004_exam_content_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Administration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='Nombre')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('is_open', models.BooleanField(default=True, verbose_name='Abierta')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='administrations_created', to=settings.AUTH_USER_MODEL, verbose_name='Creado por')),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='administrations', to='exams.exam', verbose_name='Examen')),
+            ],
+            options={
+                'verbose_name': 'Aplicación',
+                'verbose_name_plural': 'Aplicaciones',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Examinee',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(help_text='Matrícula o folio', max_length=50, verbose_name='Código')),
+                ('name', models.CharField(blank=True, max_length=255, verbose_name='Nombre')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de registro')),
+                ('administration', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='examinees', to='exams.administration', verbose_name='Aplicación')),
+            ],
+            options={
+                'verbose_name': 'Examinado',
+                'verbose_name_plural': 'Examinados',
+                'ordering': ['code'],
+                'unique_together': {('administration', 'code')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Response',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('answered_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de respuesta')),
+                ('examinee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='responses', to='exams.examinee', verbose_name='Examinado')),
+                ('option', models.ForeignKey(blank=True, help_text='Vacío si la subpregunta quedó sin responder', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='responses', to='exams.option', verbose_name='Opción elegida')),
+                ('subquestion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='responses', to='exams.subquestion', verbose_name='Subpregunta')),
+            ],
+            options={
+                'verbose_name': 'Respuesta',
+                'verbose_name_plural': 'Respuestas',
+                'indexes': [models.Index(fields=['examinee', 'subquestion', 'id'], name='exams_response_latest_idx')],
+            },
+        ),
+    ]
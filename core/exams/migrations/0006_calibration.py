@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0005_administration_examinee_response'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Calibration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(choices=[('R', 'Rasch dicotómico (JMLE)')], default='R', max_length=1, verbose_name='Modelo')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha')),
+                ('iterations', models.PositiveIntegerField(default=0, verbose_name='Iteraciones')),
+                ('converged', models.BooleanField(default=False, verbose_name='Convergió')),
+                ('max_residual', models.FloatField(null=True, verbose_name='Residuo máximo')),
+                ('max_change', models.FloatField(null=True, verbose_name='Cambio máximo (logits)')),
+                ('n_persons', models.PositiveIntegerField(default=0, verbose_name='Personas')),
+                ('n_items', models.PositiveIntegerField(default=0, verbose_name='Ítems')),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='calibrations', to='exams.exam', verbose_name='Examen')),
+            ],
+            options={
+                'verbose_name': 'Calibración',
+                'verbose_name_plural': 'Calibraciones',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ItemCalibration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('measure', models.FloatField(null=True, verbose_name='Medida (logits)')),
+                ('standard_error', models.FloatField(null=True, verbose_name='Error estándar')),
+                ('is_extreme', models.BooleanField(default=False, verbose_name='Puntaje extremo')),
+                ('calibration', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='item_measures', to='exams.calibration', verbose_name='Calibración')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='calibrations', to='exams.item', verbose_name='Ítem')),
+            ],
+            options={
+                'verbose_name': 'Calibración de ítem',
+                'verbose_name_plural': 'Calibraciones de ítems',
+                'unique_together': {('calibration', 'item')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PersonMeasure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('raw_score', models.PositiveIntegerField(default=0, verbose_name='Puntaje bruto')),
+                ('measure', models.FloatField(null=True, verbose_name='Medida (logits)')),
+                ('standard_error', models.FloatField(null=True, verbose_name='Error estándar')),
+                ('is_extreme', models.BooleanField(default=False, verbose_name='Puntaje extremo')),
+                ('calibration', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='person_measures', to='exams.calibration', verbose_name='Calibración')),
+                ('examinee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='measures', to='exams.examinee', verbose_name='Examinado')),
+            ],
+            options={
+                'verbose_name': 'Medida de persona',
+                'verbose_name_plural': 'Medidas de personas',
+                'unique_together': {('calibration', 'examinee')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0006_calibration'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calibration',
+            name='warm_start',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='exams.calibration', verbose_name='Valores iniciales de'),
+        ),
+        migrations.AddField(
+            model_name='itemcalibration',
+            name='thresholds',
+            field=models.JSONField(blank=True, default=list, verbose_name='Umbrales'),
+        ),
+        migrations.AlterField(
+            model_name='calibration',
+            name='model',
+            field=models.CharField(choices=[('R', 'Rasch dicotómico (JMLE)'), ('P', 'Crédito parcial (JMLE)')], default='R', max_length=1, verbose_name='Modelo'),
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Índice de texto completo propio de cada motor; el contenido se mantiene
+# desde exams_searchdocument con triggers (SQLite) o una columna generada
+# (PostgreSQL), así que también sigue los borrados en cascada.
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE exams_search_fts USING fts5(
+        title, body,
+        content='exams_searchdocument', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER exams_search_ai AFTER INSERT ON exams_searchdocument BEGIN
+        INSERT INTO exams_search_fts(rowid, title, body)
+        VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER exams_search_ad AFTER DELETE ON exams_searchdocument BEGIN
+        INSERT INTO exams_search_fts(exams_search_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER exams_search_au AFTER UPDATE ON exams_searchdocument BEGIN
+        INSERT INTO exams_search_fts(exams_search_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO exams_search_fts(rowid, title, body)
+        VALUES (new.id, new.title, new.body);
+    END
+    """,
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS exams_search_au",
+    "DROP TRIGGER IF EXISTS exams_search_ad",
+    "DROP TRIGGER IF EXISTS exams_search_ai",
+    "DROP TABLE IF EXISTS exams_search_fts",
+]
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE exams_searchdocument ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('spanish', title), 'A')
+        || setweight(to_tsvector('spanish', body), 'B')
+    ) STORED
+    """,
+    """
+    CREATE INDEX exams_searchdocument_vector
+    ON exams_searchdocument USING gin (search_vector)
+    """,
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS exams_searchdocument_vector",
+    "ALTER TABLE exams_searchdocument DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0007_partial_credit_calibration'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255, verbose_name='Título')),
+                ('body', models.TextField(blank=True, verbose_name='Contenido')),
+                ('checksum', models.CharField(max_length=32, verbose_name='Suma de verificación')),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_documents', to='exams.exam', verbose_name='Examen')),
+                ('item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='exams.item', verbose_name='Ítem')),
+            ],
+            options={
+                'verbose_name': 'Documento de búsqueda',
+                'verbose_name_plural': 'Documentos de búsqueda',
+                'unique_together': {('exam', 'item')},
+            },
+        ),
+        migrations.RunPython(
+            _run({"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD}),
+            _run({"sqlite": SQLITE_BACKWARD, "postgresql": POSTGRES_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0008_search_document'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['-created_at', '-id'], name='exams_exam_created_idx'),
+        ),
+    ]
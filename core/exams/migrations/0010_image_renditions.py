@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0009_exam_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Versiones de la imagen'),
+        ),
+        migrations.AddField(
+            model_name='subquestion',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Versiones de la imagen'),
+        ),
+    ]
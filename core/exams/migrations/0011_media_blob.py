@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:51
+
+import core.exams.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0010_image_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Archivo')),
+                ('size', models.PositiveBigIntegerField(default=0, verbose_name='Tamaño')),
+                ('used_at', models.DateTimeField(auto_now=True, verbose_name='Último uso')),
+            ],
+            options={
+                'verbose_name': 'Archivo de imagen',
+                'verbose_name_plural': 'Archivos de imagen',
+            },
+        ),
+        migrations.AlterField(
+            model_name='item',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=core.exams.models.exam_media_storage, upload_to='exams/items/', verbose_name='Imagen'),
+        ),
+        migrations.AlterField(
+            model_name='subquestion',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=core.exams.models.exam_media_storage, upload_to='exams/subquestions/', verbose_name='Imagen'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:53
+
+from django.db import migrations, models
+
+from core.exams.richtext import RICH_TEXT_FIELDS
+from core.exams.richtext import compile_fields
+
+BATCH_SIZE = 500
+
+
+def compile_existing(apps, schema_editor):
+    for model_name, fields in RICH_TEXT_FIELDS.items():
+        model = apps.get_model("exams", model_name)
+        compiled = [name for pair in fields.values() for name in pair]
+        rows = model.objects.only("pk", *fields).order_by("pk")
+        batch = []
+        for row in rows.iterator(chunk_size=BATCH_SIZE):
+            compile_fields(row)
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                model.objects.bulk_update(batch, compiled)
+                batch = []
+        model.objects.bulk_update(batch, compiled)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0011_media_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='instruction_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Instrucción (HTML)'),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='instruction_plain',
+            field=models.TextField(blank=True, editable=False, verbose_name='Instrucción (texto)'),
+        ),
+        migrations.AddField(
+            model_name='subquestion',
+            name='context_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Contenido (HTML)'),
+        ),
+        migrations.AddField(
+            model_name='subquestion',
+            name='context_plain',
+            field=models.TextField(blank=True, editable=False, verbose_name='Contenido (texto)'),
+        ),
+        migrations.RunPython(compile_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0012_compiled_rich_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassicalStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_version', models.PositiveIntegerField(default=0, verbose_name='Versión de contenido')),
+                ('n_persons', models.PositiveIntegerField(default=0, verbose_name='Personas')),
+                ('item_ids', models.JSONField(default=list, verbose_name='Ítems')),
+                ('sums', models.JSONField(default=list, verbose_name='Sumas')),
+                ('squares', models.JSONField(default=list, verbose_name='Sumas de cuadrados')),
+                ('item_total', models.JSONField(default=list, verbose_name='Productos ítem-total')),
+                ('total', models.BigIntegerField(default=0, verbose_name='Suma de totales')),
+                ('total_squares', models.BigIntegerField(default=0, verbose_name='Suma de cuadrados de totales')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Última actualización')),
+                ('exam', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='classical_statistics', to='exams.exam', verbose_name='Examen')),
+            ],
+            options={
+                'verbose_name': 'Estadísticos clásicos',
+                'verbose_name_plural': 'Estadísticos clásicos',
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0013_classical_statistics'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='response',
+            name='option',
+            field=models.ForeignKey(blank=True, help_text='Vacío si la subpregunta quedó sin responder', null=True, on_delete=django.db.models.deletion.RESTRICT, related_name='responses', to='exams.option', verbose_name='Opción elegida'),
+        ),
+        migrations.AlterField(
+            model_name='response',
+            name='subquestion',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, related_name='responses', to='exams.subquestion', verbose_name='Subpregunta'),
+        ),
+    ]
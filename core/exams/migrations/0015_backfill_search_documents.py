@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:10
+#
+# Índice de búsqueda de los exámenes creados antes de 0008: los triggers y la
+# columna generada solo siguen los documentos que se escriben después
+
+from django.db import migrations
+
+from core.exams.search import document_checksum
+from core.exams.search import normalize
+
+
+def _documents(apps, exam_id, name):
+    Item = apps.get_model("exams", "Item")
+    SubQuestion = apps.get_model("exams", "SubQuestion")
+    Option = apps.get_model("exams", "Option")
+    titles = {None: name}
+    parts = {None: []}
+    for item_id, code, instruction in Item.objects.filter(exam_id=exam_id).values_list(
+        "id",
+        "code",
+        "instruction_plain",
+    ):
+        titles[item_id] = code
+        parts[item_id] = [instruction]
+    for item_id, context in SubQuestion.objects.filter(
+        item__exam_id=exam_id,
+    ).values_list("item_id", "context_plain"):
+        parts[item_id].append(context)
+    for item_id, text in Option.objects.filter(
+        subquestion__item__exam_id=exam_id,
+    ).values_list("subquestion__item_id", "text"):
+        parts[item_id].append(text)
+    for item_id, raw_title in titles.items():
+        title = normalize(raw_title)[:255]
+        body = normalize(" ".join(parts[item_id]))
+        yield item_id, title, body, document_checksum(title, body)
+
+
+def backfill(apps, schema_editor):
+    Exam = apps.get_model("exams", "Exam")
+    SearchDocument = apps.get_model("exams", "SearchDocument")
+    indexed = SearchDocument.objects.values("exam_id")
+    missing = Exam.objects.exclude(pk__in=indexed).values_list("pk", "name")
+    for exam_id, name in list(missing.order_by("pk")):
+        SearchDocument.objects.bulk_create(
+            SearchDocument(
+                exam_id=exam_id,
+                item_id=item_id,
+                title=title,
+                body=body,
+                checksum=checksum,
+            )
+            for item_id, title, body, checksum in _documents(apps, exam_id, name)
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("exams", "0014_response_restrict_delete"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,14 @@
 from django.conf import settings
+from django.core.files.storage import storages
 from django.db import models
 from django.urls import reverse
 
 
+def exam_media_storage():
+    """Almacenamiento por contenido de las imágenes (ver storage.py)"""
+    return storages["exam_media"]
+
+
 class GradeLevel(models.Model):
     """Nivel de grado escolar (ej: 2do-3er Grado, 4to-5to Grado)"""
 
@@ -48,11 +54,22 @@ class Exam(models.Model):
     created_at = models.DateTimeField("Fecha de creación", auto_now_add=True)
     updated_at = models.DateTimeField("Última actualización", auto_now=True)
     is_active = models.BooleanField("Activo", default=True)
+    # Se incrementa con cada cambio en el examen o en sus ítems, subpreguntas
+    # u opciones (ver signals.py); forma parte de las llaves de caché.
+    content_version = models.PositiveIntegerField(
+        "Versión de contenido",
+        default=1,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = "Examen"
         verbose_name_plural = "Exámenes"
         ordering = ["-created_at"]
+        indexes = [
+            # Paginación por llave del listado (ver pagination.py)
+            models.Index(fields=["-created_at", "-id"], name="exams_exam_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.grade_level} ({self.subject_area})"
@@ -83,12 +100,31 @@ class Item(models.Model):
         "Instrucción",
         help_text="Ej: ¿Qué se ve en el dibujo? Marca la palabra correcta.",
     )
+    # Compilados de la instrucción al guardar (ver richtext.py)
+    instruction_html = models.TextField(
+        "Instrucción (HTML)",
+        blank=True,
+        editable=False,
+    )
+    instruction_plain = models.TextField(
+        "Instrucción (texto)",
+        blank=True,
+        editable=False,
+    )
     image = models.ImageField(
         "Imagen",
         upload_to="exams/items/",
+        storage=exam_media_storage,
         blank=True,
         null=True,
     )
+    # Versiones reducidas de la imagen (ver renditions.py)
+    image_renditions = models.JSONField(
+        "Versiones de la imagen",
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     scoring_type = models.CharField(
         "Tipo de Calificación",
         max_length=1,
@@ -136,14 +172,23 @@ class SubQuestion(models.Model):
     image = models.ImageField(
         "Imagen",
         upload_to="exams/subquestions/",
+        storage=exam_media_storage,
         blank=True,
         null=True,
     )
+    image_renditions = models.JSONField(
+        "Versiones de la imagen",
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     context_text = models.TextField(
         "Contenido",
         blank=True,
         help_text="Contenido de la subpregunta (puede incluir texto, tablas, imágenes)",
     )
+    context_html = models.TextField("Contenido (HTML)", blank=True, editable=False)
+    context_plain = models.TextField("Contenido (texto)", blank=True, editable=False)
 
     class Meta:
         verbose_name = "Subpregunta"
@@ -184,3 +229,321 @@ class Option(models.Model):
     def __str__(self):
         correct_mark = " ✓" if self.is_correct else ""
         return f"{self.label}. {self.text}{correct_mark}"
+
+
+class Administration(models.Model):
+    """Aplicación de un examen (ej: una sesión distrital en una fecha)"""
+
+    exam = models.ForeignKey(
+        Exam,
+        on_delete=models.CASCADE,
+        related_name="administrations",
+        verbose_name="Examen",
+    )
+    name = models.CharField("Nombre", max_length=255)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="administrations_created",
+        verbose_name="Creado por",
+    )
+    created_at = models.DateTimeField("Fecha de creación", auto_now_add=True)
+    is_open = models.BooleanField("Abierta", default=True)
+
+    class Meta:
+        verbose_name = "Aplicación"
+        verbose_name_plural = "Aplicaciones"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.name} ({self.exam.name})"
+
+
+class Examinee(models.Model):
+    """Estudiante que presenta una aplicación"""
+
+    administration = models.ForeignKey(
+        Administration,
+        on_delete=models.CASCADE,
+        related_name="examinees",
+        verbose_name="Aplicación",
+    )
+    code = models.CharField("Código", max_length=50, help_text="Matrícula o folio")
+    name = models.CharField("Nombre", max_length=255, blank=True)
+    created_at = models.DateTimeField("Fecha de registro", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Examinado"
+        verbose_name_plural = "Examinados"
+        ordering = ["code"]
+        unique_together = ["administration", "code"]
+
+    def __str__(self):
+        return self.code
+
+
+class ResponseQuerySet(models.QuerySet):
+    def delete(self):
+        # Las sumas de teoría clásica incluían estas respuestas: se recalculan
+        # la próxima vez que se lean. Sin señales por fila, el borrado en
+        # cascada de una aplicación sigue siendo una sola consulta
+        ClassicalStatistics.objects.filter(
+            exam__administrations__examinees__responses__in=self,
+        ).delete()
+        return super().delete()
+
+
+class Response(models.Model):
+    """
+    Respuesta de un examinado a una subpregunta.
+
+    La tabla es de solo inserción: un cambio de respuesta agrega una fila
+    nueva y la vigente es la de mayor ``id`` por examinado y subpregunta.
+    Las subpreguntas y opciones con respuestas no se pueden eliminar
+    (``RESTRICT``); solo se borran junto con su examen o su aplicación.
+    Borrarlas directamente descarta los estadísticos clásicos del examen.
+    """
+
+    examinee = models.ForeignKey(
+        Examinee,
+        on_delete=models.CASCADE,
+        related_name="responses",
+        verbose_name="Examinado",
+    )
+    subquestion = models.ForeignKey(
+        SubQuestion,
+        on_delete=models.RESTRICT,
+        related_name="responses",
+        verbose_name="Subpregunta",
+    )
+    option = models.ForeignKey(
+        Option,
+        on_delete=models.RESTRICT,
+        null=True,
+        blank=True,
+        related_name="responses",
+        verbose_name="Opción elegida",
+        help_text="Vacío si la subpregunta quedó sin responder",
+    )
+    answered_at = models.DateTimeField("Fecha de respuesta", auto_now_add=True)
+
+    objects = ResponseQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Respuesta"
+        verbose_name_plural = "Respuestas"
+        indexes = [
+            models.Index(
+                fields=["examinee", "subquestion", "id"],
+                name="exams_response_latest_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.examinee} - {self.subquestion_id}: {self.option_id}"
+
+    def delete(self, *args, **kwargs):
+        ClassicalStatistics.objects.filter(
+            exam__administrations__examinees=self.examinee_id,
+        ).delete()
+        return super().delete(*args, **kwargs)
+
+
+class Calibration(models.Model):
+    """Corrida de calibración Rasch de un examen"""
+
+    MODEL_RASCH = "R"
+    MODEL_PARTIAL_CREDIT = "P"
+    MODEL_CHOICES = [
+        (MODEL_RASCH, "Rasch dicotómico (JMLE)"),
+        (MODEL_PARTIAL_CREDIT, "Crédito parcial (JMLE)"),
+    ]
+
+    exam = models.ForeignKey(
+        Exam,
+        on_delete=models.CASCADE,
+        related_name="calibrations",
+        verbose_name="Examen",
+    )
+    model = models.CharField(
+        "Modelo",
+        max_length=1,
+        choices=MODEL_CHOICES,
+        default=MODEL_RASCH,
+    )
+    created_at = models.DateTimeField("Fecha", auto_now_add=True)
+    warm_start = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="Valores iniciales de",
+    )
+    iterations = models.PositiveIntegerField("Iteraciones", default=0)
+    converged = models.BooleanField("Convergió", default=False)
+    max_residual = models.FloatField("Residuo máximo", null=True)
+    max_change = models.FloatField("Cambio máximo (logits)", null=True)
+    n_persons = models.PositiveIntegerField("Personas", default=0)
+    n_items = models.PositiveIntegerField("Ítems", default=0)
+
+    class Meta:
+        verbose_name = "Calibración"
+        verbose_name_plural = "Calibraciones"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.get_model_display()} - {self.exam.name} ({self.pk})"
+
+
+class ItemCalibration(models.Model):
+    """Dificultad estimada de un ítem en una calibración"""
+
+    calibration = models.ForeignKey(
+        Calibration,
+        on_delete=models.CASCADE,
+        related_name="item_measures",
+        verbose_name="Calibración",
+    )
+    item = models.ForeignKey(
+        Item,
+        on_delete=models.CASCADE,
+        related_name="calibrations",
+        verbose_name="Ítem",
+    )
+    measure = models.FloatField("Medida (logits)", null=True)
+    standard_error = models.FloatField("Error estándar", null=True)
+    # Umbrales de Andrich (relativos a la medida), uno por paso del ítem
+    thresholds = models.JSONField("Umbrales", default=list, blank=True)
+    is_extreme = models.BooleanField("Puntaje extremo", default=False)
+
+    class Meta:
+        verbose_name = "Calibración de ítem"
+        verbose_name_plural = "Calibraciones de ítems"
+        unique_together = ["calibration", "item"]
+
+    def __str__(self):
+        return f"{self.item.code}: {self.measure}"
+
+
+class PersonMeasure(models.Model):
+    """Habilidad estimada de un examinado en una calibración"""
+
+    calibration = models.ForeignKey(
+        Calibration,
+        on_delete=models.CASCADE,
+        related_name="person_measures",
+        verbose_name="Calibración",
+    )
+    examinee = models.ForeignKey(
+        Examinee,
+        on_delete=models.CASCADE,
+        related_name="measures",
+        verbose_name="Examinado",
+    )
+    raw_score = models.PositiveIntegerField("Puntaje bruto", default=0)
+    measure = models.FloatField("Medida (logits)", null=True)
+    standard_error = models.FloatField("Error estándar", null=True)
+    is_extreme = models.BooleanField("Puntaje extremo", default=False)
+
+    class Meta:
+        verbose_name = "Medida de persona"
+        verbose_name_plural = "Medidas de personas"
+        unique_together = ["calibration", "examinee"]
+
+    def __str__(self):
+        return f"{self.examinee.code}: {self.measure}"
+
+
+class ClassicalStatistics(models.Model):
+    """
+    Estadísticos suficientes de teoría clásica de un examen.
+
+    Sumas sobre los examinados de los puntajes de cada ítem, sus cuadrados
+    y sus productos con el puntaje total, en el orden de ``item_ids``. Se
+    actualizan al ingerir respuestas y valen para ``content_version``; ver
+    ``classical.py``.
+    """
+
+    exam = models.OneToOneField(
+        Exam,
+        on_delete=models.CASCADE,
+        related_name="classical_statistics",
+        verbose_name="Examen",
+    )
+    content_version = models.PositiveIntegerField("Versión de contenido", default=0)
+    n_persons = models.PositiveIntegerField("Personas", default=0)
+    item_ids = models.JSONField("Ítems", default=list)
+    sums = models.JSONField("Sumas", default=list)
+    squares = models.JSONField("Sumas de cuadrados", default=list)
+    item_total = models.JSONField("Productos ítem-total", default=list)
+    total = models.BigIntegerField("Suma de totales", default=0)
+    total_squares = models.BigIntegerField("Suma de cuadrados de totales", default=0)
+    updated_at = models.DateTimeField("Última actualización", auto_now=True)
+
+    class Meta:
+        verbose_name = "Estadísticos clásicos"
+        verbose_name_plural = "Estadísticos clásicos"
+
+    def __str__(self):
+        return f"{self.exam.name} ({self.n_persons} personas)"
+
+
+class SearchDocument(models.Model):
+    """
+    Texto normalizado que indexa la búsqueda: uno por examen (su nombre) y
+    uno por ítem (código, instrucción, subpreguntas y opciones).
+
+    El índice de texto completo vive en la base de datos (FTS5 en SQLite,
+    ``tsvector`` con GIN en PostgreSQL) y se mantiene con triggers o una
+    columna generada, ver ``search.py``.
+    """
+
+    exam = models.ForeignKey(
+        Exam,
+        on_delete=models.CASCADE,
+        related_name="search_documents",
+        verbose_name="Examen",
+    )
+    item = models.ForeignKey(
+        Item,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="Ítem",
+    )
+    title = models.CharField("Título", max_length=255)
+    body = models.TextField("Contenido", blank=True)
+    checksum = models.CharField("Suma de verificación", max_length=32)
+
+    class Meta:
+        verbose_name = "Documento de búsqueda"
+        verbose_name_plural = "Documentos de búsqueda"
+        unique_together = ["exam", "item"]
+
+    def __str__(self):
+        return self.title
+
+
+class MediaBlob(models.Model):
+    """
+    Archivo de imagen guardado una sola vez por su SHA-256.
+
+    Los ítems y subpreguntas (y sus copias) que suben la misma imagen
+    apuntan al mismo ``name``; las referencias se cuentan al recolectar los
+    que ya no usa nadie, ver ``storage.py``.
+    """
+
+    sha256 = models.CharField("SHA-256", max_length=64, unique=True)
+    name = models.CharField("Archivo", max_length=255, unique=True)
+    size = models.PositiveBigIntegerField("Tamaño", default=0)
+    used_at = models.DateTimeField("Último uso", auto_now=True)
+
+    class Meta:
+        verbose_name = "Archivo de imagen"
+        verbose_name_plural = "Archivos de imagen"
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,362 @@
+"""
+Hojas de respuestas para lectura óptica (OMR): dibujo y lectura.
+
+Como ``blocks.py``, este módulo no importa Django: la lectura corre en
+procesos hijos y recibe el diseño de la hoja como datos simples::
+
+    {
+        "title": "Examen",
+        "id_digits": 8,
+        "fingerprint": 0x3A7F,
+        "questions": [{"options": [[id, "A"], [id, "B"], ...]}, ...],
+    }
+
+Todas las posiciones se definen en milímetros sobre una hoja A4. Cuatro
+cuadros negros en las esquinas sirven de marcas de registro: al leer se
+localizan en la imagen escaneada y con ellos se calcula la transformación
+afín de milímetros a píxeles, que absorbe la resolución del escáner, el
+desplazamiento y una rotación leve. Cada círculo se mide por el promedio de
+oscuridad de un cuadro inscrito, con una imagen integral, así que leer una
+hoja son unas pocas operaciones vectoriales sobre la imagen.
+
+Una tira de 16 cuadros al pie codifica la huella del examen (ver
+``answer_sheets.layout_fingerprint``): una hoja impresa para otra versión
+del examen se rechaza en lugar de leerse con las opciones equivocadas.
+"""
+
+from typing import Any
+
+import numpy as np
+from PIL import Image
+from PIL import ImageDraw
+
+from .blocks import INK
+from .blocks import PAPER
+from .blocks import font
+from .blocks import mm
+
+PAGE_MM = (210, 297)
+# Marcas de registro: lado y centro de cada una, en el orden
+# superior izquierda, superior derecha, inferior izquierda, inferior derecha
+MARK_MM = 6
+MARK_CENTERS_MM = ((13, 13), (197, 13), (13, 284), (197, 284))
+# Distancia máxima entre la marca impresa y la escaneada
+MARK_SEARCH_MM = 15
+BUBBLE_MM = 4.2
+BUBBLE_PITCH_MM = 6
+ROW_PITCH_MM = 6
+ID_ORIGIN_MM = (30, 50)
+ID_ROW_PITCH_MM = 5.5
+ANSWERS_TOP_MM = 116
+ANSWERS_BOTTOM_MM = 266
+ANSWERS_LEFT_MM = 20
+ANSWERS_RIGHT_MM = 192
+# Ancho reservado al número de la pregunta y separación entre columnas
+NUMBER_MM = 9
+COLUMN_GAP_MM = 5
+FINGERPRINT_BITS = 16
+FINGERPRINT_ORIGIN_MM = (40, 282)
+FINGERPRINT_SQUARE_MM = 3
+FINGERPRINT_PITCH_MM = 5
+# Gris de las letras impresas dentro de los círculos
+LABEL_FILL = 190
+# Oscuridad mínima de un círculo marcado y de una marca de registro
+FILL_THRESHOLD = 0.4
+MARK_THRESHOLD = 0.6
+# Entre dos círculos marcados, el segundo por debajo de esta fracción del
+# primero se toma como un borrón y no como doble marca
+AMBIGUOUS_RATIO = 0.75
+
+
+class SheetLayoutError(ValueError):
+    """Las preguntas del examen no caben en una hoja"""
+
+
+def _columns(layout):
+    width = max((len(q["options"]) for q in layout["questions"]), default=1)
+    column_mm = NUMBER_MM + width * BUBBLE_PITCH_MM + COLUMN_GAP_MM
+    columns = max(1, int((ANSWERS_RIGHT_MM - ANSWERS_LEFT_MM) // column_mm))
+    rows = int((ANSWERS_BOTTOM_MM - ANSWERS_TOP_MM) // ROW_PITCH_MM)
+    return columns, rows, column_mm
+
+
+def sheet_geometry(layout):
+    """
+    Centros en milímetros de todo lo que se lee en la hoja.
+
+    Devuelve ``{"id": (dígitos, 10, 2), "answers": [(opciones, 2), ...],
+    "numbers": [(x, y), ...], "fingerprint": (16, 2)}``.
+    """
+    columns, rows, column_mm = _columns(layout)
+    questions = layout["questions"]
+    if len(questions) > columns * rows:
+        msg = (
+            f"El examen tiene {len(questions)} preguntas y en la hoja caben "
+            f"{columns * rows}"
+        )
+        raise SheetLayoutError(msg)
+
+    x0, y0 = ID_ORIGIN_MM
+    id_grid = np.array(
+        [
+            [
+                (x0 + column * BUBBLE_PITCH_MM, y0 + digit * ID_ROW_PITCH_MM)
+                for digit in range(10)
+            ]
+            for column in range(layout["id_digits"])
+        ],
+        dtype=float,
+    ).reshape(layout["id_digits"], 10, 2)
+
+    answers, numbers = [], []
+    for index, question in enumerate(questions):
+        column, row = divmod(index, rows)
+        left = ANSWERS_LEFT_MM + column * column_mm
+        y = ANSWERS_TOP_MM + row * ROW_PITCH_MM + BUBBLE_PITCH_MM / 2
+        numbers.append((left, y))
+        answers.append(
+            np.array(
+                [
+                    (left + NUMBER_MM + option * BUBBLE_PITCH_MM, y)
+                    for option in range(len(question["options"]))
+                ],
+                dtype=float,
+            ).reshape(-1, 2),
+        )
+
+    fx, fy = FINGERPRINT_ORIGIN_MM
+    fingerprint = np.array(
+        [(fx + bit * FINGERPRINT_PITCH_MM, fy) for bit in range(FINGERPRINT_BITS)],
+        dtype=float,
+    )
+    return {
+        "id": id_grid,
+        "answers": answers,
+        "numbers": numbers,
+        "fingerprint": fingerprint,
+    }
+
+
+# =============================================================================
+# Dibujo
+# =============================================================================
+
+
+def _sheet_canvas(dpi):
+    """Hoja en blanco con sus marcas de registro y un ``px`` de mm a píxeles"""
+    page = Image.new("L", (mm(PAGE_MM[0], dpi), mm(PAGE_MM[1], dpi)), PAPER)
+    draw = ImageDraw.Draw(page)
+
+    def px(x, y):
+        return mm(x, dpi), mm(y, dpi)
+
+    def square(center, side):
+        x, y = center
+        draw.rectangle(
+            [*px(x - side / 2, y - side / 2), *px(x + side / 2, y + side / 2)],
+            fill=INK,
+        )
+
+    for center in MARK_CENTERS_MM:
+        square(center, MARK_MM)
+    return page, draw, px, square
+
+
+def draw_sheet(layout, dpi, font_path=None):
+    """Imagen en escala de grises de la hoja en blanco"""
+    geometry = sheet_geometry(layout)
+    page, draw, px, square = _sheet_canvas(dpi)
+    regular = font(font_path, mm(3.2, dpi))
+    small = font(font_path, mm(2.4, dpi))
+    radius = mm(BUBBLE_MM / 2, dpi)
+
+    def bubble(center, label):
+        x, y = px(*center)
+        draw.ellipse(
+            [x - radius, y - radius, x + radius, y + radius],
+            outline=INK,
+            width=max(1, dpi // 75),
+        )
+        draw.text((x, y), label, font=small, fill=LABEL_FILL, anchor="mm")
+
+    title = font(font_path, mm(4.5, dpi))
+    draw.text(px(22, 22), layout["title"], font=title, fill=INK)
+    folio = (ID_ORIGIN_MM[0] - 4, ID_ORIGIN_MM[1] - 8)
+    draw.text(px(*folio), "Folio", font=regular, fill=INK)
+    for column in geometry["id"]:
+        for digit, center in enumerate(column):
+            bubble(center, str(digit))
+
+    rows = zip(
+        layout["questions"],
+        geometry["numbers"],
+        geometry["answers"],
+        strict=True,
+    )
+    for number, (question, center, options) in enumerate(rows, start=1):
+        draw.text(px(*center), f"{number}.", font=regular, fill=INK, anchor="lm")
+        for option, (_, label) in zip(options, question["options"], strict=True):
+            bubble(option, label or "")
+
+    for bit, center in enumerate(geometry["fingerprint"]):
+        if layout["fingerprint"] >> bit & 1:
+            square(center, FINGERPRINT_SQUARE_MM)
+    return page
+
+
+# =============================================================================
+# Lectura
+# =============================================================================
+
+
+def _integral(darkness):
+    """Imagen integral con una fila y una columna de ceros al inicio"""
+    integral = np.zeros((darkness.shape[0] + 1, darkness.shape[1] + 1))
+    integral[1:, 1:] = darkness.cumsum(axis=0).cumsum(axis=1)
+    return integral
+
+
+def _box_means(integral, centers, half):
+    """Oscuridad promedio de los cuadros de lado ``2 * half`` en ``centers``"""
+    height, width = integral.shape[0] - 1, integral.shape[1] - 1
+    centers = np.rint(centers).astype(int)
+    x0 = np.clip(centers[..., 0] - half, 0, width)
+    x1 = np.clip(centers[..., 0] + half, 0, width)
+    y0 = np.clip(centers[..., 1] - half, 0, height)
+    y1 = np.clip(centers[..., 1] + half, 0, height)
+    total = integral[y1, x1] - integral[y0, x1] - integral[y1, x0] + integral[y0, x0]
+    area = np.maximum((x1 - x0) * (y1 - y0), 1)
+    return total / area
+
+
+def _find_marks(integral, scale):
+    """Centro en píxeles de cada marca de registro, o ``None``"""
+    height, width = integral.shape[0] - 1, integral.shape[1] - 1
+    side = max(2, round(MARK_MM * min(scale)))
+    reach = MARK_SEARCH_MM * max(scale)
+    found = []
+    for x_mm, y_mm in MARK_CENTERS_MM:
+        cx, cy = x_mm * scale[0], y_mm * scale[1]
+        left = int(np.clip(cx - reach, 0, width - side))
+        top = int(np.clip(cy - reach, 0, height - side))
+        right = int(np.clip(cx + reach, left + side, width)) - side
+        bottom = int(np.clip(cy + reach, top + side, height)) - side
+        ys, xs = np.mgrid[top : bottom + 1, left : right + 1]
+        sums = (
+            integral[ys + side, xs + side]
+            - integral[ys, xs + side]
+            - integral[ys + side, xs]
+            + integral[ys, xs]
+        )
+        best = np.unravel_index(np.argmax(sums), sums.shape)
+        if sums[best] / side**2 < MARK_THRESHOLD:
+            return None
+        found.append((xs[best] + side / 2, ys[best] + side / 2))
+    return np.array(found)
+
+
+def _affine(marks):
+    """Matriz 3x2 que lleva ``[x_mm, y_mm, 1]`` a píxeles"""
+    source = np.hstack([np.array(MARK_CENTERS_MM, dtype=float), np.ones((4, 1))])
+    matrix, *_ = np.linalg.lstsq(source, marks, rcond=None)
+    return matrix
+
+
+def _transform(points, matrix):
+    points = np.asarray(points, dtype=float)
+    flat = points.reshape(-1, 2)
+    mapped = np.hstack([flat, np.ones((len(flat), 1))]) @ matrix
+    return mapped.reshape(points.shape)
+
+
+def choose(scores):
+    """
+    Índice del círculo marcado entre ``scores``.
+
+    ``None`` si no hay ninguno y ``-1`` si hay más de uno con oscuridad
+    parecida.
+    """
+    filled = np.flatnonzero(scores >= FILL_THRESHOLD)
+    if not len(filled):
+        return None
+    ranked = filled[np.argsort(scores[filled])[::-1]]
+    if len(ranked) > 1 and scores[ranked[1]] >= scores[ranked[0]] * AMBIGUOUS_RATIO:
+        return -1
+    return int(ranked[0])
+
+
+def read_sheet(image, layout):
+    """
+    Lee una hoja escaneada.
+
+    Devuelve ``{"code", "answers", "ambiguous", "error"}``: el folio, el
+    índice de la opción marcada por pregunta (``None`` si quedó en blanco o
+    tiene doble marca), los números de las preguntas con doble marca y, si
+    la hoja no se pudo leer, el motivo.
+    """
+    result: dict[str, Any] = {
+        "code": None,
+        "answers": [],
+        "ambiguous": [],
+        "error": None,
+    }
+    gray = np.asarray(image.convert("L"), dtype=np.float32)
+    integral = _integral(1 - gray / 255)
+    scale = (gray.shape[1] / PAGE_MM[0], gray.shape[0] / PAGE_MM[1])
+
+    marks = _find_marks(integral, scale)
+    if marks is None:
+        result["error"] = "No se encontraron las marcas de registro"
+        return result
+    matrix = _affine(marks)
+    # Lado del cuadro que se mide, inscrito en el círculo
+    pixels_per_mm = float(np.hypot(*matrix[0]))
+    half = max(1, round(BUBBLE_MM * 0.3 * pixels_per_mm))
+    geometry = sheet_geometry(layout)
+
+    bits = _box_means(
+        integral,
+        _transform(geometry["fingerprint"], matrix),
+        max(1, round(FINGERPRINT_SQUARE_MM * 0.3 * pixels_per_mm)),
+    )
+    fingerprint = sum(
+        1 << bit for bit, value in enumerate(bits) if value >= MARK_THRESHOLD
+    )
+    if fingerprint != layout["fingerprint"]:
+        result["error"] = "La hoja es de otra versión del examen"
+        return result
+
+    digits = [
+        choose(scores)
+        for scores in _box_means(
+            integral,
+            _transform(geometry["id"], matrix),
+            half,
+        )
+    ]
+    if any(digit is None or digit < 0 for digit in digits):
+        result["error"] = "Folio ilegible"
+        return result
+    result["code"] = "".join(str(digit) for digit in digits)
+
+    for number, centers in enumerate(geometry["answers"], start=1):
+        choice = choose(_box_means(integral, _transform(centers, matrix), half))
+        if choice == -1:
+            result["ambiguous"].append(number)
+            choice = None
+        result["answers"].append(choice)
+    return result
+
+
+def read_sheet_file(path, layout):
+    """``read_sheet`` de un archivo; punto de entrada de los procesos hijos"""
+    try:
+        with Image.open(path) as image:
+            return read_sheet(image, layout)
+    except OSError as exc:
+        return {
+            "code": None,
+            "answers": [],
+            "ambiguous": [],
+            "error": f"No se pudo abrir la imagen: {exc}",
+        }
@@ -0,0 +1,140 @@
+"""
+Orden de hermanos con huecos: ítems de un examen, subpreguntas de un ítem y
+opciones de una subpregunta.
+
+Los valores de ``order`` se asignan de ``ORDER_GAP`` en ``ORDER_GAP``, así
+que insertar entre dos hermanos toma el punto medio sin tocar al resto;
+solo cuando se agota el hueco se renumera el conjunto, con un único UPDATE.
+Antes de elegir un orden se bloquea la fila del padre, de modo que dos
+editores que agregan hijos a la vez no obtienen el mismo valor.
+"""
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Max
+
+from .models import Exam
+from .models import Item
+from .models import SubQuestion
+from .signals import batch_content_changes
+
+ORDER_GAP = 1024
+
+# Padre -> (relación con sus hijos, llave foránea de los hijos)
+CHILDREN = {
+    Exam: ("items", "exam"),
+    Item: ("subquestions", "item"),
+    SubQuestion: ("options", "subquestion"),
+}
+
+
+def _children(parent):
+    related_name, _ = CHILDREN[type(parent)]
+    return getattr(parent, related_name)
+
+
+def _order_rows(parent):
+    """Hijos con lo justo para ``bulk_update`` (sin la llave, la pediría)"""
+    _, foreign_key = CHILDREN[type(parent)]
+    return _children(parent).only("id", "order", foreign_key)
+
+
+def _exam_id(parent):
+    if isinstance(parent, Exam):
+        return parent.pk
+    if isinstance(parent, Item):
+        return parent.exam_id
+    return parent.item.exam_id
+
+
+def _lock(parent):
+    """
+    Bloquea la fila del padre hasta el fin de la transacción.
+
+    Con ``ATOMIC_REQUESTS`` el bloqueo dura toda la petición; en SQLite
+    ``select_for_update`` no tiene efecto y basta el bloqueo de escritura
+    de la base completa.
+    """
+    list(
+        type(parent)
+        .objects.select_for_update()
+        .filter(pk=parent.pk)
+        .order_by()
+        .values_list("pk", flat=True),
+    )
+
+
+def _after(order):
+    """Primer múltiplo de ``ORDER_GAP`` mayor que ``order``"""
+    return (order // ORDER_GAP + 1) * ORDER_GAP
+
+
+def next_order(parent):
+    """Orden para agregar un hijo al final (dentro de una transacción)"""
+    _lock(parent)
+    max_order = _children(parent).aggregate(Max("order"))["order__max"] or 0
+    return _after(max_order)
+
+
+def order_after(parent, after_id):
+    """
+    Orden para insertar un hijo justo después del hermano ``after_id``
+    (``None`` para insertarlo primero). Debe llamarse dentro de una
+    transacción, igual que ``next_order``.
+
+    Si no queda hueco entre los vecinos se renumeran los hermanos dejando
+    libre la posición pedida.
+    """
+    _lock(parent)
+    siblings = list(_order_rows(parent).order_by("order", "id"))
+    ids = [sibling.pk for sibling in siblings]
+    if after_id is None:
+        position = 0
+    elif after_id in ids:
+        position = ids.index(after_id) + 1
+    else:
+        msg = f"La fila {after_id} no pertenece a este conjunto"
+        raise ValidationError(msg)
+
+    low = siblings[position - 1].order if position else 0
+    if position == len(siblings):
+        return _after(low)
+    high = siblings[position].order
+    if high - low > 1:
+        return (low + high) // 2
+    _write_orders(parent, [*siblings[:position], None, *siblings[position:]])
+    return (position + 1) * ORDER_GAP
+
+
+def _write_orders(parent, children):
+    """
+    Asigna ``(posición + 1) * ORDER_GAP`` a cada hijo de la lista (``None``
+    reserva una posición) y actualiza solo los que cambian, en un UPDATE
+    con CASE. Devuelve cuántas filas cambiaron.
+    """
+    changed = []
+    for position, child in enumerate(children, start=1):
+        if child is not None and child.order != position * ORDER_GAP:
+            child.order = position * ORDER_GAP
+            changed.append(child)
+    if changed:
+        # bulk_update no emite señales: la versión se incrementa una vez
+        with batch_content_changes(_exam_id(parent)):
+            type(changed[0]).objects.bulk_update(changed, ["order"])
+    return len(changed)
+
+
+@transaction.atomic
+def reorder(parent, ids):
+    """
+    Aplica un nuevo orden al conjunto completo de hijos del padre.
+
+    ``ids`` debe contener exactamente los ids de todos los hermanos.
+    Devuelve cuántas filas cambiaron.
+    """
+    _lock(parent)
+    children = {child.pk: child for child in _order_rows(parent)}
+    if len(ids) != len(set(ids)) or set(ids) != children.keys():
+        msg = "La lista debe contener cada fila del conjunto una sola vez"
+        raise ValidationError(msg)
+    return _write_orders(parent, [children[pk] for pk in ids])
@@ -0,0 +1,189 @@
+"""
+Paginación por llave (keyset) para listados grandes.
+
+En lugar de ``OFFSET`` cada página se pide "después de" la última fila de
+la anterior, con un filtro sobre las columnas de orden que resuelve el
+índice; la página 1000 cuesta lo mismo que la primera. La posición viaja en
+un cursor opaco en la URL y el total se cuenta una vez y se cachea por
+unos minutos, en lugar de un ``COUNT(*)`` por cada página vista.
+
+Para usarla en una ``ListView`` basta con agregar ``KeysetPaginationMixin``
+y, si hace falta, cambiar ``keyset_ordering``; el orden debe terminar en
+una columna única (normalmente ``id``) y tener un índice que lo cubra.
+"""
+
+import base64
+import hashlib
+import json
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.http import Http404
+
+# Segundos que se reutiliza el total de un listado
+COUNT_CACHE_TIMEOUT = getattr(settings, "EXAMS_COUNT_CACHE_TIMEOUT", 60 * 5)
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+def cached_count(queryset, timeout=COUNT_CACHE_TIMEOUT):
+    """``queryset.count()`` cacheado por el SQL de la consulta"""
+    sql = str(queryset.order_by().query)
+    key = "exams:count:" + hashlib.md5(sql.encode(), usedforsecurity=False).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout)
+    return count
+
+
+def _flip(field):
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+class KeysetPage(Sequence):
+    """Página de resultados con los cursores de sus vecinas"""
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __repr__(self):
+        return f"<KeysetPage de {len(self)} filas>"
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Pagina ``queryset`` por las columnas de ``ordering``.
+
+    ``page(cursor)`` devuelve la primera página sin cursor, y con él la
+    página siguiente o anterior a la fila que codifica.
+    """
+
+    is_keyset = True
+
+    def __init__(self, queryset, per_page, ordering=("-created_at", "-id")):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = list(ordering)
+        model = queryset.model
+        self._fields = [
+            model._meta.get_field(name.lstrip("-"))  # noqa: SLF001
+            for name in self.ordering
+        ]
+
+    @property
+    def count(self):
+        return cached_count(self.queryset)
+
+    def _encode(self, direction, obj):
+        # isoformat completo: DjangoJSONEncoder recorta los microsegundos y
+        # el cursor dejaría de coincidir con la fila
+        values = [
+            value.isoformat() if hasattr(value, "isoformat") else value
+            for value in (field.value_from_object(obj) for field in self._fields)
+        ]
+        data = json.dumps([direction, values])
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+    def _decode(self, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            direction, values = json.loads(base64.urlsafe_b64decode(padded))
+            values = [
+                field.to_python(value)
+                for field, value in zip(self._fields, values, strict=True)
+            ]
+        except (ValueError, TypeError, ValidationError) as exc:
+            msg = "Cursor de página inválido"
+            raise InvalidPage(msg) from exc
+        if direction not in (NEXT, PREVIOUS):
+            msg = "Cursor de página inválido"
+            raise InvalidPage(msg)
+        return direction, values
+
+    def _seek(self, ordering, values):
+        """Filas que van después de ``values`` en ``ordering``"""
+        condition = Q()
+        for position, field in enumerate(ordering):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            step = Q(**{f"{name}__{lookup}": values[position]})
+            for previous, value in zip(ordering[:position], values, strict=False):
+                step &= Q(**{previous.lstrip("-"): value})
+            condition |= step
+        return condition
+
+    def page(self, cursor=None):
+        direction, values = self._decode(cursor) if cursor else (NEXT, None)
+        ordering = self.ordering
+        if direction == PREVIOUS:
+            ordering = [_flip(field) for field in ordering]
+        queryset = self.queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._seek(ordering, values))
+        # Una fila de más indica si hay otra página en esta dirección
+        rows = list(queryset[: self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if direction == PREVIOUS:
+            rows.reverse()
+            has_previous, has_next = more, True
+        else:
+            has_previous, has_next = values is not None, more
+        return KeysetPage(
+            rows,
+            self,
+            next_cursor=self._encode(NEXT, rows[-1]) if rows and has_next else None,
+            previous_cursor=(
+                self._encode(PREVIOUS, rows[0]) if rows and has_previous else None
+            ),
+        )
+
+
+class KeysetPaginationMixin:
+    """
+    Paginación por llave para una ``ListView`` con ``paginate_by``.
+
+    La página se elige con el parámetro ``cursor``; ``use_keyset`` permite
+    volver a la paginación numerada, por ejemplo con un orden que no es el
+    de ``keyset_ordering``.
+    """
+
+    keyset_ordering = ("-created_at", "-id")
+    cursor_kwarg = "cursor"
+
+    def use_keyset(self, queryset):
+        return True
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.use_keyset(queryset):
+            return super().paginate_queryset(queryset, page_size)
+        paginator = KeysetPaginator(queryset, page_size, self.keyset_ordering)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidPage as exc:
+            raise Http404(str(exc)) from exc
+        return paginator, page, page.object_list, page.has_other_pages()
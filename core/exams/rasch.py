@@ -0,0 +1,659 @@
+"""
+Calibración Rasch por máxima verosimilitud conjunta (JMLE) con NumPy.
+
+Reproduce el comportamiento por defecto de Winsteps:
+
+* convergencia cuando el mayor cambio de medida es menor a ``LCONV``
+  (0.01 logits) y el mayor residuo de puntaje es menor a ``RCONV``
+  (0.5 puntos);
+* las personas e ítems con puntaje extremo (cero o máximo) se excluyen de
+  la estimación, de forma iterativa, y al final se miden con el puntaje
+  ajustado en ``EXTREME_SCORE_ADJUSTMENT`` (EXTRSC=0.3).
+
+A diferencia de Winsteps, que por defecto no la aplica (STBIAS=No), se
+corrige el sesgo de JMLE multiplicando las dificultades por ``(L - 1) / L``
+(como con STBIAS=Yes).
+
+Los ítems politómicos se calibran con el modelo de crédito parcial de
+Masters, que estima una dificultad por paso (medida del ítem más umbral de
+Andrich). Ambos estimadores aceptan valores iniciales de una calibración
+anterior: al recalibrar con unas pocas respuestas nuevas convergen en
+pocas iteraciones.
+
+Todas las operaciones son vectoriales sobre la matriz personas x ítems, así
+que cada iteración cuesta unas pocas pasadas sobre la matriz.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+LCONV = 0.01
+RCONV = 0.5
+MAX_ITERATIONS = 200
+EXTREME_SCORE_ADJUSTMENT = 0.3
+# Paso máximo de Newton-Raphson por iteración, en logits
+MAX_STEP = 1.0
+# Tolerancia de las estimaciones con parámetros fijos (extremos, personas)
+FIXED_TOLERANCE = 1e-4
+# Personas por bloque en el modelo de crédito parcial, que trabaja con un
+# arreglo personas x ítems x categorías
+PERSON_BLOCK = 5000
+
+
+class Convergence(NamedTuple):
+    """Criterios de convergencia; por defecto los de Winsteps"""
+
+    lconv: float = LCONV
+    rconv: float = RCONV
+    max_iterations: int = MAX_ITERATIONS
+
+
+DEFAULT_CONVERGENCE = Convergence()
+
+
+class RaschResult:
+    """Resultado de una calibración"""
+
+    def __init__(self, **kwargs):
+        self.item_measures = kwargs["item_measures"]
+        self.item_se = kwargs["item_se"]
+        self.item_extreme = kwargs["item_extreme"]
+        self.person_measures = kwargs["person_measures"]
+        self.person_se = kwargs["person_se"]
+        self.person_extreme = kwargs["person_extreme"]
+        self.raw_scores = kwargs["raw_scores"]
+        self.iterations = kwargs["iterations"]
+        self.converged = kwargs["converged"]
+        self.max_residual = kwargs["max_residual"]
+        self.max_change = kwargs["max_change"]
+        # Umbrales de Andrich por ítem (solo crédito parcial)
+        self.item_thresholds = kwargs.get("item_thresholds")
+
+
+def _probability(theta, b):
+    logits = np.clip(theta[:, None] - b[None, :], -35, 35)
+    return 1.0 / (1.0 + np.exp(-logits))
+
+
+def find_extremes(scores, observed, max_scores):
+    """
+    Marca personas e ítems con puntaje extremo.
+
+    Al quitar un ítem extremo una persona puede quedar con puntaje extremo
+    (y viceversa), así que se repite hasta que no haya cambios.
+    """
+    n_persons, n_items = scores.shape
+    person_extreme = np.zeros(n_persons, dtype=bool)
+    item_extreme = np.zeros(n_items, dtype=bool)
+    while True:
+        active = observed & ~person_extreme[:, None] & ~item_extreme[None, :]
+        values = np.where(active, scores, 0)
+        person_max = (active * max_scores[None, :]).sum(axis=1)
+        person_raw = values.sum(axis=1)
+        item_max = (active * max_scores[None, :]).sum(axis=0)
+        item_raw = values.sum(axis=0)
+        new_persons = person_extreme | (person_raw == 0) | (person_raw == person_max)
+        new_items = item_extreme | (item_raw == 0) | (item_raw == item_max)
+        if (new_persons == person_extreme).all() and (new_items == item_extreme).all():
+            return person_extreme, item_extreme
+        person_extreme, item_extreme = new_persons, new_items
+
+
+def estimate_persons(targets, observed, b, theta=None, iterations=MAX_ITERATIONS):
+    """
+    Medidas de personas con dificultades fijas.
+
+    ``targets`` es el puntaje esperado que debe reproducir cada persona
+    sobre los ítems observados. Devuelve ``(medidas, errores estándar)``.
+    """
+    n_persons = observed.shape[0]
+    theta = np.zeros(n_persons) if theta is None else theta.astype(float)
+    info = np.ones(n_persons)
+    for _ in range(iterations):
+        p = _probability(theta, b) * observed
+        expected = p.sum(axis=1)
+        info = (p * (1 - p)).sum(axis=1)
+        step = np.clip(
+            (targets - expected) / np.maximum(info, 1e-12),
+            -MAX_STEP,
+            MAX_STEP,
+        )
+        theta += step
+        if np.abs(step).max(initial=0) < FIXED_TOLERANCE:
+            break
+    with np.errstate(divide="ignore"):
+        se = 1.0 / np.sqrt(info)
+    return theta, se
+
+
+def _initial_measures(person_raw, person_max, item_raw, item_max):
+    """Valores iniciales tipo PROX a partir de los puntajes brutos"""
+    theta = np.log(person_raw / (person_max - person_raw))
+    b = np.log((item_max - item_raw) / item_raw)
+    return theta, b - b.mean()
+
+
+def _warm_start(values, initial, selected, n_items):
+    """
+    Reemplaza los valores iniciales conocidos (no ``nan``).
+
+    Los valores de una calibración anterior traen la corrección STBIAS
+    ``(L - 1) / L``; se deshace para partir de la solución sin corregir.
+    """
+    if initial is None:
+        return values
+    initial = np.asarray(initial, dtype=float)[selected]
+    known = np.isfinite(initial)
+    factor = n_items / (n_items - 1) if n_items > 1 else 1.0
+    values[known] = initial[known] * factor
+    return values
+
+
+def calibrate_dichotomous(
+    scores,
+    *,
+    initial_measures=None,
+    initial_theta=None,
+    convergence=DEFAULT_CONVERGENCE,
+):
+    """
+    Calibra una matriz personas x ítems de 0/1 (negativo = faltante).
+
+    Devuelve un ``RaschResult`` con dificultades centradas en 0; las
+    personas e ítems sin respuestas quedan con medida ``nan``.
+    ``initial_measures`` e ``initial_theta`` son valores iniciales por ítem
+    y por persona (``nan`` = desconocido, se usa PROX).
+    """
+    scores = np.asarray(scores)
+    observed = scores >= 0
+    values = np.where(observed, scores, 0).astype(float)
+    max_scores = np.ones(scores.shape[1])
+    person_extreme, item_extreme = find_extremes(values, observed, max_scores)
+    persons = ~person_extreme
+    items = ~item_extreme
+
+    obs = observed[np.ix_(persons, items)]
+    x = values[np.ix_(persons, items)]
+    person_raw = x.sum(axis=1)
+    item_raw = x.sum(axis=0)
+    theta, b = _initial_measures(
+        person_raw,
+        obs.sum(axis=1),
+        item_raw,
+        obs.sum(axis=0),
+    )
+    n_active = items.sum()
+    theta = _warm_start(theta, initial_theta, persons, n_active)
+    b = _warm_start(b, initial_measures, items, n_active)
+    if b.size:
+        b -= b.mean()
+
+    converged = False
+    iterations = 0
+    max_residual = max_change = None
+    if obs.size:
+        for iterations in range(1, convergence.max_iterations + 1):  # noqa: B007
+            # Personas e ítems se actualizan por turnos (ver
+            # calibrate_partial_credit)
+            p = _probability(theta, b) * obs
+            person_residual = person_raw - p.sum(axis=1)
+            person_step = np.clip(
+                person_residual / (p * (1 - p)).sum(axis=1),
+                -MAX_STEP,
+                MAX_STEP,
+            )
+            theta += person_step
+            p = _probability(theta, b) * obs
+            item_residual = item_raw - p.sum(axis=0)
+            item_step = np.clip(
+                -item_residual / (p * (1 - p)).sum(axis=0),
+                -MAX_STEP,
+                MAX_STEP,
+            )
+            b += item_step
+            max_residual = float(
+                max(np.abs(person_residual).max(), np.abs(item_residual).max()),
+            )
+            b -= b.mean()
+            max_change = float(
+                max(np.abs(person_step).max(), np.abs(item_step).max()),
+            )
+            if max_change < convergence.lconv and max_residual < convergence.rconv:
+                converged = True
+                break
+
+        # Corrección del sesgo de JMLE y personas reestimadas con ella
+        if n_active > 1:
+            b *= (n_active - 1) / n_active
+        theta, _ = estimate_persons(person_raw, obs, b, theta)
+
+    return _finish(
+        values,
+        observed,
+        extremes=(person_extreme, item_extreme),
+        estimates=(theta, b),
+        iterations=iterations,
+        converged=converged,
+        max_residual=max_residual,
+        max_change=max_change,
+    )
+
+
+def _finish(values, observed, *, extremes, estimates, **stats):
+    """
+    Errores estándar y medidas de los extremos con el puntaje ajustado.
+
+    ``extremes`` son las máscaras de personas e ítems extremos y
+    ``estimates`` las medidas ``(theta, b)`` de los demás.
+    """
+    person_extreme, item_extreme = extremes
+    theta, b = estimates
+    n_persons, n_items = values.shape
+    persons = ~person_extreme
+    items = ~item_extreme
+    person_measures = np.full(n_persons, np.nan)
+    person_se = np.full(n_persons, np.nan)
+    item_measures = np.full(n_items, np.nan)
+    item_se = np.full(n_items, np.nan)
+    person_measures[persons] = theta
+    item_measures[items] = b
+
+    obs = observed[np.ix_(persons, items)]
+    if obs.size:
+        p = _probability(theta, b) * obs
+        variance = p * (1 - p)
+        with np.errstate(divide="ignore"):
+            person_se[persons] = 1.0 / np.sqrt(variance.sum(axis=1))
+            item_se[items] = 1.0 / np.sqrt(variance.sum(axis=0))
+
+    raw_scores = values.sum(axis=1)
+    if items.any():
+        # Personas extremas medidas contra los ítems calibrados
+        ext_obs = observed[np.ix_(person_extreme, items)]
+        counts = ext_obs.sum(axis=1)
+        ext_values = values[np.ix_(person_extreme, items)]
+        ext_raw = np.where(ext_obs, ext_values, 0).sum(axis=1)
+        targets = np.clip(
+            ext_raw,
+            EXTREME_SCORE_ADJUSTMENT,
+            counts - EXTREME_SCORE_ADJUSTMENT,
+        )
+        measures, se = estimate_persons(targets, ext_obs, b)
+        measures[counts == 0] = np.nan
+        se[counts == 0] = np.nan
+        person_measures[person_extreme] = measures
+        person_se[person_extreme] = se
+    if persons.any():
+        # Ítems extremos: mismo cálculo con los papeles invertidos
+        ext_obs = observed[np.ix_(persons, item_extreme)].T
+        counts = ext_obs.sum(axis=1)
+        ext_values = values[np.ix_(persons, item_extreme)].T
+        ext_raw = np.where(ext_obs, ext_values, 0).sum(axis=1)
+        targets = np.clip(
+            ext_raw,
+            EXTREME_SCORE_ADJUSTMENT,
+            counts - EXTREME_SCORE_ADJUSTMENT,
+        )
+        measures, se = estimate_persons(targets, ext_obs, -person_measures[persons])
+        measures[counts == 0] = np.nan
+        se[counts == 0] = np.nan
+        item_measures[item_extreme] = -measures
+        item_se[item_extreme] = se
+
+    return RaschResult(
+        item_measures=item_measures,
+        item_se=item_se,
+        item_extreme=item_extreme,
+        person_measures=person_measures,
+        person_se=person_se,
+        person_extreme=person_extreme,
+        raw_scores=raw_scores,
+        **stats,
+    )
+
+
+def _pcm_moments(theta, steps, observed):
+    """
+    Esperanzas y varianzas del modelo de crédito parcial.
+
+    ``steps`` es ítems x pasos con la dificultad de cada paso (``nan`` si
+    el ítem no llega a esa categoría). Se recorre por bloques de personas y
+    se devuelven los totales por persona, por ítem y por paso; para el paso
+    ``k`` se usa la indicadora de puntaje ``>= k``.
+    """
+    n_persons = len(theta)
+    n_items, n_steps = steps.shape
+    categories = np.arange(n_steps + 1)
+    valid = np.concatenate(
+        [np.ones((n_items, 1), dtype=bool), ~np.isnan(steps)],
+        axis=1,
+    )
+    cumulative = np.concatenate(
+        [np.zeros((n_items, 1)), np.where(valid[:, 1:], steps, 0).cumsum(axis=1)],
+        axis=1,
+    )
+    person_expected = np.zeros(n_persons)
+    person_variance = np.zeros(n_persons)
+    item_expected = np.zeros(n_items)
+    item_variance = np.zeros(n_items)
+    step_expected = np.zeros((n_items, n_steps))
+    step_variance = np.zeros((n_items, n_steps))
+    for start in range(0, n_persons, PERSON_BLOCK):
+        block = slice(start, start + PERSON_BLOCK)
+        obs = observed[block, :, None]
+        logits = theta[block, None, None] * categories - cumulative[None]
+        logits = np.where(valid[None], logits, -np.inf)
+        logits -= logits.max(axis=2, keepdims=True)
+        p = np.exp(logits)
+        p *= obs / p.sum(axis=2, keepdims=True)
+        expected = p @ categories
+        variance = p @ categories**2 - expected**2
+        # P(X >= k) para k = 1..pasos
+        at_least = p[:, :, ::-1].cumsum(axis=2)[:, :, ::-1][:, :, 1:]
+        person_expected[block] = expected.sum(axis=1)
+        person_variance[block] = variance.sum(axis=1)
+        item_expected += expected.sum(axis=0)
+        item_variance += variance.sum(axis=0)
+        step_expected += at_least.sum(axis=0)
+        step_variance += (at_least * (obs - at_least)).sum(axis=0)
+    return (
+        person_expected,
+        person_variance,
+        item_expected,
+        item_variance,
+        step_expected,
+        step_variance,
+    )
+
+
+def estimate_persons_partial_credit(
+    targets,
+    observed,
+    steps,
+    theta=None,
+    iterations=MAX_ITERATIONS,
+):
+    """Como ``estimate_persons`` pero con las dificultades de paso fijas"""
+    n_persons = observed.shape[0]
+    theta = np.zeros(n_persons) if theta is None else theta.astype(float)
+    info = np.ones(n_persons)
+    for _ in range(iterations):
+        expected, info, *_ = _pcm_moments(theta, steps, observed)
+        step = np.clip(
+            (targets - expected) / np.maximum(info, 1e-12),
+            -MAX_STEP,
+            MAX_STEP,
+        )
+        theta += step
+        if np.abs(step).max(initial=0) < FIXED_TOLERANCE:
+            break
+    with np.errstate(divide="ignore"):
+        se = 1.0 / np.sqrt(info)
+    return theta, se
+
+
+def _estimate_item_locations(targets, observed, theta, thresholds):
+    """
+    Medidas de ítems con personas y umbrales fijos.
+
+    ``observed`` es personas x ítems; se desplaza cada ítem hasta que su
+    puntaje esperado iguale ``targets``.
+    """
+    location = np.zeros(thresholds.shape[0])
+    info = np.ones_like(location)
+    for _ in range(MAX_ITERATIONS):
+        _, _, expected, info, *_ = _pcm_moments(
+            theta,
+            location[:, None] + thresholds,
+            observed,
+        )
+        step = np.clip(
+            (expected - targets) / np.maximum(info, 1e-12),
+            -MAX_STEP,
+            MAX_STEP,
+        )
+        location += step
+        if np.abs(step).max(initial=0) < FIXED_TOLERANCE:
+            break
+    with np.errstate(divide="ignore"):
+        se = 1.0 / np.sqrt(info)
+    return location, se
+
+
+def _locations(steps):
+    """Medida de cada ítem: media de sus pasos (``nan`` si no tiene)"""
+    valid = ~np.isnan(steps)
+    with np.errstate(invalid="ignore"):
+        return np.where(valid, steps, 0).sum(axis=1) / valid.sum(axis=1)
+
+
+def _center(steps):
+    return steps - _locations(steps).mean() if len(steps) else steps
+
+
+def calibrate_partial_credit(  # noqa: PLR0915
+    scores,
+    max_scores,
+    *,
+    initial_steps=None,
+    initial_theta=None,
+    convergence=DEFAULT_CONVERGENCE,
+):
+    """
+    Calibra una matriz personas x ítems con el modelo de crédito parcial.
+
+    ``scores`` tiene puntajes ``0..max_scores[i]`` (negativo = faltante);
+    los ítems con puntaje máximo 1 son dicotómicos y se estiman igual que
+    en ``calibrate_dichotomous``. ``initial_steps`` (ítems x pasos) e
+    ``initial_theta`` son valores iniciales, ``nan`` si no se conocen.
+
+    Devuelve un ``RaschResult`` cuyas medidas de ítem son la media de sus
+    dificultades de paso y ``item_thresholds`` los umbrales de Andrich
+    relativos a ella.
+    """
+    scores = np.asarray(scores)
+    max_scores = np.asarray(max_scores, dtype=int)
+    observed = scores >= 0
+    values = np.where(observed, scores, 0).astype(float)
+    person_extreme, item_extreme = find_extremes(values, observed, max_scores)
+    persons = ~person_extreme
+    items = ~item_extreme
+    n_steps = int(max_scores.max(initial=1))
+    step_valid = np.arange(1, n_steps + 1) <= max_scores[:, None]
+
+    obs = observed[np.ix_(persons, items)]
+    x = values[np.ix_(persons, items)]
+    valid = step_valid[items]
+    person_raw = x.sum(axis=1)
+    item_raw = x.sum(axis=0)
+    # Respuestas por categoría; a las categorías vacías de un ítem se les
+    # suma EXTRSC para que sus pasos tengan estimación finita
+    counts = np.stack(
+        [((x == k) & obs).sum(axis=0) for k in range(n_steps + 1)],
+        axis=1,
+    ).astype(float)
+    counts[:, 1:] = np.where(
+        valid & (counts[:, 1:] == 0),
+        EXTREME_SCORE_ADJUSTMENT,
+        counts[:, 1:],
+    )
+    at_least = counts[:, :0:-1].cumsum(axis=1)[:, ::-1] * valid
+
+    theta, b = _initial_measures(
+        person_raw,
+        (obs * max_scores[items]).sum(axis=1),
+        item_raw,
+        (obs * max_scores[items][None, :]).sum(axis=0),
+    )
+    n_active = items.sum()
+    theta = _warm_start(theta, initial_theta, persons, n_active)
+    steps = np.where(valid, b[:, None], np.nan)
+    if initial_steps is not None:
+        initial = np.asarray(initial_steps, dtype=float)[:, :n_steps]
+        initial = np.where(step_valid, initial, np.nan)
+        steps = _warm_start(steps, initial, items, n_active)
+    steps = _center(steps)
+
+    converged = False
+    iterations = 0
+    max_residual = max_change = None
+    if obs.size:
+        for iterations in range(1, convergence.max_iterations + 1):  # noqa: B007
+            # Personas y pasos se actualizan por turnos: al partir de una
+            # calibración anterior evita que ambos se corrijan a la vez en
+            # la misma dirección y oscilen
+            person_expected, person_variance, *_ = _pcm_moments(theta, steps, obs)
+            person_residual = person_raw - person_expected
+            person_step = np.clip(
+                person_residual / person_variance,
+                -MAX_STEP,
+                MAX_STEP,
+            )
+            theta += person_step
+            _, _, item_expected, _, step_expected, step_variance = _pcm_moments(
+                theta,
+                steps,
+                obs,
+            )
+            item_residual = item_raw - item_expected
+            with np.errstate(invalid="ignore", divide="ignore"):
+                step_step = np.clip(
+                    (step_expected - at_least) / step_variance,
+                    -MAX_STEP,
+                    MAX_STEP,
+                )
+            step_step[~valid] = np.nan
+            steps = _center(steps + step_step)
+            max_residual = float(
+                max(np.abs(person_residual).max(), np.abs(item_residual).max()),
+            )
+            max_change = float(
+                max(np.abs(person_step).max(), np.nanmax(np.abs(step_step))),
+            )
+            if max_change < convergence.lconv and max_residual < convergence.rconv:
+                converged = True
+                break
+
+        if n_active > 1:
+            steps *= (n_active - 1) / n_active
+        theta, _ = estimate_persons_partial_credit(person_raw, obs, steps, theta)
+
+    all_steps = np.full(step_valid.shape, np.nan)
+    all_steps[items] = steps
+    if initial_steps is not None:
+        # Los ítems extremos conservan los umbrales que ya tenían
+        initial = np.asarray(initial_steps, dtype=float)[:, :n_steps]
+        all_steps[item_extreme] = initial[item_extreme]
+    return _finish_partial_credit(
+        values,
+        observed,
+        max_scores,
+        extremes=(person_extreme, item_extreme),
+        estimates=(theta, all_steps),
+        iterations=iterations,
+        converged=converged,
+        max_residual=max_residual,
+        max_change=max_change,
+    )
+
+
+def _finish_partial_credit(
+    values,
+    observed,
+    max_scores,
+    *,
+    extremes,
+    estimates,
+    **stats,
+):
+    """
+    Equivalente de ``_finish`` para el modelo de crédito parcial;
+    ``estimates`` es ``(theta, pasos)``
+    """
+    person_extreme, item_extreme = extremes
+    theta, steps = estimates
+    n_persons, n_items = values.shape
+    persons = ~person_extreme
+    items = ~item_extreme
+    person_measures = np.full(n_persons, np.nan)
+    person_se = np.full(n_persons, np.nan)
+    item_measures = np.full(n_items, np.nan)
+    item_se = np.full(n_items, np.nan)
+    person_measures[persons] = theta
+    locations = _locations(steps)
+    item_measures[items] = locations[items]
+    thresholds = np.where(
+        np.arange(1, steps.shape[1] + 1) <= max_scores[:, None],
+        np.nan_to_num(steps - locations[:, None]),
+        np.nan,
+    )
+
+    obs = observed[np.ix_(persons, items)]
+    if obs.size:
+        _, person_variance, _, item_variance, *_ = _pcm_moments(
+            theta,
+            steps[items],
+            obs,
+        )
+        with np.errstate(divide="ignore"):
+            person_se[persons] = 1.0 / np.sqrt(person_variance)
+            item_se[items] = 1.0 / np.sqrt(item_variance)
+
+    raw_scores = values.sum(axis=1)
+    if items.any():
+        ext_obs = observed[np.ix_(person_extreme, items)]
+        totals = (ext_obs * max_scores[items]).sum(axis=1)
+        ext_raw = np.where(ext_obs, values[np.ix_(person_extreme, items)], 0).sum(
+            axis=1,
+        )
+        targets = np.clip(
+            ext_raw,
+            EXTREME_SCORE_ADJUSTMENT,
+            totals - EXTREME_SCORE_ADJUSTMENT,
+        )
+        measures, se = estimate_persons_partial_credit(
+            targets,
+            ext_obs,
+            steps[items],
+        )
+        measures[totals == 0] = np.nan
+        se[totals == 0] = np.nan
+        person_measures[person_extreme] = measures
+        person_se[person_extreme] = se
+    if persons.any():
+        ext_obs = observed[np.ix_(persons, item_extreme)]
+        totals = (ext_obs * max_scores[item_extreme]).sum(axis=0)
+        ext_raw = np.where(ext_obs, values[np.ix_(persons, item_extreme)], 0).sum(
+            axis=0,
+        )
+        targets = np.clip(
+            ext_raw,
+            EXTREME_SCORE_ADJUSTMENT,
+            totals - EXTREME_SCORE_ADJUSTMENT,
+        )
+        measures, se = _estimate_item_locations(
+            targets,
+            ext_obs,
+            person_measures[persons],
+            thresholds[item_extreme],
+        )
+        measures[totals == 0] = np.nan
+        se[totals == 0] = np.nan
+        item_measures[item_extreme] = measures
+        item_se[item_extreme] = se
+        thresholds[item_extreme & np.isnan(item_measures)] = np.nan
+
+    return RaschResult(
+        item_measures=item_measures,
+        item_se=item_se,
+        item_extreme=item_extreme,
+        person_measures=person_measures,
+        person_se=person_se,
+        person_extreme=person_extreme,
+        raw_scores=raw_scores,
+        item_thresholds=[
+            row[: int(m)] for row, m in zip(thresholds, max_scores, strict=True)
+        ],
+        **stats,
+    )
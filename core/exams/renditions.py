@@ -0,0 +1,189 @@
+"""
+Versiones reducidas de las imágenes de ítems y subpreguntas.
+
+Al guardar una imagen nueva se generan, fuera de la petición, copias en WebP
+y JPEG a los anchos de ``RENDITION_WIDTHS`` (solo los menores que el
+original) junto al archivo original y en el mismo almacenamiento. Lo
+generado se anota en ``image_renditions`` y se incrementa la versión del
+examen, así que la vista previa y la exportación publican ``srcset`` con la
+siguiente versión.
+
+La cola de generación vive en el proceso y se pierde si este se reinicia;
+``manage.py rebuild_renditions`` genera las versiones que falten.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from PIL import Image
+from PIL import ImageOps
+
+from .models import Item
+from .models import SubQuestion
+from .signals import bump_content_version
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WIDTHS = [160, 320, 640, 1280]
+RENDITION_WIDTHS = sorted(getattr(settings, "EXAMS_IMAGE_WIDTHS", DEFAULT_WIDTHS))
+# Hilos del generador; con 0 se generan en el mismo hilo al confirmar
+RENDITION_WORKERS = getattr(settings, "EXAMS_RENDITION_WORKERS", 2)
+# Formato -> (formato de Pillow, extensión, opciones de guardado)
+FORMATS = {
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def rendition_name(name, width, extension):
+    """``exams/items/mapa.png`` -> ``exams/items/mapa.320w.webp``"""
+    stem = name.rsplit(".", 1)[0]
+    return f"{stem}.{width}w.{extension}"
+
+
+def _encode(image, file_format, options):
+    if file_format == "JPEG" and image.mode != "RGB":
+        # JPEG no tiene transparencia: se compone sobre blanco
+        rgba = image.convert("RGBA")
+        background = Image.new("RGB", rgba.size, "white")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        image = background
+    elif image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+    buffer = BytesIO()
+    image.save(buffer, file_format, **options)
+    return buffer.getvalue()
+
+
+def generate_renditions(name, storage=default_storage, widths=RENDITION_WIDTHS):
+    """
+    Genera las versiones reducidas de la imagen ``name`` en ``storage``.
+
+    Devuelve el valor de ``image_renditions``: el nombre y ancho del
+    original y, por formato, la lista de ``[ancho, nombre]``.
+    """
+    with storage.open(name, "rb") as stream:
+        image = ImageOps.exif_transpose(Image.open(stream))
+        image.load()
+    renditions = {"source": name, "width": image.width}
+    for key in FORMATS:
+        renditions[key] = []
+    for width in widths:
+        if width >= image.width:
+            break
+        resized = None
+        for key, (file_format, extension, options) in FORMATS.items():
+            target = rendition_name(name, width, extension)
+            # Los nombres por contenido no cambian: lo ya generado para la
+            # misma imagen (por ejemplo en otro examen) se reutiliza
+            if not storage.exists(target):
+                if resized is None:
+                    height = max(1, round(image.height * width / image.width))
+                    resized = image.resize((width, height), Image.Resampling.LANCZOS)
+                data = _encode(resized, file_format, options)
+                target = storage.save(target, ContentFile(data))
+            renditions[key].append([width, target])
+    return renditions
+
+
+def image_srcset(image, renditions):
+    """
+    ``{"webp": srcset, "jpeg": srcset}`` de una imagen, o ``{}`` si no
+    tiene versiones vigentes. El original cierra cada lista con su ancho.
+    """
+    if not image or not renditions or renditions.get("source") != image.name:
+        return {}
+    original = f"{image.url} {renditions['width']}w"
+    return {
+        key: ", ".join(
+            [f"{image.storage.url(name)} {width}w" for width, name in entries]
+            + [original],
+        )
+        for key in FORMATS
+        if (entries := renditions.get(key))
+    }
+
+
+# =============================================================================
+# Generación en segundo plano
+# =============================================================================
+
+
+def _exam_id(model, pk):
+    if model is Item:
+        return model.objects.filter(pk=pk).values_list("exam_id", flat=True).first()
+    return model.objects.filter(pk=pk).values_list("item__exam_id", flat=True).first()
+
+
+def _backend(model):
+    """Almacenamiento real de la imagen, donde las versiones van por nombre"""
+    storage = model._meta.get_field("image").storage  # noqa: SLF001
+    return getattr(storage, "backend", storage)
+
+
+def render_image(model, pk, name):
+    """Genera y anota las versiones si la imagen no cambió mientras tanto"""
+    try:
+        renditions = generate_renditions(name, _backend(model))
+        exam_id = _exam_id(model, pk)
+        updated = model.objects.filter(pk=pk, image=name).update(
+            image_renditions=renditions,
+        )
+        if updated and exam_id is not None:
+            bump_content_version(exam_id)
+    except Exception:
+        logger.exception("No se pudieron generar las versiones de %s", name)
+
+
+def _render_in_worker(model, pk, name):
+    try:
+        render_image(model, pk, name)
+    finally:
+        # Cada hilo abre su propia conexión
+        connection.close()
+
+
+def _get_executor():
+    global _executor  # noqa: PLW0603
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=RENDITION_WORKERS,
+                thread_name_prefix="renditions",
+            )
+        return _executor
+
+
+def schedule_renditions(model, pk, name):
+    """Encola la generación (o la hace ya, sin hilos configurados)"""
+    if RENDITION_WORKERS:
+        _get_executor().submit(_render_in_worker, model, pk, name)
+    else:
+        render_image(model, pk, name)
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_save, sender=SubQuestion)
+def image_saved(sender, instance, **kwargs):
+    name = instance.image.name if instance.image else ""
+    if (instance.image_renditions or {}).get("source", "") == name:
+        return
+    if not name:
+        # Se quitó la imagen: las versiones viejas dejan de publicarse
+        sender.objects.filter(pk=instance.pk).update(image_renditions={})
+        instance.image_renditions = {}
+        return
+    pk = instance.pk
+    transaction.on_commit(lambda: schedule_renditions(sender, pk, name))
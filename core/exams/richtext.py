@@ -0,0 +1,210 @@
+"""
+Compilación del HTML de Quill al guardar.
+
+``Item.instruction`` y ``SubQuestion.context_text`` guardan el HTML tal como
+lo produce el editor. Al guardar se compila a dos columnas acompañantes:
+
+* ``*_html``: HTML saneado (solo las etiquetas y atributos que produce
+  Quill, sin scripts ni manejadores de eventos) y minificado, que las
+  plantillas publican tal cual;
+* ``*_plain``: el texto plano, para el índice de búsqueda y las etiquetas
+  de Winsteps.
+
+Los guardados con ``save()`` compilan en ``pre_save`` (ver ``signals.py``);
+las operaciones masivas llaman a ``compile_fields`` antes de escribir.
+"""
+
+import re
+from html import escape
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+ALLOWED_TAGS = {
+    "a",
+    "b",
+    "blockquote",
+    "br",
+    "code",
+    "em",
+    "h1",
+    "h2",
+    "h3",
+    "i",
+    "img",
+    "li",
+    "ol",
+    "p",
+    "pre",
+    "s",
+    "span",
+    "strong",
+    "sub",
+    "sup",
+    "table",
+    "tbody",
+    "td",
+    "th",
+    "thead",
+    "tr",
+    "u",
+    "ul",
+}
+ALLOWED_ATTRIBUTES = {
+    "a": {"href", "target"},
+    "img": {"src", "alt", "width", "height"},
+    "td": {"colspan", "rowspan"},
+    "th": {"colspan", "rowspan"},
+}
+VOID_TAGS = {"br", "img"}
+# Etiquetas cuyo contenido se descarta junto con ellas
+DROP_CONTENT_TAGS = {"script", "style", "iframe", "object", "template"}
+# Etiquetas que separan palabras en el texto plano
+BLOCK_TAGS = {
+    "blockquote",
+    "br",
+    "h1",
+    "h2",
+    "h3",
+    "li",
+    "p",
+    "pre",
+    "td",
+    "th",
+    "tr",
+}
+URL_SCHEMES = {"", "http", "https", "mailto"}
+IMAGE_SCHEMES = {"", "http", "https", "data"}
+
+# Fuente -> (HTML compilado, texto plano), por modelo
+RICH_TEXT_FIELDS = {
+    "item": {"instruction": ("instruction_html", "instruction_plain")},
+    "subquestion": {"context_text": ("context_html", "context_plain")},
+}
+
+_SPACE = re.compile(r"\s+")
+
+
+def _allowed_url(value, schemes):
+    scheme = urlsplit(value.strip()).scheme.lower()
+    if scheme not in schemes:
+        return False
+    return scheme != "data" or value.strip().lower().startswith("data:image/")
+
+
+def _attributes(tag, attrs):
+    allowed = ALLOWED_ATTRIBUTES.get(tag, set())
+    clean = []
+    for name, value in attrs:
+        value = value or ""  # noqa: PLW2901
+        if name == "class":
+            # Solo las clases de formato de Quill (alineación, sangría...)
+            classes = [c for c in value.split() if c.startswith("ql-")]
+            if classes:
+                clean.append(("class", " ".join(classes)))
+        elif name in allowed:
+            if name == "href" and not _allowed_url(value, URL_SCHEMES):
+                continue
+            if name == "src" and not _allowed_url(value, IMAGE_SCHEMES):
+                continue
+            clean.append((name, value))
+    if tag == "a" and any(name == "target" for name, _ in clean):
+        clean.append(("rel", "noopener noreferrer"))
+    return clean
+
+
+class _Compiler(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.html = []
+        self.plain = []
+        self.open_tags = []
+        self.dropping = 0
+        self.preformatted = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            self.dropping += 1
+            return
+        if self.dropping:
+            return
+        if tag in BLOCK_TAGS:
+            self.plain.append(" ")
+        if tag not in ALLOWED_TAGS:
+            return
+        attributes = "".join(
+            f' {name}="{escape(value)}"' for name, value in _attributes(tag, attrs)
+        )
+        self.html.append(f"<{tag}{attributes}>")
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+            if tag == "pre":
+                self.preformatted += 1
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            self.dropping = max(0, self.dropping - 1)
+            return
+        if self.dropping:
+            return
+        if tag in BLOCK_TAGS:
+            self.plain.append(" ")
+        if tag not in self.open_tags:
+            return
+        # Cierra también lo que quedó abierto dentro de la etiqueta
+        while self.open_tags:
+            current = self.open_tags.pop()
+            self.html.append(f"</{current}>")
+            if current == "pre":
+                self.preformatted -= 1
+            if current == tag:
+                break
+
+    def handle_data(self, data):
+        if self.dropping:
+            return
+        self.plain.append(data)
+        if not self.preformatted:
+            data = _SPACE.sub(" ", data)
+        self.html.append(escape(data, quote=False))
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.html.append(f"</{self.open_tags.pop()}>")
+
+
+def compile_rich_text(raw):
+    """``(html, texto)``: el HTML saneado y minificado y su texto plano"""
+    compiler = _Compiler()
+    compiler.feed(raw or "")
+    compiler.close()
+    html = "".join(compiler.html).strip()
+    # Párrafos vacíos que Quill deja al final del contenido
+    while html.endswith("<p><br></p>"):
+        html = html.removesuffix("<p><br></p>").rstrip()
+    plain = _SPACE.sub(" ", "".join(compiler.plain)).strip()
+    return html, plain
+
+
+def compile_fields(instance, changed=None):
+    """
+    Compila los campos de texto enriquecido de ``instance``.
+
+    Con ``changed`` solo se compilan las fuentes incluidas ahí. Devuelve los
+    nombres de las columnas compiladas que se asignaron.
+    """
+    fields = RICH_TEXT_FIELDS.get(instance._meta.model_name, {})  # noqa: SLF001
+    assigned = []
+    for source, (html_field, plain_field) in fields.items():
+        if changed is not None and source not in changed:
+            continue
+        html, plain = compile_rich_text(getattr(instance, source))
+        setattr(instance, html_field, html)
+        setattr(instance, plain_field, plain)
+        assigned += [html_field, plain_field]
+    return assigned
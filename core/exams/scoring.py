@@ -0,0 +1,311 @@
+"""
+Calificación vectorizada con NumPy.
+
+El examen se compila en una clave de respuestas compacta (un valor por
+subpregunta) y una matriz de respuestas personas x subpreguntas se califica
+en una sola pasada, produciendo la matriz personas x ítems de puntajes que
+usan los reportes, Winsteps y la calibración Rasch.
+
+La clave compilada se guarda en dos niveles: un LRU acotado en memoria de
+cada proceso y, debajo, la caché compartida (Redis en producción). Ambos
+se indexan por versión de contenido, así que un cambio en el examen deja
+de leerlos sin tener que borrarlos en todos los procesos.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+
+from .cache import RENDER_CACHE_TIMEOUT
+from .cache import fragment_key
+from .cache import get_content_version
+from .models import Item
+from .models import Response
+from .models import SubQuestion
+
+# Valor de la matriz de respuestas para una subpregunta sin responder
+NO_ANSWER = 0
+# Clave de una subpregunta sin opción correcta; no coincide con ninguna
+# respuesta, ni siquiera con NO_ANSWER
+NO_KEY = -1
+# Puntaje de un ítem en el que no se respondió ninguna subpregunta
+MISSING_SCORE = -1
+PERSON_CHUNK_SIZE = 2000
+# Claves compiladas que conserva cada proceso
+ANSWER_KEY_CACHE_SIZE = getattr(settings, "EXAMS_ANSWER_KEY_CACHE_SIZE", 128)
+
+_answer_keys = OrderedDict()
+_answer_keys_lock = threading.Lock()
+
+
+class AnswerKey:
+    """
+    Clave de respuestas compilada de un examen.
+
+    Las subpreguntas van en el orden del examen (ítem y luego subpregunta),
+    de modo que las de cada ítem son contiguas y ``item_starts`` indica
+    dónde empieza cada ítem.
+    """
+
+    def __init__(self, exam_id, version, items, subquestions):
+        self.exam_id = exam_id
+        self.version = version
+        self.item_ids = np.array([i["id"] for i in items], dtype=np.int64)
+        self.item_codes = [i["code"] for i in items]
+        self.polytomous = np.array(
+            [i["scoring_type"] == Item.SCORING_POLYTOMOUS for i in items],
+            dtype=bool,
+        )
+        self.subquestion_ids = np.array(
+            [s["id"] for s in subquestions],
+            dtype=np.int64,
+        )
+        self.correct_option_ids = np.array(
+            [s["correct"] for s in subquestions],
+            dtype=np.int64,
+        )
+        item_index = {item_id: n for n, item_id in enumerate(self.item_ids.tolist())}
+        self.subquestion_item = np.array(
+            [item_index[s["item_id"]] for s in subquestions],
+            dtype=np.intp,
+        )
+        self.subquestion_counts = np.bincount(
+            self.subquestion_item,
+            minlength=len(items),
+        ).astype(np.int16)
+        self.item_starts = np.concatenate(
+            ([0], np.cumsum(self.subquestion_counts)[:-1]),
+        ).astype(np.intp)
+        self.max_scores = np.where(self.polytomous, 2, 1).astype(np.int8)
+        # Subpreguntas correctas necesarias para el crédito parcial: todas
+        # menos una (ej: 2 de 3); un ítem de una sola subpregunta no tiene
+        # crédito parcial.
+        self.partial_min = np.where(
+            self.subquestion_counts > 1,
+            self.subquestion_counts - 1,
+            self.subquestion_counts + 1,
+        ).astype(np.int16)
+        # Posición de cada subpregunta, para ubicar respuestas por id
+        self._subq_order = np.argsort(self.subquestion_ids)
+        self._subq_sorted = self.subquestion_ids[self._subq_order]
+
+    @property
+    def n_items(self):
+        return len(self.item_ids)
+
+    @property
+    def n_subquestions(self):
+        return len(self.subquestion_ids)
+
+    def columns_for(self, subquestion_ids):
+        """
+        Columna de la matriz de respuestas de cada subpregunta.
+
+        Las subpreguntas que no son del examen reciben ``-1``.
+        """
+        subquestion_ids = np.asarray(subquestion_ids, dtype=np.int64)
+        if not self.n_subquestions:
+            return np.full(subquestion_ids.shape, -1, dtype=np.intp)
+        pos = np.searchsorted(self._subq_sorted, subquestion_ids)
+        pos = np.minimum(pos, self.n_subquestions - 1)
+        found = self._subq_sorted[pos] == subquestion_ids
+        return np.where(found, self._subq_order[pos], -1)
+
+
+def _answer_key_rows(exam_id):
+    """Ítems y subpreguntas con su opción correcta, en dos consultas"""
+    items = list(
+        Item.objects.filter(exam_id=exam_id)
+        .order_by("order", "id")
+        .values("id", "code", "scoring_type"),
+    )
+    correct = {}
+    subquestions = []
+    rows = (
+        SubQuestion.objects.filter(item__exam_id=exam_id)
+        .order_by("item__order", "item_id", "order", "id", "options__order")
+        .values_list("id", "item_id", "options__id", "options__is_correct")
+    )
+    for subq_id, item_id, option_id, is_correct in rows:
+        if subq_id not in correct:
+            correct[subq_id] = NO_KEY
+            subquestions.append({"id": subq_id, "item_id": item_id})
+        # Si hay varias opciones marcadas como correctas vale la primera
+        if is_correct and correct[subq_id] == NO_KEY:
+            correct[subq_id] = option_id
+    for subq in subquestions:
+        subq["correct"] = correct[subq["id"]]
+    return items, subquestions
+
+
+def compile_answer_key(exam):
+    """Compila la clave de respuestas del examen en dos consultas"""
+    return AnswerKey(exam.pk, exam.content_version, *_answer_key_rows(exam.pk))
+
+
+def get_answer_key(exam_id):
+    """
+    Clave de respuestas vigente del examen, o ``None`` si no existe.
+
+    Se busca primero en el LRU del proceso y luego en la caché compartida,
+    que guarda las filas compiladas (no el objeto) para no depender de la
+    versión del código que las escribió; solo si faltan en ambas se
+    consulta la base de datos.
+    """
+    version = get_content_version(exam_id)
+    if version is None:
+        return None
+    local_key = (exam_id, version)
+    with _answer_keys_lock:
+        key = _answer_keys.get(local_key)
+        if key is not None:
+            _answer_keys.move_to_end(local_key)
+            return key
+
+    shared_key = fragment_key("answer-key", exam_id, version)
+    rows = cache.get(shared_key)
+    if rows is None:
+        rows = _answer_key_rows(exam_id)
+        cache.set(shared_key, rows, RENDER_CACHE_TIMEOUT)
+    key = AnswerKey(exam_id, version, *rows)
+
+    with _answer_keys_lock:
+        for stale in [k for k in _answer_keys if k[0] == exam_id]:
+            del _answer_keys[stale]
+        _answer_keys[local_key] = key
+        while len(_answer_keys) > ANSWER_KEY_CACHE_SIZE:
+            _answer_keys.popitem(last=False)
+    return key
+
+
+def forget_answer_key(exam_id=None):
+    """Descarta del LRU del proceso la clave del examen (o todas)"""
+    with _answer_keys_lock:
+        if exam_id is None:
+            _answer_keys.clear()
+            return
+        for stale in [k for k in _answer_keys if k[0] == exam_id]:
+            del _answer_keys[stale]
+
+
+def score_matrix(key, responses):
+    """
+    Califica una matriz de respuestas.
+
+    ``responses`` es personas x subpreguntas con el id de la opción elegida
+    (``NO_ANSWER`` si no hubo respuesta), en el orden de ``key``. Devuelve
+    la matriz personas x ítems ``int8`` con 0/1 (dicotómicos), 0/1/2
+    (politómicos) o ``MISSING_SCORE``.
+    """
+    responses = np.asarray(responses)
+    n_persons = responses.shape[0]
+    if not key.n_items:
+        return np.zeros((n_persons, 0), dtype=np.int8)
+
+    correct = (responses == key.correct_option_ids).view(np.int8)
+    answered = (responses != NO_ANSWER).view(np.int8)
+    # reduceat necesita inicios estrictamente crecientes: los ítems sin
+    # subpreguntas se omiten y quedan sin respuesta
+    filled = key.subquestion_counts > 0
+    if filled.all():
+        n_correct = np.add.reduceat(correct, key.item_starts, axis=1, dtype=np.int16)
+        n_answered = np.add.reduceat(answered, key.item_starts, axis=1, dtype=np.int16)
+    else:
+        n_correct = np.zeros((n_persons, key.n_items), dtype=np.int16)
+        n_answered = np.zeros((n_persons, key.n_items), dtype=np.int16)
+        if filled.any():
+            starts = key.item_starts[filled]
+            n_correct[:, filled] = np.add.reduceat(
+                correct,
+                starts,
+                axis=1,
+                dtype=np.int16,
+            )
+            n_answered[:, filled] = np.add.reduceat(
+                answered,
+                starts,
+                axis=1,
+                dtype=np.int16,
+            )
+
+    full = n_correct == key.subquestion_counts
+    partial = key.polytomous & (n_correct >= key.partial_min)
+    scores = np.where(full, key.max_scores, partial.astype(np.int8)).astype(np.int8)
+    scores[n_answered == 0] = MISSING_SCORE
+    return scores
+
+
+def fill_responses(key, matrix, rows, subquestion_ids, option_ids):
+    """
+    Vuelca respuestas a la matriz en bloque.
+
+    Las filas deben venir ordenadas por ``Response.id``: ante respuestas
+    repetidas la última asignación prevalece, que es la respuesta vigente.
+    """
+    cols = key.columns_for(subquestion_ids)
+    keep = cols >= 0
+    option_ids = np.asarray(option_ids, dtype=np.int64)
+    matrix[np.asarray(rows)[keep], cols[keep]] = option_ids[keep]
+
+
+def load_responses(key, examinee_ids):
+    """
+    Matriz de respuestas vigentes de los examinados indicados.
+
+    Devuelve una matriz ``len(examinee_ids)`` x subpreguntas en el orden de
+    ``examinee_ids``.
+    """
+    examinee_ids = np.asarray(examinee_ids, dtype=np.int64)
+    matrix = np.full(
+        (len(examinee_ids), key.n_subquestions),
+        NO_ANSWER,
+        dtype=np.int64,
+    )
+    if not len(examinee_ids) or not key.n_subquestions:
+        return matrix
+    rows = np.array(
+        Response.objects.filter(examinee_id__in=examinee_ids.tolist())
+        .order_by("id")
+        .values_list(
+            "examinee_id",
+            "subquestion_id",
+            Coalesce("option_id", Value(NO_ANSWER)),
+        ),
+        dtype=np.int64,
+    ).reshape(-1, 3)
+    if not len(rows):
+        return matrix
+    order = np.argsort(examinee_ids)
+    person_rows = order[np.searchsorted(examinee_ids[order], rows[:, 0])]
+    fill_responses(key, matrix, person_rows, rows[:, 1], rows[:, 2])
+    return matrix
+
+
+def iter_person_scores(key, examinees, chunk_size=PERSON_CHUNK_SIZE):
+    """
+    Califica examinados por bloques en memoria constante.
+
+    ``examinees`` es un queryset de ``Examinee``; se recorre con un cursor
+    del lado del servidor y produce ``(código, puntajes)`` por persona.
+    """
+    chunk = []
+    rows = examinees.order_by("id").values_list("id", "code")
+    for row in rows.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield from _score_chunk(key, chunk)
+            chunk = []
+    if chunk:
+        yield from _score_chunk(key, chunk)
+
+
+def _score_chunk(key, chunk):
+    ids = [examinee_id for examinee_id, _ in chunk]
+    scores = score_matrix(key, load_responses(key, ids))
+    for (_, code), row in zip(chunk, scores.tolist(), strict=True):
+        yield code, [None if s == MISSING_SCORE else s for s in row]
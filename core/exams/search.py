@@ -0,0 +1,256 @@
+"""
+Búsqueda de texto completo sobre exámenes y el banco de ítems.
+
+Cada examen tiene un ``SearchDocument`` con su nombre y uno por ítem con el
+código, la instrucción, las subpreguntas y las opciones: el texto plano que
+se compila al guardar (ver ``richtext.py``), sin tildes. El índice lo
+mantiene la base de datos:
+
+* SQLite: tabla FTS5 ``exams_search_fts`` sincronizada por triggers;
+* PostgreSQL: columna generada ``search_vector`` (configuración
+  ``spanish``) con índice GIN.
+
+``index_exam`` reescribe solo los documentos que cambiaron y se llama al
+confirmar cada cambio de contenido (ver ``signals.py``); la migración 0015
+indexa los exámenes que ya existían. ``search`` es la interfaz de
+consulta de documentos; ``search_exam_ids`` agrupa por examen en la propia
+consulta para el listado.
+"""
+
+import hashlib
+import re
+import unicodedata
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import connection
+from django.db import transaction
+
+from .models import Exam
+from .models import Item
+from .models import Option
+from .models import SearchDocument
+from .models import SubQuestion
+
+# Documentos por consulta de ``search``; ``None`` los devuelve todos
+SEARCH_LIMIT = 200
+# Exámenes que puede paginar el listado en una búsqueda
+EXAM_SEARCH_LIMIT = getattr(settings, "EXAMS_SEARCH_MAX_EXAMS", 500)
+# Pesos de título y contenido para BM25 (SQLite); en PostgreSQL son las
+# categorías A y B de setweight
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+
+class SearchHit(NamedTuple):
+    exam_id: int
+    item_id: int | None
+    score: float
+
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize(text):
+    """Texto sin tildes y con los espacios colapsados"""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.split())
+
+
+def terms(query):
+    """Palabras de la consulta, normalizadas y en minúsculas"""
+    return _WORD.findall(normalize(query).lower())
+
+
+# =============================================================================
+# Indexación
+# =============================================================================
+
+
+def _documents(exam_id):
+    """``{item_id: (título, contenido)}`` del examen (``None`` = el examen)"""
+    name = Exam.objects.filter(pk=exam_id).values_list("name", flat=True).first()
+    if name is None:
+        return None
+    parts: dict[int | None, list[str]] = {}
+    titles: dict[int | None, str] = {None: name}
+    for item_id, code, instruction in Item.objects.filter(exam_id=exam_id).values_list(
+        "id",
+        "code",
+        "instruction_plain",
+    ):
+        titles[item_id] = code
+        parts[item_id] = [instruction]
+    for item_id, context in SubQuestion.objects.filter(
+        item__exam_id=exam_id,
+    ).values_list("item_id", "context_plain"):
+        parts[item_id].append(context)
+    for item_id, text in Option.objects.filter(
+        subquestion__item__exam_id=exam_id,
+    ).values_list("subquestion__item_id", "text"):
+        parts[item_id].append(text)
+    return {
+        item_id: (
+            normalize(title)[:255],
+            normalize(" ".join(parts.get(item_id, []))),
+        )
+        for item_id, title in titles.items()
+    }
+
+
+def document_checksum(title, body):
+    return hashlib.md5(f"{title}\n{body}".encode(), usedforsecurity=False).hexdigest()
+
+
+@transaction.atomic
+def index_exam(exam_id):
+    """
+    Actualiza los documentos del examen.
+
+    Se comparan sumas de verificación con lo indexado, así que solo se
+    escriben los documentos nuevos o modificados y se borran los de ítems
+    que ya no existen. Devuelve cuántos documentos se escribieron.
+    """
+    documents = _documents(exam_id)
+    if documents is None:
+        return 0
+    existing = {
+        doc.item_id: doc
+        for doc in SearchDocument.objects.filter(exam_id=exam_id).only(
+            "id",
+            "exam_id",
+            "item_id",
+            "checksum",
+        )
+    }
+    to_create, to_update = [], []
+    for item_id, (title, body) in documents.items():
+        checksum = document_checksum(title, body)
+        doc = existing.pop(item_id, None)
+        if doc is None:
+            to_create.append(
+                SearchDocument(
+                    exam_id=exam_id,
+                    item_id=item_id,
+                    title=title,
+                    body=body,
+                    checksum=checksum,
+                ),
+            )
+        elif doc.checksum != checksum:
+            doc.title, doc.body, doc.checksum = title, body, checksum
+            to_update.append(doc)
+    if existing:
+        SearchDocument.objects.filter(
+            pk__in=[doc.pk for doc in existing.values()],
+        ).delete()
+    if to_create:
+        SearchDocument.objects.bulk_create(to_create)
+    if to_update:
+        SearchDocument.objects.bulk_update(to_update, ["title", "body", "checksum"])
+    return len(to_create) + len(to_update)
+
+
+# =============================================================================
+# Consulta
+# =============================================================================
+
+
+def _hits_sqlite(words):
+    # Cada palabra entre comillas (sin sintaxis de FTS5) y como prefijo
+    match = " ".join(f'"{word}"*' for word in words)
+    sql = f"""
+        SELECT d.exam_id, d.item_id,
+               -bm25(exams_search_fts, {TITLE_WEIGHT}, {BODY_WEIGHT}) AS score
+        FROM exams_search_fts
+        JOIN exams_searchdocument d ON d.id = exams_search_fts.rowid
+        WHERE exams_search_fts MATCH %s
+    """  # noqa: S608
+    return sql, [match]
+
+
+def _hits_postgresql(words):
+    tsquery = " & ".join(f"{word}:*" for word in words)
+    sql = """
+        SELECT exam_id, item_id, ts_rank(search_vector, query) AS score
+        FROM exams_searchdocument, to_tsquery('spanish', %s) AS query
+        WHERE search_vector @@ query
+    """
+    return sql, [tsquery]
+
+
+BACKENDS = {
+    "sqlite": _hits_sqlite,
+    "postgresql": _hits_postgresql,
+}
+
+
+def _fallback(words):
+    """Otros motores: coincidencia de subcadenas, sin relevancia"""
+    queryset = SearchDocument.objects.all()
+    for word in words:
+        queryset = queryset.filter(title__icontains=word) | queryset.filter(
+            body__icontains=word,
+        )
+    return queryset
+
+
+def _fetch(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _limit(limit):
+    # Sin límite: LIMIT -1 en SQLite, LIMIT NULL (= ALL) en PostgreSQL
+    if limit is None and connection.vendor == "sqlite":
+        return -1
+    return limit
+
+
+def search(query, limit=SEARCH_LIMIT):
+    """
+    Documentos que contienen todas las palabras de ``query`` (como prefijo),
+    de mayor a menor relevancia, como ``SearchHit``.
+    """
+    words = terms(query)
+    if not words:
+        return []
+    backend = BACKENDS.get(connection.vendor)
+    if backend is None:
+        hits = _fallback(words).values_list("exam_id", "item_id")[:limit]
+        return [SearchHit(exam_id, item_id, 1.0) for exam_id, item_id in hits]
+    sql, params = backend(words)
+    rows = _fetch(f"{sql} ORDER BY score DESC LIMIT %s", [*params, _limit(limit)])
+    return [SearchHit(*row) for row in rows]
+
+
+def search_exam_ids(query, limit=EXAM_SEARCH_LIMIT):
+    """
+    Ids de los exámenes con resultados, ordenados por su mejor documento.
+
+    La base de datos agrupa por examen y aplica el límite, así que el
+    listado nunca carga todos los documentos coincidentes: pagina como
+    mucho ``limit`` exámenes.
+    """
+    words = terms(query)
+    if not words:
+        return []
+    backend = BACKENDS.get(connection.vendor)
+    if backend is None:
+        exams = _fallback(words).values_list("exam_id", flat=True)
+        return list(exams.distinct().order_by("exam_id")[:limit])
+    sql, params = backend(words)
+    # El LIMIT (sin límite) de la subconsulta impide que SQLite la aplane:
+    # bm25 no puede evaluarse dentro de un agregado
+    rows = _fetch(
+        f"""
+        SELECT exam_id FROM ({sql} LIMIT %s) AS hits
+        GROUP BY exam_id
+        ORDER BY MAX(score) DESC, exam_id
+        LIMIT %s
+        """,  # noqa: S608
+        [*params, _limit(None), _limit(limit)],
+    )
+    return [exam_id for (exam_id,) in rows]
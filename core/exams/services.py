@@ -0,0 +1,365 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import RestrictedError
+
+from .models import Exam
+from .models import Item
+from .models import Option
+from .models import SubQuestion
+from .ordering import ORDER_GAP
+from .ordering import next_order
+from .renditions import image_srcset
+from .richtext import compile_fields
+from .signals import batch_content_changes
+
+ITEM_FIELDS = [
+    "code",
+    "instruction",
+    "order",
+    "scoring_type",
+    "correct_criteria",
+    "partial_criteria",
+    "incorrect_criteria",
+]
+SUBQUESTION_FIELDS = ["order", "context_text"]
+OPTION_FIELDS = ["label", "text", "is_correct", "order"]
+CLONE_NAME_SUFFIX = " (copia)"
+ANSWERED_DELETE_ERROR = "No se puede eliminar: ya hay respuestas registradas"
+DUPLICATE_CODE_ERROR = "Ya existe un ítem con ese código en el examen"
+ORDER_ERROR = "El orden debe ser un número entero no negativo"
+
+
+def _clean_order(data):
+    """
+    Copia de ``data`` sin ``order`` si viene vacío (se asigna el de siempre);
+    lanza ``ValidationError`` si no es un entero (0, de antes de los huecos,
+    sigue siendo válido)
+    """
+    order = data.get("order")
+    if order is None:
+        return {k: v for k, v in data.items() if k != "order"}
+    if isinstance(order, bool) or not isinstance(order, int) or order < 0:
+        raise ValidationError(ORDER_ERROR)
+    return data
+
+
+def _apply_fields(obj, data, fields):
+    """Copia los campos presentes en data y devuelve los que cambiaron"""
+    changed = []
+    for field in fields:
+        if field in data and getattr(obj, field) != data[field]:
+            setattr(obj, field, data[field])
+            changed.append(field)
+    return changed
+
+
+def _diff_rows(rows_data, existing, fields, build, belongs=None):
+    """
+    Compara los datos recibidos con las filas almacenadas de un nivel.
+
+    Devuelve las filas en el orden del payload junto con las que hay que
+    crear, las que cambiaron y los campos modificados. ``belongs`` valida
+    que una fila existente cuelgue del padre esperado.
+    """
+    rows, to_create, to_update = [], [], []
+    update_fields: set[str] = set()
+    for index, row_data in enumerate(rows_data, start=1):
+        # Sin orden explícito se numera por posición, con huecos (ordering.py)
+        row_data = {"order": index * ORDER_GAP, **_clean_order(row_data)}  # noqa: PLW2901
+        row_id = row_data.get("id")
+        if row_id:
+            row = existing.get(row_id)
+            if row is None or (belongs is not None and not belongs(row)):
+                msg = f"La fila {row_id} no pertenece a este ítem"
+                raise ValidationError(msg)
+            changed = _apply_fields(row, row_data, fields)
+            if changed:
+                to_update.append(row)
+                update_fields.update(changed, compile_fields(row, changed))
+        else:
+            row = build(row_data)
+            compile_fields(row)
+            to_create.append(row)
+        rows.append((row, row_data))
+    return rows, to_create, to_update, update_fields
+
+
+def _write_level(model, to_delete, to_create, to_update, update_fields):
+    if to_delete:
+        # Las respuestas guardadas no se reescriben (ver Response)
+        try:
+            model.objects.filter(pk__in=to_delete).delete()
+        except RestrictedError as exc:
+            raise ValidationError(ANSWERED_DELETE_ERROR) from exc
+    if to_create:
+        model.objects.bulk_create(to_create)
+    if to_update:
+        model.objects.bulk_update(to_update, sorted(update_fields))
+
+
+def _check_code(exam, item):
+    """Rechaza un código que ya usa otro ítem del examen"""
+    taken = Item.objects.filter(exam=exam, code=item.code).exclude(pk=item.pk)
+    if taken.exists():
+        raise ValidationError(DUPLICATE_CODE_ERROR)
+
+
+def _save_item(exam, data):
+    data = _clean_order(data)
+    item_id = data.get("id")
+    if item_id:
+        try:
+            item = Item.objects.select_for_update().get(pk=item_id, exam=exam)
+        except Item.DoesNotExist as exc:
+            msg = "El ítem no pertenece a este examen"
+            raise ValidationError(msg) from exc
+        changed = _apply_fields(item, data, ITEM_FIELDS)
+        if "code" in changed:
+            _check_code(exam, item)
+        if changed:
+            item.save()
+        return item
+
+    item = Item(
+        exam=exam,
+        code=data.get("code", ""),
+        instruction=data.get("instruction", ""),
+        scoring_type=data.get("scoring_type", Item.SCORING_DICHOTOMOUS),
+        order=data.get("order") or next_order(exam),
+        correct_criteria=data.get("correct_criteria", ""),
+        partial_criteria=data.get("partial_criteria", ""),
+        incorrect_criteria=data.get("incorrect_criteria", ""),
+    )
+    _check_code(exam, item)
+    item.save()
+    return item
+
+
+@transaction.atomic
+def save_item_tree(exam, data):
+    """
+    Guarda un ítem con sus subpreguntas y opciones en una sola transacción.
+
+    ``data`` tiene la forma que construye ``collectFormData()`` en el editor.
+    El árbol recibido se compara con el almacenado: las filas sin ``id`` se
+    crean, las existentes se actualizan solo si cambiaron y las que faltan en
+    el payload se eliminan, salvo que ya tengan respuestas. El número de
+    consultas no depende del tamaño del árbol.
+    """
+    with batch_content_changes(exam.pk):
+        return _save_tree(exam, data)
+
+
+def _save_tree(exam, data):
+    item = _save_item(exam, data)
+
+    # Árbol almacenado (2 consultas, ninguna para un ítem nuevo)
+    existing_subqs, existing_options = {}, {}
+    if data.get("id"):
+        existing_subqs = {s.pk: s for s in SubQuestion.objects.filter(item=item)}
+        existing_options = {
+            o.pk: o for o in Option.objects.filter(subquestion__item=item)
+        }
+
+    subq_rows, *subq_changes = _diff_rows(
+        data.get("subquestions") or [],
+        existing_subqs,
+        SUBQUESTION_FIELDS,
+        lambda d: SubQuestion(
+            item=item,
+            order=d["order"],
+            context_text=d.get("context_text", ""),
+        ),
+    )
+    kept_subq_ids = {subq.pk for subq, _ in subq_rows if subq.pk}
+    deleted_subq_ids = set(existing_subqs) - kept_subq_ids
+    _write_level(SubQuestion, deleted_subq_ids, *subq_changes)
+
+    tree = []
+    options_to_create, options_to_update, option_fields = [], [], set()
+    kept_option_ids = set()
+    for subq, subq_data in subq_rows:
+        option_rows, to_create, to_update, fields = _diff_rows(
+            subq_data.get("options") or [],
+            existing_options,
+            OPTION_FIELDS,
+            lambda d, subq=subq: Option(
+                subquestion=subq,
+                label=d.get("label", ""),
+                text=d.get("text", ""),
+                is_correct=d.get("is_correct", False),
+                order=d["order"],
+            ),
+            belongs=lambda o, subq=subq: o.subquestion_id == subq.pk,
+        )
+        options_to_create += to_create
+        options_to_update += to_update
+        option_fields |= fields
+        kept_option_ids |= {o.pk for o, _ in option_rows if o.pk}
+        tree.append((subq, [option for option, _ in option_rows]))
+
+    # Las opciones de subpreguntas eliminadas ya se borraron en cascada
+    deleted_option_ids = {
+        pk
+        for pk, option in existing_options.items()
+        if pk not in kept_option_ids and option.subquestion_id not in deleted_subq_ids
+    }
+    _write_level(
+        Option,
+        deleted_option_ids,
+        options_to_create,
+        options_to_update,
+        option_fields,
+    )
+
+    return item, tree
+
+
+def _clone_level(model, rows, parent_field, parent_ids):
+    """
+    Copia un nivel del árbol con un solo INSERT.
+
+    ``rows`` son diccionarios de ``values()`` con ``id`` y el id del padre
+    original; ``parent_ids`` traduce ese padre al de la copia. Devuelve el
+    mapa de ids originales a ids nuevos para el nivel siguiente.
+    """
+    old_ids = []
+    copies = []
+    for row in rows:
+        old_ids.append(row.pop("id"))
+        row[parent_field] = parent_ids[row[parent_field]]
+        copies.append(model(**row))
+    model.objects.bulk_create(copies)
+    return {old: new.pk for old, new in zip(old_ids, copies, strict=True)}
+
+
+@transaction.atomic
+def clone_exam(exam, *, name=None, created_by=None):
+    """
+    Copia el examen con todos sus ítems, subpreguntas y opciones.
+
+    Cada nivel se lee y se inserta en bloque, así que el costo es de siete
+    consultas sin importar el tamaño del examen. Las imágenes se copian por
+    referencia: la copia apunta a los mismos archivos, sin volver a subirlos.
+    """
+    if not name:
+        max_length = Exam._meta.get_field("name").max_length  # noqa: SLF001
+        name = exam.name[: max_length - len(CLONE_NAME_SUFFIX)] + CLONE_NAME_SUFFIX
+    clone = Exam.objects.create(
+        name=name,
+        created_by=created_by or exam.created_by,
+        is_active=exam.is_active,
+    )
+    item_ids = _clone_level(
+        Item,
+        Item.objects.filter(exam=exam).values(
+            "id",
+            "exam_id",
+            "image",
+            "image_renditions",
+            "instruction_html",
+            "instruction_plain",
+            *ITEM_FIELDS,
+        ),
+        "exam_id",
+        {exam.pk: clone.pk},
+    )
+    subq_ids = _clone_level(
+        SubQuestion,
+        SubQuestion.objects.filter(item__exam=exam).values(
+            "id",
+            "item_id",
+            "image",
+            "image_renditions",
+            "context_html",
+            "context_plain",
+            *SUBQUESTION_FIELDS,
+        ),
+        "item_id",
+        item_ids,
+    )
+    _clone_level(
+        Option,
+        Option.objects.filter(subquestion__item__exam=exam).values(
+            "id",
+            "subquestion_id",
+            *OPTION_FIELDS,
+        ),
+        "subquestion_id",
+        subq_ids,
+    )
+    return clone
+
+
+def serialize_item_tree(item, tree):
+    """Respuesta con los ids definitivos de todo el árbol guardado"""
+    return {
+        "id": item.id,
+        "code": item.code,
+        "instruction": item.instruction,
+        "order": item.order,
+        "scoring_type": item.scoring_type,
+        "subquestions": [
+            {
+                "id": subq.id,
+                "order": subq.order,
+                "options": [
+                    {"id": option.id, "label": option.label, "order": option.order}
+                    for option in options
+                ],
+            }
+            for subq, options in tree
+        ],
+    }
+
+
+def serialize_exam(exam):
+    """
+    Árbol completo del examen como diccionario serializable.
+
+    Espera ``exam`` con ``items__subquestions__options`` precargado.
+    """
+    return {
+        "id": exam.id,
+        "name": exam.name,
+        "content_version": exam.content_version,
+        "updated_at": exam.updated_at.isoformat(),
+        "items": [
+            {
+                "id": item.id,
+                "code": item.code,
+                "order": item.order,
+                "instruction": item.instruction,
+                "image": item.image.url if item.image else None,
+                "image_srcset": image_srcset(item.image, item.image_renditions),
+                "scoring_type": item.scoring_type,
+                "correct_criteria": item.correct_criteria,
+                "partial_criteria": item.partial_criteria,
+                "incorrect_criteria": item.incorrect_criteria,
+                "subquestions": [
+                    {
+                        "id": subq.id,
+                        "order": subq.order,
+                        "context_text": subq.context_text,
+                        "image": subq.image.url if subq.image else None,
+                        "image_srcset": image_srcset(
+                            subq.image,
+                            subq.image_renditions,
+                        ),
+                        "options": [
+                            {
+                                "id": option.id,
+                                "label": option.label,
+                                "text": option.text,
+                                "is_correct": option.is_correct,
+                                "order": option.order,
+                            }
+                            for option in subq.options.all()
+                        ],
+                    }
+                    for subq in item.subquestions.all()
+                ],
+            }
+            for item in exam.items.all()
+        ],
+    }
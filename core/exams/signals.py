@@ -0,0 +1,164 @@
+"""
+Invalidación por versión de contenido.
+
+Cualquier alta, cambio o baja de un ``Item``, ``SubQuestion`` u ``Option``
+incrementa ``Exam.content_version``. Las cachés que dependen del contenido
+del examen incluyen esa versión en su llave, así que nunca hace falta
+borrarlas: basta con dejar de leerlas. El índice de búsqueda se actualiza
+al confirmar el mismo cambio.
+
+Los estadísticos clásicos se descartan al borrar una aplicación o un
+examinado; el borrado directo de respuestas lo cubre ``ResponseQuerySet``.
+"""
+
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import refresh_content_stamp
+from .models import Administration
+from .models import ClassicalStatistics
+from .models import Exam
+from .models import Examinee
+from .models import Item
+from .models import Option
+from .models import SubQuestion
+from .richtext import compile_fields
+from .scoring import forget_answer_key
+from .search import index_exam
+
+_batch = threading.local()
+
+
+def bump_content_version(exam_id):
+    """Incrementa la versión del examen y descarta la versión cacheada"""
+    pending = getattr(_batch, "exam_ids", None)
+    if pending is not None:
+        pending.add(exam_id)
+        return
+    Exam.objects.filter(pk=exam_id).update(
+        content_version=F("content_version") + 1,
+        updated_at=timezone.now(),
+    )
+    # Tras el commit, para que la caché reciba la versión confirmada
+    transaction.on_commit(lambda: _content_changed(exam_id))
+
+
+def _forget(exam_id):
+    refresh_content_stamp(exam_id)
+    # La clave compilada de otros procesos queda obsoleta al cambiar la
+    # versión; en este se libera de inmediato
+    forget_answer_key(exam_id)
+
+
+def _content_changed(exam_id):
+    _forget(exam_id)
+    # Solo se reescriben los documentos cuyo texto cambió
+    index_exam(exam_id)
+
+
+@contextmanager
+def batch_content_changes(*exam_ids):
+    """
+    Agrupa los cambios hechos dentro del bloque.
+
+    Las señales no consultan nada mientras el bloque está activo y al salir
+    se incrementa una sola vez la versión de cada examen afectado. Se usa en
+    las operaciones masivas (``bulk_create``/``bulk_update`` no emiten
+    señales) pasando los exámenes que modifican.
+    """
+    if getattr(_batch, "exam_ids", None) is not None:
+        _batch.exam_ids.update(exam_ids)
+        yield
+        return
+    _batch.exam_ids = set(exam_ids)
+    try:
+        yield
+        pending = _batch.exam_ids
+    finally:
+        _batch.exam_ids = None
+    for exam_id in pending:
+        bump_content_version(exam_id)
+
+
+def _exam_id_for(instance):
+    if isinstance(instance, Exam):
+        return instance.pk
+    if isinstance(instance, Item):
+        return instance.exam_id
+    if isinstance(instance, SubQuestion):
+        return instance.item.exam_id
+    return instance.subquestion.item.exam_id
+
+
+@receiver(post_save, sender=Exam)
+def exam_saved(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: index_exam(instance.pk))
+    else:
+        bump_content_version(instance.pk)
+
+
+@receiver(post_delete, sender=Exam)
+def exam_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: _forget(instance.pk))
+
+
+@receiver(post_delete, sender=Administration)
+def administration_deleted(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Exam):
+        return
+    # Las sumas de teoría clásica incluían a sus examinados: se recalculan
+    # la próxima vez que se lean
+    ClassicalStatistics.objects.filter(exam_id=instance.exam_id).delete()
+
+
+@receiver(post_delete, sender=Examinee)
+def examinee_deleted(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, (Exam, Administration)):
+        # Lo cubre la señal del examen o de la aplicación
+        return
+    ClassicalStatistics.objects.filter(
+        exam__administrations=instance.administration_id,
+    ).delete()
+
+
+@receiver(pre_save, sender=Item)
+@receiver(pre_save, sender=SubQuestion)
+def rich_text_saving(sender, instance, update_fields=None, **kwargs):
+    # Con update_fields, quien guarda la fuente debe incluir sus columnas
+    # compiladas (ver richtext.RICH_TEXT_FIELDS)
+    compile_fields(instance, update_fields)
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_save, sender=SubQuestion)
+@receiver(post_save, sender=Option)
+def content_saved(sender, instance, **kwargs):
+    if getattr(_batch, "exam_ids", None) is not None:
+        return
+    bump_content_version(_exam_id_for(instance))
+
+
+@receiver(post_delete, sender=Item)
+@receiver(post_delete, sender=SubQuestion)
+@receiver(post_delete, sender=Option)
+def content_deleted(sender, instance, origin=None, **kwargs):
+    if getattr(_batch, "exam_ids", None) is not None:
+        return
+    if isinstance(origin, Exam):
+        # El examen completo se está eliminando
+        return
+    cascaded = origin is not None and origin is not instance
+    if cascaded and not isinstance(origin, QuerySet):
+        # Borrado en cascada: la señal del objeto origen ya cubre este cambio
+        return
+    bump_content_version(_exam_id_for(instance))
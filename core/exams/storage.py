@@ -0,0 +1,102 @@
+"""
+Almacenamiento por contenido de las imágenes de ítems y subpreguntas.
+
+``ContentAddressedStorage`` envuelve el almacenamiento real (el sistema de
+archivos en desarrollo, S3 en producción) y guarda cada archivo con el
+nombre de su SHA-256: ``exams/blobs/ab/abcd….png``. Subir una imagen que ya
+existe no escribe nada y devuelve el archivo existente, así que los
+exámenes copiados, los importados y las imágenes repetidas comparten un
+solo archivo y, como el nombre nunca cambia de contenido, pueden servirse
+con caché inmutable.
+
+Cada archivo se registra en ``MediaBlob``; los que ya no usa ningún ítem ni
+subpregunta se recolectan con ``media.collect_unreferenced``. El modelo se
+resuelve en tiempo de ejecución: este módulo se carga al definir los campos
+de imagen, antes que los modelos.
+"""
+
+import hashlib
+from pathlib import PurePosixPath
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.core.files.storage import Storage
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+from django.utils.module_loading import import_string
+
+BLOB_PREFIX = "exams/blobs"
+
+
+@deconstructible
+class ContentAddressedStorage(Storage):
+    """
+    Guarda cada archivo una vez, nombrado por su SHA-256.
+
+    ``backend`` y ``options`` indican el almacenamiento real; sin
+    ``backend`` se usa ``FileSystemStorage`` sobre ``MEDIA_ROOT``. Los
+    archivos anteriores, con nombres comunes, se siguen leyendo igual.
+    """
+
+    def __init__(self, backend=None, options=None, prefix=BLOB_PREFIX):
+        backend_class = import_string(backend) if backend else FileSystemStorage
+        self.backend = backend_class(**(options or {}))
+        self.prefix = prefix
+
+    def blob_name(self, digest, extension):
+        return f"{self.prefix}/{digest[:2]}/{digest}{extension.lower()}"
+
+    def get_available_name(self, name, max_length=None):
+        # El nombre definitivo depende del contenido, no de colisiones
+        return name
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        media_blob = apps.get_model("exams", "MediaBlob")
+        blobs = media_blob.objects.filter(sha256=digest)
+        # Se marca el uso antes de leer: la recolección vuelve a comprobarlo
+        # con la fila bloqueada (ver media.py)
+        if blobs.update(used_at=timezone.now()):
+            existing = blobs.values_list("name", flat=True).first()
+            if existing is not None:
+                return existing
+        blob = self.blob_name(digest, PurePosixPath(name).suffix)
+        if not self.backend.exists(blob):
+            content.seek(0)
+            blob = self.backend.save(blob, content)
+        media_blob.objects.get_or_create(
+            sha256=digest,
+            defaults={"name": blob, "size": content.size or 0},
+        )
+        return blob
+
+    def _open(self, name, mode="rb"):
+        return self.backend.open(name, mode)
+
+    def delete(self, name):
+        """
+        No borra nada: los archivos son compartidos (copias, importaciones,
+        repetidos) y solo ``media.collect_unreferenced`` los borra, tras
+        comprobar con la fila bloqueada que nadie los usa.
+        """
+
+    def exists(self, name):
+        return self.backend.exists(name)
+
+    def listdir(self, path):
+        return self.backend.listdir(path)
+
+    def size(self, name):
+        return self.backend.size(name)
+
+    def url(self, name):
+        return self.backend.url(name)
+
+    def path(self, name):
+        return self.backend.path(name)
+
+    def get_modified_time(self, name):
+        return self.backend.get_modified_time(name)
@@ -0,0 +1,65 @@
+from factory import Faker
+from factory import Sequence
+from factory import SubFactory
+from factory.django import DjangoModelFactory
+
+from core.exams.models import Administration
+from core.exams.models import Exam
+from core.exams.models import Examinee
+from core.exams.models import Item
+from core.exams.models import Option
+from core.exams.models import SubQuestion
+from core.users.tests.factories import UserFactory
+
+
+class ExamFactory(DjangoModelFactory[Exam]):
+    name = Faker("sentence", nb_words=3)
+    created_by = SubFactory(UserFactory)
+
+    class Meta:
+        model = Exam
+
+
+class ItemFactory(DjangoModelFactory[Item]):
+    exam = SubFactory(ExamFactory)
+    code = Sequence(lambda n: f"EA{n:02d}")
+    order = Sequence(lambda n: n + 1)
+    instruction = Faker("sentence")
+
+    class Meta:
+        model = Item
+
+
+class SubQuestionFactory(DjangoModelFactory[SubQuestion]):
+    item = SubFactory(ItemFactory)
+    order = Sequence(lambda n: n + 1)
+    context_text = Faker("sentence")
+
+    class Meta:
+        model = SubQuestion
+
+
+class OptionFactory(DjangoModelFactory[Option]):
+    subquestion = SubFactory(SubQuestionFactory)
+    label = "a"
+    text = Faker("word")
+    order = Sequence(lambda n: n + 1)
+
+    class Meta:
+        model = Option
+
+
+class AdministrationFactory(DjangoModelFactory[Administration]):
+    exam = SubFactory(ExamFactory)
+    name = Faker("sentence", nb_words=2)
+
+    class Meta:
+        model = Administration
+
+
+class ExamineeFactory(DjangoModelFactory[Examinee]):
+    administration = SubFactory(AdministrationFactory)
+    code = Sequence(lambda n: f"ALU-{n:05d}")
+
+    class Meta:
+        model = Examinee
@@ -0,0 +1,113 @@
+from io import StringIO
+
+import numpy as np
+import pytest
+from django.core.management import call_command
+
+from core.exams.adaptive import ESTIMATOR_MLE
+from core.exams.adaptive import THETA_GRID
+from core.exams.adaptive import AdaptiveSession
+from core.exams.adaptive import ItemPool
+from core.exams.adaptive import get_item_pool
+from core.exams.adaptive import start_session
+from core.exams.models import Calibration
+from core.exams.models import ItemCalibration
+from core.exams.tests.factories import ExamFactory
+from core.exams.tests.factories import ItemFactory
+
+
+def _rasch_pool(n_items=400):
+    difficulties = np.linspace(-3, 3, n_items)
+    return ItemPool(np.arange(1, n_items + 1), difficulties[:, None])
+
+
+def test_information_table_matches_the_model():
+    pool = ItemPool([10, 20], [[0.5, np.nan], [-1.0, 1.0]])
+
+    p = 1 / (1 + np.exp(-(THETA_GRID - 0.5)))
+    np.testing.assert_allclose(pool.information[:, 0], p * (1 - p), atol=1e-6)
+    # Crédito parcial: dos pasos dan más información que uno
+    assert pool.information[:, 1].max() > pool.information[:, 0].max()
+    assert pool.max_scores.tolist() == [1, 2]
+
+
+def test_selects_the_most_informative_item():
+    pool = _rasch_pool()
+    session = AdaptiveSession(pool)
+
+    first = session.next_item()
+    # Con habilidad 0 el ítem más informativo es el de dificultad más cercana
+    assert abs(pool.steps[pool.position(first), 0]) == pytest.approx(
+        np.abs(pool.steps).min(),
+    )
+    session.record(first, 1)
+    assert session.theta > 0
+    second = session.next_item()
+    assert pool.steps[pool.position(second), 0] > 0
+    assert second != first
+
+
+def test_simulated_sessions_recover_ability():
+    pool = _rasch_pool()
+    rng = np.random.default_rng(0)
+    errors = []
+    for theta in (-1.5, 0.0, 1.5):
+        session = AdaptiveSession(pool, max_se=0.35, max_items=60)
+        while (item_id := session.next_item()) is not None:
+            b = pool.steps[pool.position(item_id), 0]
+            session.record(item_id, int(rng.random() < 1 / (1 + np.exp(b - theta))))
+        assert session.se <= 0.35  # noqa: PLR2004
+        errors.append(session.theta - theta)
+    assert np.abs(errors).max() < 1
+
+
+def test_mle_falls_back_to_eap_on_extreme_patterns():
+    pool = _rasch_pool(50)
+    responses = [(1, 1), (2, 1)]
+    eap = AdaptiveSession.resume(pool, responses)
+    mle = AdaptiveSession.resume(pool, responses, estimator=ESTIMATOR_MLE)
+    assert mle.theta == eap.theta
+
+    mixed = [*responses, (30, 0), (40, 1), (45, 0)]
+    mle = AdaptiveSession.resume(pool, mixed, estimator=ESTIMATOR_MLE)
+    assert mle.theta != AdaptiveSession.resume(pool, mixed).theta
+    with pytest.raises(ValueError, match="ya se aplicó"):
+        mle.record(30, 1)
+
+
+@pytest.mark.django_db
+def test_start_session_from_a_calibration(django_assert_num_queries):
+    exam = ExamFactory()
+    with pytest.raises(Calibration.DoesNotExist):
+        start_session(exam)
+    calibration = Calibration.objects.create(exam=exam)
+    items = [ItemFactory(exam=exam, order=n) for n in range(3)]
+    ItemCalibration.objects.bulk_create(
+        [
+            ItemCalibration(calibration=calibration, item=items[0], measure=-1),
+            ItemCalibration(
+                calibration=calibration,
+                item=items[1],
+                measure=0.5,
+                thresholds=[-0.4, 0.4],
+            ),
+            ItemCalibration(
+                calibration=calibration,
+                item=items[2],
+                measure=3,
+                is_extreme=True,
+            ),
+        ],
+    )
+
+    session = start_session(exam, [(items[0].pk, 1)])
+
+    assert session.pool.item_ids.tolist() == [items[0].pk, items[1].pk]
+    np.testing.assert_allclose(session.pool.steps[1], [0.1, 0.9])
+    assert session.next_item() == items[1].pk
+    with django_assert_num_queries(0):
+        get_item_pool(calibration.pk)
+
+    out = StringIO()
+    call_command("simulate_cat", exam.pk, examinees=5, stdout=out)
+    assert "2 ítems, 5 examinados" in out.getvalue()
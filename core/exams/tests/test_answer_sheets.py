@@ -0,0 +1,114 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+from PIL import Image
+from PIL import ImageDraw
+
+from core.exams.answer_sheets import scan_answer_sheets
+from core.exams.answer_sheets import sheet_layout
+from core.exams.blocks import mm
+from core.exams.models import Response
+from core.exams.omr import draw_sheet
+from core.exams.omr import read_sheet
+from core.exams.omr import sheet_geometry
+from core.exams.tests.factories import AdministrationFactory
+from core.exams.tests.factories import ExamFactory
+from core.exams.tests.factories import ItemFactory
+from core.exams.tests.factories import OptionFactory
+from core.exams.tests.factories import SubQuestionFactory
+
+pytestmark = pytest.mark.django_db
+
+DPI = 150
+
+
+@pytest.fixture
+def exam():
+    exam = ExamFactory()
+    for _ in range(2):
+        item = ItemFactory(exam=exam)
+        for _ in range(3):
+            subq = SubQuestionFactory(item=item)
+            for order, label in enumerate("ABCD"):
+                OptionFactory(subquestion=subq, label=label, order=order)
+    return exam
+
+
+def _filled(layout, code, choices):
+    """Hoja marcada a lápiz: ``choices`` son índices de opción o listas"""
+    page = draw_sheet(layout, DPI)
+    draw = ImageDraw.Draw(page)
+    geometry = sheet_geometry(layout)
+    radius = mm(1.8, DPI)
+
+    def mark(center):
+        x, y = mm(center[0], DPI), mm(center[1], DPI)
+        draw.ellipse([x - radius, y - radius, x + radius, y + radius], fill=40)
+
+    for column, digit in enumerate(code):
+        mark(geometry["id"][column][int(digit)])
+    for centers, choice in zip(geometry["answers"], choices, strict=True):
+        for index in choice if isinstance(choice, list) else [choice]:
+            if index is not None:
+                mark(centers[index])
+    return page
+
+
+def test_reads_a_skewed_scan(exam):
+    layout = sheet_layout(exam)
+    choices = [0, 1, None, 3, [0, 2], 2]
+    page = _filled(layout, "00012345", choices)
+    # Escaneo a otra resolución, desplazado y levemente girado
+    scan = page.rotate(1, fillcolor=255, translate=(12, -8)).resize((1000, 1414))
+
+    sheet = read_sheet(scan, layout)
+
+    assert sheet["error"] is None
+    assert sheet["code"] == "00012345"
+    assert sheet["answers"] == [0, 1, None, 3, None, 2]
+    assert sheet["ambiguous"] == [5]
+
+
+def test_sheet_of_another_exam_version_is_rejected(exam):
+    page = _filled(sheet_layout(exam), "00000001", [0] * 6)
+    OptionFactory(subquestion=exam.items.first().subquestions.first(), label="E")
+
+    sheet = read_sheet(page, sheet_layout(exam))
+
+    assert sheet["error"] == "La hoja es de otra versión del examen"
+
+
+def test_scan_ingests_responses(exam, tmp_path):
+    administration = AdministrationFactory(exam=exam)
+    layout = sheet_layout(exam)
+    _filled(layout, "00000007", [1] * 6).save(tmp_path / "a.png")
+    _filled(layout, "0000000", [1] * 6).save(tmp_path / "b.png")
+    Image.new("L", (800, 1100), 255).save(tmp_path / "blanca.png")
+
+    summary = scan_answer_sheets(
+        administration,
+        sorted(tmp_path.iterdir()),
+        workers=0,
+    )
+
+    assert summary.read == 1
+    assert summary.created == len(layout["questions"])
+    assert [error for _, error in summary.rejected] == [
+        "Folio ilegible",
+        "No se encontraron las marcas de registro",
+    ]
+    labels = Response.objects.filter(examinee__code="00000007").values_list(
+        "option__label",
+        flat=True,
+    )
+    assert set(labels) == {"B"}
+
+
+def test_answer_sheet_view_returns_pdf(client, user, exam):
+    client.force_login(user)
+
+    response = client.get(reverse("exams:answer-sheet", kwargs={"pk": exam.pk}))
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.content.startswith(b"%PDF")
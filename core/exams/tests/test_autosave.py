@@ -0,0 +1,187 @@
+import json
+from http import HTTPStatus
+from typing import Any
+
+import pytest
+from django.urls import reverse
+
+from core.exams import autosave
+from core.exams.autosave import BufferBusyError
+from core.exams.autosave import MemoryBuffer
+from core.exams.autosave import RedisStreamBuffer
+from core.exams.autosave import flush
+from core.exams.autosave import flush_all
+from core.exams.autosave import last_seen
+from core.exams.autosave import record_answers
+from core.exams.models import Response
+from core.exams.tests.factories import AdministrationFactory
+from core.exams.tests.factories import OptionFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def buffer(monkeypatch):
+    buffer = MemoryBuffer()
+    monkeypatch.setattr(autosave, "_buffer", buffer)
+    return buffer
+
+
+@pytest.fixture
+def options():
+    first = OptionFactory(label="A")
+    return first, OptionFactory(subquestion=first.subquestion, label="B")
+
+
+@pytest.fixture
+def administration(options):
+    return AdministrationFactory(exam=options[0].subquestion.item.exam)
+
+
+def test_only_the_last_change_is_written(administration, options):
+    first, second = options
+    subq = first.subquestion_id
+    for option in (first, second, None, first):
+        record_answers(administration.pk, "ALU-1", [(subq, option and option.pk)])
+    record_answers(administration.pk, "ALU-2", [(subq, second.pk)])
+
+    assert Response.objects.count() == 0
+    created = flush_all()
+    latest = dict(Response.objects.values_list("examinee__code", "option_id"))
+    assert latest == {"ALU-1": first.pk, "ALU-2": second.pk}
+    assert created == len(latest)
+    assert flush(administration.pk) == (0, [])
+
+
+def test_failed_flush_keeps_the_events(administration, options, buffer, monkeypatch):
+    first, second = options
+    record_answers(administration.pk, "ALU-1", [(first.subquestion_id, first.pk)])
+
+    def fail(*args):
+        raise RuntimeError
+
+    monkeypatch.setattr(autosave, "ingest_responses", fail)
+    with pytest.raises(RuntimeError):
+        flush(administration.pk)
+    monkeypatch.undo()
+    monkeypatch.setattr(autosave, "_buffer", buffer)
+    # Un cambio llegado después del fallo no se pisa con el valor viejo
+    record_answers(administration.pk, "ALU-1", [(first.subquestion_id, second.pk)])
+
+    assert flush(administration.pk)[0] == 1
+    assert Response.objects.get().option_id == second.pk
+
+
+def test_invalid_rows_do_not_block_the_flush(administration, options):
+    first, _ = options
+    record_answers(administration.pk, "A" * 51, [(first.subquestion_id, first.pk)])
+    record_answers(administration.pk, "ALU-1", [(first.subquestion_id, first.pk)])
+
+    created, errors = flush(administration.pk)
+
+    assert created == 1
+    assert len(errors) == 1
+    assert flush(administration.pk) == (0, [])
+
+
+@pytest.fixture
+def redis_buffer(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    buffer = RedisStreamBuffer(client=fakeredis.FakeRedis(decode_responses=True))
+    monkeypatch.setattr(autosave, "_buffer", buffer)
+    monkeypatch.setattr(autosave, "AUTOSAVE_FLUSH_SIZE", 3)
+    return buffer
+
+
+def test_redis_buffer_submit_drains_past_its_own_events(
+    administration,
+    options,
+    redis_buffer,
+    monkeypatch,
+):
+    first, second = options
+    subq = first.subquestion_id
+    for n in range(5):
+        record_answers(administration.pk, f"ALU-{n}", [(subq, first.pk)])
+    record_answers(administration.pk, "ALU-0", [(subq, second.pk)])
+
+    # Un vaciado periódico lee solo los eventos más antiguos
+    assert flush(administration.pk)[0] == 3  # noqa: PLR2004
+    assert redis_buffer.pending() == [administration.pk]
+
+    record_answers(administration.pk, "ALU-9", [(subq, None)])
+    created, errors = flush(administration.pk, complete=True)
+
+    assert (created, errors) == (4, [])
+    assert redis_buffer.pending() == []
+    latest = dict(Response.objects.values_list("examinee__code", "option_id"))
+    assert latest["ALU-0"] == second.pk
+    assert latest["ALU-9"] is None
+    assert len(latest) == 6  # noqa: PLR2004
+
+    # Con el stream ocupado por otro vaciado no se espera sin límite
+    monkeypatch.setattr(autosave, "LOCK_WAIT", 0.1)
+    record_answers(administration.pk, "ALU-9", [(subq, first.pk)])
+    stream = redis_buffer._stream(administration.pk)  # noqa: SLF001
+    with redis_buffer.client.lock(f"{stream}:lock"), pytest.raises(BufferBusyError):
+        flush(administration.pk, complete=True)
+    assert flush(administration.pk, complete=True) == (1, [])
+
+
+def test_autosave_and_submit(client, user, administration, options):
+    client.force_login(user)
+    first, second = options
+    body: dict[str, Any] = {
+        "examinee": "ALU-9",
+        "answers": [{"subquestion": first.subquestion_id, "option": first.pk}],
+    }
+
+    saved = client.post(
+        reverse("exams:api-autosave", args=[administration.pk]),
+        json.dumps(body),
+        content_type="application/json",
+    )
+    body["answers"][0]["option"] = second.pk
+    submitted = client.post(
+        reverse("exams:api-submit", args=[administration.pk]),
+        json.dumps(body),
+        content_type="application/json",
+    )
+
+    assert saved.json() == {"success": True, "buffered": 1}
+    assert submitted.json() == {"success": True, "created": 1, "errors": []}
+    assert Response.objects.get(examinee__code="ALU-9").option_id == second.pk
+
+    administration.is_open = False
+    administration.save()
+    closed = client.post(
+        reverse("exams:api-autosave", args=[administration.pk]),
+        json.dumps(body),
+        content_type="application/json",
+    )
+    assert closed.json()["errors"] == ["La aplicación está cerrada"]
+
+    administration.is_open = True
+    administration.save()
+    long_code = client.post(
+        reverse("exams:api-submit", args=[administration.pk]),
+        json.dumps({**body, "examinee": "A" * 51}),
+        content_type="application/json",
+    )
+    assert long_code.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_heartbeat(client, user, administration):
+    client.force_login(user)
+    url = reverse("exams:api-heartbeat", args=[administration.pk])
+
+    beat = client.post(url, json.dumps({"examinee": "ALU-1"}), "application/json")
+
+    assert beat.json() == {"success": True, "open": True}
+    assert set(last_seen(administration.pk, ["ALU-1", "ALU-2"])) == {"ALU-1"}
+
+    administration.is_open = False
+    administration.save()
+    beat = client.post(url, json.dumps({"examinee": "ALU-2"}), "application/json")
+    assert beat.json() == {"success": True, "open": False}
+    assert set(last_seen(administration.pk, ["ALU-1", "ALU-2"])) == {"ALU-1"}
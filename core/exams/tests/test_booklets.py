@@ -0,0 +1,100 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.files.storage import InMemoryStorage
+from django.urls import reverse
+
+from core.exams.blocks import font
+from core.exams.blocks import wrap
+from core.exams.booklets import booklet_style
+from core.exams.booklets import item_blocks
+from core.exams.booklets import paginate
+from core.exams.booklets import render_blocks
+from core.exams.tests.factories import ExamFactory
+from core.exams.tests.factories import ItemFactory
+from core.exams.tests.factories import OptionFactory
+from core.exams.tests.factories import SubQuestionFactory
+
+pytestmark = pytest.mark.django_db
+
+
+class MeasuredFace:
+    """Fuente que cuenta cuántos caracteres se midieron"""
+
+    def __init__(self, face):
+        self.face = face
+        self.measured = 0
+
+    def getlength(self, text):
+        self.measured += len(text)
+        return self.face.getlength(text)
+
+
+@pytest.fixture
+def exam():
+    exam = ExamFactory(name="Comprensión lectora")
+    for number in range(3):
+        item = ItemFactory(exam=exam, code=f"EA0{number}", order=number)
+        subq = SubQuestionFactory(item=item, context_text="<p>¿Qué dice?</p>")
+        for label in "ABC":
+            OptionFactory(subquestion=subq, label=label, text=f"Opción {label}")
+    return exam
+
+
+def test_item_blocks_follow_exam_order(exam, django_assert_num_queries):
+    with django_assert_num_queries(3):
+        blocks = item_blocks(exam.pk)
+
+    assert [block["code"] for block in blocks] == ["EA00", "EA01", "EA02"]
+    subq = blocks[0]["subquestions"][0]
+    assert subq["context"] == "¿Qué dice?"
+    assert [option["label"] for option in subq["options"]] == ["A", "B", "C"]
+
+
+def test_only_changed_blocks_are_redrawn(exam):
+    storage = InMemoryStorage()
+    style = booklet_style()
+
+    pngs, rendered = render_blocks(item_blocks(exam.pk), style, 0, storage)
+    assert rendered == len(pngs) == exam.items.count()
+    assert all(png.startswith(b"\x89PNG") for png in pngs)
+
+    item = exam.items.get(code="EA01")
+    item.instruction = "<p>Lee el texto</p>"
+    item.save()
+    again, rendered = render_blocks(item_blocks(exam.pk), style, 0, storage)
+
+    assert rendered == 1
+    assert again[0] == pngs[0]
+    assert again[1] != pngs[1]
+
+
+def test_blocks_are_paginated_without_splitting(exam):
+    style = booklet_style()
+    pngs, _ = render_blocks(item_blocks(exam.pk), style, 0, InMemoryStorage())
+
+    assert len(paginate(pngs, style, exam.name)) == 1
+    assert len(paginate(pngs * 12, style, exam.name)) > 1
+
+
+def test_booklet_view_returns_pdf(client, user, exam):
+    client.force_login(user)
+
+    response = client.get(reverse("exams:booklet", kwargs={"pk": exam.pk}))
+
+    assert response.status_code == HTTPStatus.OK
+    assert response["Content-Type"] == "application/pdf"
+    assert response.content.startswith(b"%PDF")
+
+
+def test_long_words_are_split_in_linear_time():
+    face = MeasuredFace(font(None, 40))
+    word = "https://ejemplo.mx/" + "aB3+/" * 400
+
+    lines = wrap(f"Ver {word}", face, 600)
+
+    assert lines[0] == "Ver"
+    assert "".join(lines[1:]) == word
+    assert max(face.face.getlength(line) for line in lines) <= 600  # noqa: PLR2004
+    # Cortar carácter por carácter medía del orden de largo² caracteres
+    assert face.measured < 10 * len(word)
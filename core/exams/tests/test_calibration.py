@@ -0,0 +1,97 @@
+import pytest
+from django.core.management import call_command
+
+from core.exams.calibration import calibrate_exam
+from core.exams.models import Calibration
+from core.exams.models import Examinee
+from core.exams.models import Item
+from core.exams.models import PersonMeasure
+from core.exams.models import Response
+from core.exams.tests.factories import AdministrationFactory
+from core.exams.tests.factories import ExamFactory
+from core.exams.tests.factories import ExamineeFactory
+from core.exams.tests.factories import ItemFactory
+from core.exams.tests.factories import OptionFactory
+from core.exams.tests.factories import SubQuestionFactory
+
+pytestmark = pytest.mark.django_db
+
+N_ITEMS = 4
+N_PERSONS = 20
+
+
+@pytest.fixture
+def exam():
+    exam = ExamFactory()
+    administration = AdministrationFactory(exam=exam)
+    subquestions = []
+    for order in range(N_ITEMS):
+        subq = SubQuestionFactory(item=ItemFactory(exam=exam, order=order))
+        right = OptionFactory(subquestion=subq, is_correct=True)
+        wrong = OptionFactory(subquestion=subq)
+        subquestions.append((subq, right, wrong))
+    # Patrón de Guttman con ruido: cada examinado acierta los primeros n ítems
+    responses = []
+    for person in range(N_PERSONS):
+        examinee = ExamineeFactory(administration=administration)
+        n_right = person % 5
+        for index, (subq, right, wrong) in enumerate(subquestions):
+            correct = index < n_right if person % 3 else index >= N_ITEMS - n_right
+            responses.append(
+                Response(
+                    examinee=examinee,
+                    subquestion=subq,
+                    option=right if correct else wrong,
+                ),
+            )
+    Response.objects.bulk_create(responses)
+    return exam
+
+
+def test_calibrate_exam(exam):
+    calibration = calibrate_exam(exam)
+
+    assert calibration.n_items == N_ITEMS
+    assert calibration.n_persons == N_PERSONS
+    assert calibration.item_measures.count() == N_ITEMS
+    measures = PersonMeasure.objects.filter(calibration=calibration)
+    assert measures.count() == N_PERSONS
+    assert measures.filter(raw_score=0, is_extreme=True).exists()
+
+
+def test_polytomous_exam_uses_partial_credit(exam):
+    item = ItemFactory(exam=exam, order=10, scoring_type=Item.SCORING_POLYTOMOUS)
+    subquestions = []
+    for _ in range(3):
+        subq = SubQuestionFactory(item=item)
+        subquestions.append(
+            (
+                subq,
+                OptionFactory(subquestion=subq, is_correct=True),
+                OptionFactory(subquestion=subq),
+            ),
+        )
+    Response.objects.bulk_create(
+        Response(
+            examinee=examinee,
+            subquestion=subq,
+            option=right if index < n % 4 else wrong,
+        )
+        for n, examinee in enumerate(Examinee.objects.filter(administration__exam=exam))
+        for index, (subq, right, wrong) in enumerate(subquestions)
+    )
+
+    first = calibrate_exam(exam)
+    second = calibrate_exam(exam)
+
+    assert first.model == Calibration.MODEL_PARTIAL_CREDIT
+    assert first.n_items == 5  # noqa: PLR2004
+    assert first.warm_start is None
+    assert len(first.item_measures.get(item=item).thresholds) == 2  # noqa: PLR2004
+    assert second.warm_start == first
+    assert second.iterations <= first.iterations
+
+
+def test_command(exam, capsys):
+    call_command("calibrate_exam", exam.pk)
+    assert "4 ítems" in capsys.readouterr().out
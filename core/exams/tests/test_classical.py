@@ -0,0 +1,183 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from django.urls import reverse
+
+from core.exams.calibration import load_score_matrix
+from core.exams.classical import get_classical_statistics
+from core.exams.classical import sufficient_statistics
+from core.exams.classical import summarize
+from core.exams.ingestion import ingest_responses
+from core.exams.models import ClassicalStatistics
+from core.exams.models import Examinee
+from core.exams.models import Item
+from core.exams.models import Response
+from core.exams.models import SubQuestion
+from core.exams.scoring import get_answer_key
+from core.exams.tests.factories import AdministrationFactory
+from core.exams.tests.factories import ExamFactory
+from core.exams.tests.factories import ItemFactory
+from core.exams.tests.factories import OptionFactory
+from core.exams.tests.factories import SubQuestionFactory
+
+
+def _alpha(x):
+    k = x.shape[1]
+    return k / (k - 1) * (1 - x.var(axis=0).sum() / x.sum(axis=1).var())
+
+
+def test_summary_matches_the_full_matrix():
+    rng = np.random.default_rng(0)
+    theta = rng.normal(0, 1, 300)
+    b = np.linspace(-1.5, 1.5, 6)
+    scores = (rng.random((300, 6)) < 1 / (1 + np.exp(b - theta[:, None]))).astype(
+        np.int8,
+    )
+    scores[:, 5] += scores[:, 4]
+    scores[0] = -1  # sin respuestas: no cuenta
+    scores[1, 2] = -1  # ítem sin responder: cuenta como 0
+    key = SimpleNamespace(
+        n_items=6,
+        item_ids=np.arange(1, 7),
+        item_codes=[f"I{n}" for n in range(1, 7)],
+        max_scores=np.array([1, 1, 1, 1, 1, 2]),
+        polytomous=np.array([False] * 5 + [True]),
+    )
+
+    stats = summarize(sufficient_statistics(scores), key)
+
+    x = np.maximum(scores[1:], 0).astype(float)
+    total = x.sum(axis=1)
+    assert stats.n_persons == 299  # noqa: PLR2004
+    assert stats.alpha == pytest.approx(_alpha(x))
+    assert stats.kr20 is None
+    for n, item in enumerate(stats.items):
+        rest = total - x[:, n]
+        assert item.p_value == pytest.approx(x[:, n].mean() / key.max_scores[n])
+        assert item.point_biserial == pytest.approx(np.corrcoef(x[:, n], rest)[0, 1])
+        assert item.alpha_if_deleted == pytest.approx(_alpha(np.delete(x, n, 1)))
+
+
+@pytest.fixture
+def exam():
+    exam = ExamFactory()
+    for order in range(3):
+        subq = SubQuestionFactory(item=ItemFactory(exam=exam, order=order))
+        OptionFactory(subquestion=subq, label="A", is_correct=True)
+        OptionFactory(subquestion=subq, label="B")
+    item = ItemFactory(exam=exam, order=3, scoring_type=Item.SCORING_POLYTOMOUS)
+    for _ in range(2):
+        subq = SubQuestionFactory(item=item)
+        OptionFactory(subquestion=subq, label="A", is_correct=True)
+        OptionFactory(subquestion=subq, label="B")
+    return exam
+
+
+def _batch(exam, rng, codes):
+    rows = []
+    subquestions = _subquestions(exam)
+    for code in codes:
+        for subq_id, options in subquestions:
+            if rng.random() < 0.9:  # noqa: PLR2004
+                rows.append(
+                    {
+                        "examinee": code,
+                        "subquestion": subq_id,
+                        "option": options[rng.integers(len(options))],
+                    },
+                )
+    return rows
+
+
+def _subquestions(exam):
+    """``[(subpregunta, [opciones])]`` en el orden de la clave"""
+    key = get_answer_key(exam.pk)
+    options = {}
+    for subq_id, option_id in (
+        SubQuestion.objects.filter(item__exam=exam)
+        .values_list("id", "options__id")
+        .order_by("id", "options__id")
+    ):
+        options.setdefault(subq_id, []).append(option_id)
+    return [(pk, options[pk]) for pk in key.subquestion_ids.tolist()]
+
+
+@pytest.mark.django_db
+def test_ingestion_keeps_the_sums_up_to_date(exam, django_assert_num_queries):
+    administration = AdministrationFactory(exam=exam)
+    assert get_classical_statistics(exam.pk).n_persons == 0
+    rng = np.random.default_rng(1)
+
+    # Lotes con examinados nuevos y con cambios de respuesta de los mismos
+    for start in (0, 20, 10):
+        codes = [f"ALU-{n}" for n in range(start, start + 20)]
+        ingest_responses(administration, _batch(exam, rng, codes))
+
+    key = get_answer_key(exam.pk)
+    _, scores = load_score_matrix(
+        key,
+        Examinee.objects.filter(administration__exam=exam),
+    )
+    with django_assert_num_queries(1):
+        streamed = get_classical_statistics(exam.pk)
+    assert streamed == summarize(sufficient_statistics(scores), key)
+    assert streamed.n_persons == 40  # noqa: PLR2004
+
+
+@pytest.mark.django_db
+def test_rebuilt_after_content_changes(
+    exam,
+    client,
+    user,
+    django_capture_on_commit_callbacks,
+):
+    administration = AdministrationFactory(exam=exam)
+    rows = _batch(exam, np.random.default_rng(2), ["ALU-1", "ALU-2", "ALU-3"])
+    ingest_responses(administration, rows)
+    before = get_classical_statistics(exam.pk)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ItemFactory(exam=exam, order=10)
+    client.force_login(user)
+    response = client.get(reverse("exams:api-exam-statistics", args=[exam.pk]))
+
+    statistics = response.json()["statistics"]
+    assert len(statistics["items"]) == len(before.items) + 1
+    assert statistics["n_persons"] == before.n_persons
+    exam.refresh_from_db()
+    assert ClassicalStatistics.objects.get(exam=exam).content_version == (
+        exam.content_version
+    )
+
+    administration.delete()
+    assert not ClassicalStatistics.objects.filter(exam=exam).exists()
+
+
+@pytest.mark.django_db
+def test_recomputed_after_responses_are_deleted(exam):
+    administration = AdministrationFactory(exam=exam)
+    codes = [f"ALU-{n}" for n in range(10)]
+    ingest_responses(administration, _batch(exam, np.random.default_rng(3), codes))
+    key = get_answer_key(exam.pk)
+    get_classical_statistics(exam.pk)
+
+    def expected():
+        _, scores = load_score_matrix(
+            key,
+            Examinee.objects.filter(administration__exam=exam),
+        )
+        return summarize(sufficient_statistics(scores), key)
+
+    first, second, third = Examinee.objects.filter(administration=administration)[:3]
+    subquestion_id = key.subquestion_ids[0]
+    Response.objects.filter(examinee=first, subquestion_id=subquestion_id).delete()
+    assert get_classical_statistics(exam.pk) == expected()
+
+    second.responses.latest("id").delete()
+    assert get_classical_statistics(exam.pk) == expected()
+
+    third.delete()
+    statistics = get_classical_statistics(exam.pk)
+    assert statistics == expected()
+    assert statistics.n_persons == len(codes) - 1
@@ -0,0 +1,106 @@
+import gzip
+import json
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from core.exams import delivery
+from core.exams.cache import fragment_key
+from core.exams.cache import get_content_version
+from core.exams.delivery import build_payload
+from core.exams.delivery import forget_payload
+from core.exams.delivery import get_payload
+from core.exams.tests.factories import OptionFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def option():
+    return OptionFactory(label="A", text="Cuatro", is_correct=True)
+
+
+def test_payload_is_built_once_per_version(
+    option,
+    django_assert_num_queries,
+    django_capture_on_commit_callbacks,
+):
+    exam = option.subquestion.item.exam
+    exam.refresh_from_db()
+    payload = get_payload(exam.pk)
+    content = json.loads(payload.bodies["identity"])
+
+    assert content["content_version"] == exam.content_version
+    assert content["items"][0]["subquestions"][0]["options"] == [
+        {"id": option.pk, "label": "A", "text": "Cuatro"},
+    ]
+    assert "is_correct" not in payload.bodies["identity"].decode()
+    assert gzip.decompress(payload.bodies["gzip"]) == payload.bodies["identity"]
+
+    # Otro proceso la toma de la caché compartida
+    forget_payload()
+    with django_assert_num_queries(0):
+        assert get_payload(exam.pk) == payload
+
+    option.text = "Cinco"
+    with django_capture_on_commit_callbacks(execute=True):
+        option.save()
+    changed = get_payload(exam.pk)
+    assert changed.version > payload.version
+    assert "Cinco" in changed.bodies["identity"].decode()
+
+
+@pytest.mark.parametrize(
+    ("accept", "coding"),
+    [("gzip, deflate", "gzip"), ("gzip;q=0, identity", "identity"), ("", "identity")],
+)
+def test_encoding_follows_accept_encoding(option, accept, coding):
+    payload = get_payload(option.subquestion.item.exam_id)
+
+    assert payload.encode(accept) == (coding, payload.bodies[coding])
+
+
+def test_delivery_view_serves_compressed_payload(client, user, option):
+    client.force_login(user)
+    url = reverse("exams:api-exam-delivery", args=[option.subquestion.item.exam_id])
+
+    response = client.get(url, headers={"accept-encoding": "gzip"})
+    cached = client.get(url, headers={"if-none-match": response["ETag"]})
+
+    assert response["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response["Vary"]
+    assert json.loads(gzip.decompress(response.content))["items"]
+    assert response["ETag"].startswith('W/"')
+    assert cached.status_code == HTTPStatus.NOT_MODIFIED
+    assert client.get(reverse("exams:api-exam-delivery", args=[0])).status_code == (
+        HTTPStatus.NOT_FOUND
+    )
+
+
+def test_concurrent_builds_wait_for_the_first(option, monkeypatch):
+    exam_id = option.subquestion.item.exam_id
+    key = fragment_key("delivery", exam_id, get_content_version(exam_id))
+    built = build_payload(option.subquestion.item.exam)
+    # Otro proceso tiene el candado y publica el contenido mientras se espera
+    cache.add(f"{key}:building", 1)
+    monkeypatch.setattr(
+        delivery.time,
+        "sleep",
+        lambda _: cache.set(key, tuple(built)),
+    )
+
+    assert get_payload(exam_id) == built
+
+
+def test_build_goes_ahead_when_the_lock_holder_stalls(option, monkeypatch):
+    exam_id = option.subquestion.item.exam_id
+    key = fragment_key("delivery", exam_id, get_content_version(exam_id))
+    cache.add(f"{key}:building", 1)
+    monkeypatch.setattr(delivery, "BUILD_WAIT", 0)
+
+    payload = get_payload(exam_id)
+
+    assert payload.version == get_content_version(exam_id)
+    assert cache.get(key) == tuple(payload)
@@ -0,0 +1,147 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+import redis
+
+from core.exams import exposure
+from core.exams.adaptive import AdaptiveSession
+from core.exams.adaptive import ItemPool
+from core.exams.exposure import ExposureControl
+from core.exams.exposure import MemoryCounters
+
+MAX_RATE = 0.25
+
+
+class CountingCounters(MemoryCounters):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def add_and_read(self, calibration_id, increments):
+        self.calls += 1
+        return super().add_and_read(calibration_id, increments)
+
+
+@pytest.fixture(autouse=True)
+def counters(monkeypatch):
+    counters = CountingCounters()
+    monkeypatch.setattr(exposure, "_counters", counters)
+    return counters
+
+
+def _pool(control=None):
+    pool = ItemPool(np.arange(1, 201), np.linspace(-3, 3, 200)[:, None], 1)
+    pool.exposure = control and control(pool)
+    return pool
+
+
+def _administer(pool, sessions, seed=0):
+    """Veces que se aplicó cada ítem en sesiones simuladas de 10 ítems"""
+    rng = np.random.default_rng(seed)
+    seen = Counter()
+    for theta in rng.normal(0, 1, sessions):
+        session = AdaptiveSession(pool, max_se=0, max_items=10)
+        while (item_id := session.next_item()) is not None:
+            seen[item_id] += 1
+            b = pool.steps[pool.position(item_id), 0]
+            session.record(item_id, int(rng.random() < 1 / (1 + np.exp(b - theta))))
+    return seen
+
+
+def test_limits_the_exposure_of_the_most_informative_items():
+    free = _administer(_pool(), 100)
+    assert max(free.values()) == 100  # noqa: PLR2004
+
+    pool = _pool(
+        lambda pool: ExposureControl(pool, max_rate=MAX_RATE, snapshot_ttl=0, seed=0),
+    )
+    _administer(pool, 200, seed=1)
+    controlled = _administer(pool, 400, seed=2)
+
+    # Los contadores acumulan desde el inicio: la tasa converge con retraso
+    assert max(controlled.values()) / 400 < MAX_RATE + 0.1
+    assert pool.exposure.sessions == 600  # noqa: PLR2004
+    assert pool.exposure.exposure_rates().max() < 1
+
+
+def test_counters_are_sent_in_batches(counters):
+    pool = _pool(
+        lambda pool: ExposureControl(pool, snapshot_ttl=60, flush_size=25, seed=0),
+    )
+
+    _administer(pool, 4)
+
+    # Una lectura inicial y un envío a los 25 eventos; nada por candidato
+    assert counters.calls == 2  # noqa: PLR2004
+    assert pool.exposure.sessions == 3  # noqa: PLR2004
+    pool.exposure.flush()
+    assert pool.exposure.sessions == 4  # noqa: PLR2004
+    assert pool.exposure.administered.sum() == 40  # noqa: PLR2004
+
+
+def test_resumed_sessions_keep_their_rejected_items():
+    pool = _pool(
+        lambda pool: ExposureControl(pool, max_rate=MAX_RATE, snapshot_ttl=0, seed=0),
+    )
+    _administer(pool, 200)
+    session = AdaptiveSession(pool, max_se=0, max_items=10)
+    responses = []
+    for score in (1, 0, 1):
+        item_id = session.next_item()
+        session.record(item_id, score)
+        responses.append((item_id, score))
+    assert session.rejected_ids
+
+    resumed = AdaptiveSession.resume(
+        pool,
+        responses,
+        rejected=session.rejected_ids,
+        max_se=0,
+        max_items=10,
+    )
+
+    assert resumed.rejected_ids == session.rejected_ids
+    assert resumed.next_item() not in session.rejected_ids
+
+
+class FlakyCounters(MemoryCounters):
+    def __init__(self):
+        super().__init__()
+        self.control: ExposureControl
+        self.failing = False
+
+    def add_and_read(self, calibration_id, increments):
+        # La red se usa sin el candado del worker
+        assert not self.control._lock.locked()  # noqa: SLF001
+        if self.failing:
+            msg = "sin conexión"
+            raise redis.ConnectionError(msg)
+        return super().add_and_read(calibration_id, increments)
+
+
+def test_counter_failures_keep_the_last_snapshot():
+    counters = FlakyCounters()
+    pool = _pool(
+        lambda pool: ExposureControl(
+            pool,
+            counters=counters,
+            max_rate=MAX_RATE,
+            snapshot_ttl=0,
+            seed=0,
+        ),
+    )
+    counters.control = pool.exposure
+    _administer(pool, 100)
+    acceptance = pool.exposure.acceptance.copy()
+    assert (acceptance < 1).any()
+
+    counters.failing = True
+    _administer(pool, 5)
+
+    np.testing.assert_array_equal(pool.exposure.acceptance, acceptance)
+    assert pool.exposure.sessions == 100  # noqa: PLR2004
+    # Los incrementos no enviados se reenvían al volver los contadores
+    counters.failing = False
+    pool.exposure.flush()
+    assert pool.exposure.sessions == 105  # noqa: PLR2004
@@ -0,0 +1,125 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from core.exams.ingestion import ingest_responses
+from core.exams.models import Exam
+from core.exams.models import Examinee
+from core.exams.models import Response
+from core.exams.tests.factories import AdministrationFactory
+from core.exams.tests.factories import ExamineeFactory
+from core.exams.tests.factories import OptionFactory
+from core.exams.tests.factories import SubQuestionFactory
+
+pytestmark = pytest.mark.django_db
+
+ROWS = 300
+
+
+@pytest.fixture
+def option():
+    return OptionFactory()
+
+
+@pytest.fixture
+def administration(option):
+    return AdministrationFactory(exam=option.subquestion.item.exam)
+
+
+def test_ingest_creates_examinees_and_responses(
+    administration,
+    option,
+    django_assert_max_num_queries,
+):
+    ExamineeFactory(administration=administration, code="ALU-1")
+    rows = [
+        {
+            "examinee": f"ALU-{n}",
+            "subquestion": option.subquestion_id,
+            "option": option.pk,
+        }
+        for n in range(1, ROWS + 1)
+    ]
+
+    # Incluye la consulta de los estadísticos clásicos (ver classical.py)
+    with django_assert_max_num_queries(11):
+        created, errors = ingest_responses(administration, rows, batch_size=100)
+
+    assert created == ROWS
+    assert errors == []
+    assert Examinee.objects.filter(administration=administration).count() == ROWS
+    assert (
+        Response.objects.filter(examinee__administration=administration).count() == ROWS
+    )
+
+
+def test_invalid_rows_are_reported(administration, option):
+    foreign = SubQuestionFactory()
+    rows = [
+        {"examinee": "A", "subquestion": option.subquestion_id, "option": None},
+        {"examinee": "", "subquestion": option.subquestion_id},
+        {"examinee": "A", "subquestion": foreign.pk},
+        {"examinee": "A", "subquestion": option.subquestion_id, "option": 0},
+        "basura",
+        {"examinee": "A", "subquestion": [option.subquestion_id]},
+        {"examinee": "A", "subquestion": option.subquestion_id, "option": {}},
+        {"examinee": "A" * 51, "subquestion": option.subquestion_id},
+    ]
+
+    created, errors = ingest_responses(administration, rows)
+
+    assert created == 1
+    assert [e["index"] for e in errors] == [1, 2, 3, 4, 5, 6, 7]
+
+
+def test_api(client, user, administration, option):
+    client.force_login(user)
+    url = reverse("exams:api-response-ingest", kwargs={"pk": administration.pk})
+    payload = {
+        "responses": [
+            {
+                "examinee": "A",
+                "subquestion": option.subquestion_id,
+                "option": option.pk,
+            },
+        ],
+    }
+
+    response = client.post(
+        url,
+        data=json.dumps(payload),
+        content_type="application/json",
+    )
+    assert response.json() == {"success": True, "created": 1, "errors": []}
+
+    administration.is_open = False
+    administration.save()
+    response = client.post(
+        url,
+        data=json.dumps(payload),
+        content_type="application/json",
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_answered_rows_are_kept_until_the_exam_is_deleted(
+    client,
+    user,
+    administration,
+    option,
+):
+    rows = [{"examinee": "A", "subquestion": option.subquestion_id, "option": None}]
+    ingest_responses(administration, rows)
+    client.force_login(user)
+
+    url = reverse("exams:api-subq-delete", kwargs={"pk": option.subquestion_id})
+    response = client.delete(url)
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert Response.objects.filter(subquestion=option.subquestion_id).exists()
+    exam = administration.exam
+    exam.delete()
+    assert not Exam.objects.filter(pk=exam.pk).exists()
+    assert not Response.objects.exists()
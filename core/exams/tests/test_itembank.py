@@ -0,0 +1,148 @@
+import io
+import json
+from http import HTTPStatus
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+from openpyxl import Workbook
+
+from core.exams.itembank import READERS
+from core.exams.itembank import import_item_bank
+from core.exams.models import Item
+from core.exams.models import Option
+from core.exams.ordering import ORDER_GAP
+from core.exams.tests.factories import ExamFactory
+from core.exams.tests.factories import ItemFactory
+
+pytestmark = pytest.mark.django_db
+
+HEADER = "code,scoring_type,instruction,subquestion,label,text,is_correct\n"
+CSV = (
+    HEADER
+    + "EA01,D,Marca la palabra,1,a,casa,1\n"
+    + "EA01,D,Marca la palabra,1,b,cosa,0\n"
+    + "EA02,P,Completa,1,a,uno,sí\n"
+    + "EA02,P,Completa,1,b,dos,\n"
+    + "EA02,P,Completa,2,a,tres,x\n"
+    + "EA03,D,Sin correcta,1,a,nada,0\n"
+    + "EA04,D,Valor raro,1,a,algo,quizás\n"
+)
+
+
+@pytest.fixture
+def exam():
+    exam = ExamFactory()
+    ItemFactory(exam=exam, code="EA00", order=1)
+    return exam
+
+
+def _csv(text=CSV):
+    return io.BytesIO(text.encode())
+
+
+def test_import_csv(exam):
+    created, errors = import_item_bank(exam, READERS["csv"](_csv()))
+
+    assert created == 2  # noqa: PLR2004
+    assert errors == [
+        {"row": 7, "error": "La subpregunta 1 no tiene opción correcta"},
+        {"row": 8, "error": "Valor de is_correct inválido: quizás"},
+    ]
+    poly = exam.items.get(code="EA02")
+    assert poly.order == 2 * ORDER_GAP
+    assert poly.scoring_type == Item.SCORING_POLYTOMOUS
+    assert [s.options.count() for s in poly.subquestions.all()] == [2, 1]
+    assert list(poly.subquestions.values_list("order", flat=True)) == [
+        ORDER_GAP,
+        2 * ORDER_GAP,
+    ]
+    assert Option.objects.filter(subquestion__item=poly, is_correct=True).count() == 2  # noqa: PLR2004
+
+
+def test_import_queries_do_not_depend_on_size(exam, django_assert_num_queries):
+    rows = [HEADER] + [f"X{n},D,Ítem {n},1,a,sí,1\n" for n in range(200)]
+
+    # Savepoint, bloqueo, orden y códigos, 3 INSERT por lote de 100, la
+    # versión y el release. SQLite admite 999 parámetros por consulta: ahí
+    # el INSERT de 100 ítems se parte en dos, uno más por lote
+    with django_assert_num_queries(14):
+        created, _ = import_item_bank(
+            exam,
+            READERS["csv"](_csv("".join(rows))),
+            batch_size=100,
+        )
+    assert created == 200  # noqa: PLR2004
+
+
+def test_import_jsonl_round_trips_export(exam, client, user):
+    client.force_login(user)
+    exported = client.get(reverse("exams:api-exam-export", args=[exam.pk])).json()
+    item = exported["exam"]["items"][0]
+    item["code"] = "EA99"
+    item["subquestions"] = [
+        {
+            "context_text": "",
+            "options": [{"label": "a", "text": "t", "is_correct": True}],
+        },
+    ]
+    lines = json.dumps(item) + "\n{no es json\n" + json.dumps({**item, "code": "EA00"})
+
+    created, errors = import_item_bank(
+        exam,
+        READERS["jsonl"](io.BytesIO(lines.encode())),
+    )
+
+    assert created == 1
+    assert [e["row"] for e in errors] == [2, 3]
+    assert exam.items.filter(code="EA99").exists()
+
+
+def test_upload_xlsx(exam, client, user):
+    workbook = Workbook()
+    sheet = workbook.active
+    for line in CSV.splitlines()[:3]:
+        sheet.append(line.split(","))
+    content = io.BytesIO()
+    workbook.save(content)
+    client.force_login(user)
+    url = reverse("exams:api-item-bank-import", args=[exam.pk])
+
+    response = client.post(
+        url,
+        {"file": SimpleUploadedFile("banco.xlsx", content.getvalue())},
+    )
+
+    assert response.json() == {"success": True, "created": 1, "errors": []}
+    response = client.post(url, {"file": SimpleUploadedFile("banco.txt", b"")})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_command(exam, tmp_path, capsys):
+    path = tmp_path / "banco.csv"
+    path.write_text(CSV, encoding="utf-8")
+
+    call_command("import_item_bank", exam.pk, str(path))
+
+    assert "2 ítems importados, 2 con errores" in capsys.readouterr().out
+
+
+def test_csv_not_in_utf8_is_rejected(exam, client, user, tmp_path):
+    # Excel guarda por defecto en cp1252; la ñ no es UTF-8 válido
+    content = (HEADER + "EA05,D,Señala el dibujo,1,a,niño,1\n").encode("cp1252")
+    client.force_login(user)
+
+    response = client.post(
+        reverse("exams:api-item-bank-import", args=[exam.pk]),
+        {"file": SimpleUploadedFile("banco.csv", content)},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert "UTF-8" in response.json()["errors"][0]
+    path = tmp_path / "banco.csv"
+    path.write_bytes(content)
+    with pytest.raises(CommandError, match="UTF-8"):
+        call_command("import_item_bank", exam.pk, str(path))
+    assert not exam.items.filter(code="EA05").exists()
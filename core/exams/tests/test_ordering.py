@@ -0,0 +1,102 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+
+from core.exams.models import Item
+from core.exams.ordering import ORDER_GAP
+from core.exams.ordering import next_order
+from core.exams.ordering import order_after
+from core.exams.ordering import reorder
+from core.exams.tests.factories import ExamFactory
+from core.exams.tests.factories import ItemFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def items():
+    exam = ExamFactory()
+    return [
+        ItemFactory(exam=exam, code=f"EA0{n}", order=n * ORDER_GAP) for n in (1, 2, 3)
+    ]
+
+
+def _codes(exam):
+    return list(exam.items.order_by("order", "id").values_list("code", flat=True))
+
+
+def test_next_order_leaves_a_gap(items):
+    assert next_order(items[0].exam) == 4 * ORDER_GAP
+
+
+def test_order_after_uses_the_gap(items):
+    exam = items[0].exam
+
+    assert order_after(exam, items[0].pk) == ORDER_GAP + ORDER_GAP // 2
+    assert order_after(exam, None) == ORDER_GAP // 2
+    with pytest.raises(ValidationError):
+        order_after(exam, 0)
+
+
+def test_order_after_renumbers_when_full():
+    exam = ExamFactory()
+    first = ItemFactory(exam=exam, code="A", order=1)
+    ItemFactory(exam=exam, code="B", order=2)
+
+    order = order_after(exam, first.pk)
+    ItemFactory(exam=exam, code="C", order=order)
+
+    assert _codes(exam) == ["A", "C", "B"]
+    assert list(exam.items.order_by("order").values_list("order", flat=True)) == [
+        ORDER_GAP,
+        2 * ORDER_GAP,
+        3 * ORDER_GAP,
+    ]
+
+
+def test_reorder_is_one_update(items, django_assert_num_queries):
+    exam = items[0].exam
+    ids = [items[2].pk, items[0].pk, items[1].pk]
+
+    # Bloqueo, lectura, UPDATE con CASE y versión, más el savepoint
+    with django_assert_num_queries(6):
+        assert reorder(exam, ids) == 3  # noqa: PLR2004
+
+    assert _codes(exam) == ["EA03", "EA01", "EA02"]
+    with pytest.raises(ValidationError):
+        reorder(exam, ids[:2])
+
+
+def test_reorder_view(items, client, user):
+    client.force_login(user)
+    exam = items[0].exam
+    url = reverse("exams:api-item-reorder", kwargs={"pk": exam.pk})
+
+    response = client.post(
+        url,
+        data=json.dumps({"ids": [items[1].pk, items[0].pk, items[2].pk]}),
+        content_type="application/json",
+    )
+
+    assert response.json() == {"success": True, "changed": 2}
+    response = client.post(url, data="{}", content_type="application/json")
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_create_after_sibling(items, client, user):
+    client.force_login(user)
+
+    response = client.post(
+        reverse("exams:api-item-create"),
+        data=json.dumps(
+            {"exam_id": items[0].exam_id, "code": "NEW", "after": items[0].pk},
+        ),
+        content_type="application/json",
+    )
+
+    assert response.json()["success"]
+    assert _codes(items[0].exam) == ["EA01", "NEW", "EA02", "EA03"]
+    assert Item.objects.get(code="EA02").order == 2 * ORDER_GAP
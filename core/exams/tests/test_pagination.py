@@ -0,0 +1,81 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.paginator import InvalidPage
+from django.urls import reverse
+from django.utils import timezone
+
+from core.exams.models import Exam
+from core.exams.pagination import KeysetPaginator
+from core.exams.tests.factories import ExamFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def exams():
+    exams = ExamFactory.create_batch(12)
+    # Fechas repetidas: el id desempata
+    now = timezone.now()
+    Exam.objects.filter(pk__in=[e.pk for e in exams[:4]]).update(created_at=now)
+    return list(Exam.objects.order_by("-created_at", "-id"))
+
+
+def test_pages_walk_forward_and_back(exams):
+    paginator = KeysetPaginator(Exam.objects.all(), 5)
+
+    first = paginator.page()
+    second = paginator.page(first.next_cursor)
+    third = paginator.page(second.next_cursor)
+
+    assert [list(page) for page in (first, second, third)] == [
+        exams[:5],
+        exams[5:10],
+        exams[10:],
+    ]
+    assert not first.has_previous()
+    assert not third.has_next()
+    assert list(paginator.page(third.previous_cursor)) == exams[5:10]
+    assert list(paginator.page(second.previous_cursor)) == exams[:5]
+
+
+def test_page_cost_does_not_depend_on_depth(exams, django_assert_num_queries):
+    paginator = KeysetPaginator(Exam.objects.all(), 2)
+    cursor = paginator.page().next_cursor
+    for _ in range(2):
+        cursor = paginator.page(cursor).next_cursor
+
+    with django_assert_num_queries(1) as captured:
+        paginator.page(cursor)
+
+    assert "OFFSET" not in captured.captured_queries[0]["sql"]
+
+
+def test_count_is_cached(exams, django_assert_num_queries):
+    paginator = KeysetPaginator(Exam.objects.all(), 3)
+
+    assert paginator.count == len(exams)
+    ExamFactory()
+    with django_assert_num_queries(0):
+        assert paginator.count == len(exams)
+
+
+def test_invalid_cursor():
+    paginator = KeysetPaginator(Exam.objects.all(), 3)
+
+    with pytest.raises(InvalidPage):
+        paginator.page("no-es-un-cursor")
+
+
+def test_exam_list_uses_cursors(client, exams):
+    client.force_login(exams[0].created_by)
+    url = reverse("exams:list")
+
+    first = client.get(url)
+    page = first.context["page_obj"]
+    second = client.get(url, {"cursor": page.next_cursor})
+
+    assert list(first.context["exams"]) == exams[:10]
+    assert list(second.context["exams"]) == exams[10:]
+    assert f"{len(exams)} exámenes" in first.content.decode()
+    assert client.get(url, {"cursor": "x"}).status_code == HTTPStatus.NOT_FOUND
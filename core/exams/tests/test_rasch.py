@@ -0,0 +1,119 @@
+import numpy as np
+
+from core.exams.rasch import Convergence
+from core.exams.rasch import calibrate_dichotomous
+from core.exams.rasch import calibrate_partial_credit
+from core.exams.rasch import find_extremes
+
+
+def _simulate(n_persons=3000, difficulties=(-1.5, -0.5, 0.0, 0.5, 1.5), seed=0):
+    rng = np.random.default_rng(seed)
+    theta = rng.normal(0, 1, n_persons)
+    b = np.array(difficulties)
+    p = 1 / (1 + np.exp(-(theta[:, None] - b[None, :])))
+    return (rng.random(p.shape) < p).astype(np.int8), theta, b
+
+
+def _simulate_partial_credit(theta, steps, seed=0):
+    rng = np.random.default_rng(seed)
+    categories = np.arange(steps.shape[1] + 1)
+    cumulative = np.concatenate([np.zeros((len(steps), 1)), steps.cumsum(axis=1)], 1)
+    logits = theta[:, None, None] * categories - cumulative[None]
+    p = np.exp(logits - logits.max(axis=2, keepdims=True))
+    p /= p.sum(axis=2, keepdims=True)
+    u = rng.random((len(theta), len(steps), 1))
+    return (u > p.cumsum(axis=2)).sum(axis=2).astype(np.int8)
+
+
+PCM_STEPS = np.array([[-1.8, -0.2], [-1.0, 0.0], [-0.3, 0.3], [0.0, 1.0], [0.2, 1.8]])
+
+
+def test_recovers_difficulties():
+    scores, theta, b = _simulate()
+
+    result = calibrate_dichotomous(scores)
+
+    assert result.converged
+    assert np.abs(result.item_measures - b).max() < 0.15  # noqa: PLR2004
+    assert abs(result.item_measures.mean()) < 1e-6  # noqa: PLR2004
+    assert np.corrcoef(result.person_measures, theta)[0, 1] > 0.6  # noqa: PLR2004
+    assert np.isfinite(result.item_se).all()
+
+
+def test_convergence_criteria_can_be_tightened():
+    scores, _, _ = _simulate()
+
+    result = calibrate_dichotomous(scores, convergence=Convergence(max_iterations=1))
+
+    assert not result.converged
+    assert result.iterations == 1
+
+
+def test_extreme_scores_are_measured_outside_the_range():
+    scores, _, _ = _simulate(n_persons=500)
+    scores[0] = 1
+    scores[1] = 0
+    scores[2] = -1
+
+    result = calibrate_dichotomous(scores)
+
+    assert result.person_extreme[:3].tolist() == [True, True, True]
+    finite = result.person_measures[~result.person_extreme]
+    assert result.person_measures[0] > finite.max()
+    assert result.person_measures[1] < finite.min()
+    assert np.isnan(result.person_measures[2])
+
+
+def test_find_extremes_is_iterative():
+    # Sin la persona 0 (puntaje perfecto) el ítem 0 queda todo incorrecto
+    scores = np.array([[1, 1, 1], [0, 1, 0], [0, 0, 1]])
+    observed = np.ones_like(scores, dtype=bool)
+
+    persons, items = find_extremes(scores, observed, np.ones(3))
+
+    assert persons.tolist() == [True, False, False]
+    assert items[0]
+
+
+def test_partial_credit_recovers_steps():
+    theta = np.random.default_rng(1).normal(0, 1, 3000)
+    scores = _simulate_partial_credit(theta, PCM_STEPS)
+
+    result = calibrate_partial_credit(scores, np.full(5, 2))
+
+    assert result.converged
+    measures = PCM_STEPS.mean(axis=1)
+    assert np.abs(result.item_measures - measures).max() < 0.15  # noqa: PLR2004
+    thresholds = np.array(result.item_thresholds)
+    assert np.abs(thresholds - (PCM_STEPS - measures[:, None])).max() < 0.2  # noqa: PLR2004
+    assert np.corrcoef(result.person_measures, theta)[0, 1] > 0.6  # noqa: PLR2004
+
+
+def test_partial_credit_matches_dichotomous():
+    scores, _, _ = _simulate(n_persons=500)
+
+    dichotomous = calibrate_dichotomous(scores)
+    partial = calibrate_partial_credit(scores, np.ones(5))
+
+    assert np.allclose(partial.item_measures, dichotomous.item_measures, atol=0.01)
+    assert [t.tolist() for t in partial.item_thresholds] == [[0.0]] * 5
+
+
+def test_partial_credit_warm_start():
+    rng = np.random.default_rng(2)
+    theta = rng.normal(0, 1, 2000)
+    scores = _simulate_partial_credit(theta, PCM_STEPS)
+    first = calibrate_partial_credit(scores, np.full(5, 2))
+    more = np.vstack([scores, _simulate_partial_credit(theta[:200], PCM_STEPS, 3)])
+
+    cold = calibrate_partial_credit(more, np.full(5, 2))
+    warm = calibrate_partial_credit(
+        more,
+        np.full(5, 2),
+        initial_steps=first.item_measures[:, None] + first.item_thresholds,
+        initial_theta=np.concatenate([first.person_measures, np.full(200, np.nan)]),
+    )
+
+    assert warm.converged
+    assert warm.iterations < cold.iterations
+    assert np.abs(warm.item_measures - cold.item_measures).max() < 0.01  # noqa: PLR2004
@@ -0,0 +1,91 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from PIL import Image
+
+from core.exams.renditions import image_srcset
+from core.exams.tests.factories import ItemFactory
+from core.exams.tests.factories import SubQuestionFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def _png(width, height, name="mapa.png"):
+    buffer = BytesIO()
+    Image.new("RGBA", (width, height), (200, 30, 30, 128)).save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+def test_renditions_are_generated_on_commit(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        item = ItemFactory(image=_png(800, 400))
+    item.refresh_from_db()
+
+    renditions = item.image_renditions
+    assert renditions["source"] == item.image.name
+    assert [width for width, _ in renditions["webp"]] == [160, 320, 640]
+    for width, name in renditions["jpeg"]:
+        with default_storage.open(name) as stream, Image.open(stream) as image:
+            assert image.format == "JPEG"
+            assert image.size == (width, width // 2)
+
+    srcset = image_srcset(item.image, renditions)
+    assert srcset["webp"].endswith(f"{item.image.url} 800w")
+    assert ".320w.webp 320w" in srcset["webp"]
+
+
+def test_renditions_follow_the_current_image(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        subq = SubQuestionFactory(image=_png(400, 400))
+    subq.refresh_from_db()
+    exam = subq.item.exam
+    version = exam.content_version
+
+    with django_capture_on_commit_callbacks(execute=True):
+        subq.image = _png(100, 100, "icono.png")
+        subq.save()
+    subq.refresh_from_db()
+    exam.refresh_from_db()
+
+    # Más chica que todos los anchos: no hay versiones, solo el original
+    assert subq.image_renditions["source"] == subq.image.name
+    assert image_srcset(subq.image, subq.image_renditions) == {}
+    assert exam.content_version > version
+
+    subq.image = None
+    subq.save()
+    subq.refresh_from_db()
+    assert subq.image_renditions == {}
+
+
+def test_preview_publishes_srcset(client, user, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        item = ItemFactory(image=_png(700, 350))
+    client.force_login(user)
+
+    html = client.get(reverse("exams:preview", kwargs={"pk": item.exam_id}))
+    exported = client.get(reverse("exams:api-exam-export", args=[item.exam_id]))
+
+    assert 'type="image/webp"' in html.content.decode()
+    srcset = exported.json()["exam"]["items"][0]["image_srcset"]
+    assert ".640w.webp 640w" in srcset["webp"]
+
+
+def test_missing_renditions_are_rebuilt(capsys):
+    # Sin ``on_commit`` el generador nunca corre, como tras un reinicio
+    item = ItemFactory(image=_png(700, 350))
+    SubQuestionFactory(item=item)
+    assert item.image_renditions == {}
+
+    call_command("rebuild_renditions", "--dry-run")
+    assert "1 imágenes sin versiones" in capsys.readouterr().out
+    call_command("rebuild_renditions")
+    item.refresh_from_db()
+
+    assert item.image_renditions["source"] == item.image.name
+    call_command("rebuild_renditions")
+    assert "0 imágenes procesadas" in capsys.readouterr().out.splitlines()[-1]
@@ -0,0 +1,60 @@
+import pytest
+
+from core.exams.richtext import compile_rich_text
+from core.exams.services import save_item_tree
+from core.exams.tests.factories import ExamFactory
+from core.exams.tests.factories import ItemFactory
+
+
+def test_sanitizes_and_minifies():
+    html, plain = compile_rich_text(
+        '<p class="ql-align-center x" onclick="robar()">Hola\n\n  <b>mundo</b>'
+        '<script>alert(1)</script></p><p><a href="javascript:alert(1)">a</a>'
+        '<a href="https://edupan.org" target="_blank">b</a></p><p><br></p>',
+    )
+
+    assert html == (
+        '<p class="ql-align-center">Hola <b>mundo</b></p>'
+        "<p><a>a</a>"
+        '<a href="https://edupan.org" target="_blank" rel="noopener noreferrer">b</a>'
+        "</p>"
+    )
+    assert plain == "Hola mundo ab"
+
+
+def test_escapes_text_and_closes_tags():
+    html, plain = compile_rich_text("<ul><li>1 &lt; 2 <em>y<li>3 &amp; 4")
+
+    assert html == "<ul><li>1 &lt; 2 <em>y<li>3 &amp; 4</li></em></li></ul>"
+    assert plain == "1 < 2 y 3 & 4"
+
+
+@pytest.mark.django_db
+def test_compiled_on_save():
+    item = ItemFactory(instruction="<p>¿Qué <u>ves</u>?</p><img src=x onerror=y>")
+
+    assert item.instruction_html == '<p>¿Qué <u>ves</u>?</p><img src="x">'
+    assert item.instruction_plain == "¿Qué ves?"
+
+
+@pytest.mark.django_db
+def test_compiled_in_tree_save():
+    exam = ExamFactory()
+    item, tree = save_item_tree(
+        exam,
+        {"code": "EA01", "subquestions": [{"context_text": "<p>Lee <i>esto</i></p>"}]},
+    )
+    subq = tree[0][0]
+    subq.refresh_from_db()
+    assert subq.context_plain == "Lee esto"
+
+    save_item_tree(
+        exam,
+        {
+            "id": item.pk,
+            "subquestions": [{"id": subq.pk, "context_text": "<p>Otro</p>"}],
+        },
+    )
+    subq.refresh_from_db()
+    assert subq.context_html == "<p>Otro</p>"
+    assert subq.context_plain == "Otro"
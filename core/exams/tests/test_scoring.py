@@ -0,0 +1,147 @@
+import numpy as np
+import pytest
+
+from core.exams.models import Examinee
+from core.exams.models import Item
+from core.exams.models import Option
+from core.exams.models import Response
+from core.exams.scoring import MISSING_SCORE
+from core.exams.scoring import NO_ANSWER
+from core.exams.scoring import compile_answer_key
+from core.exams.scoring import forget_answer_key
+from core.exams.scoring import get_answer_key
+from core.exams.scoring import iter_person_scores
+from core.exams.scoring import score_matrix
+from core.exams.tests.factories import ExamFactory
+from core.exams.tests.factories import ExamineeFactory
+from core.exams.tests.factories import ItemFactory
+from core.exams.tests.factories import OptionFactory
+from core.exams.tests.factories import SubQuestionFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def exam():
+    """EA01 dicotómico de 1 subpregunta, EA02 politómico de 3"""
+    exam = ExamFactory()
+    dich = ItemFactory(exam=exam, code="EA01", order=1)
+    poly = ItemFactory(
+        exam=exam,
+        code="EA02",
+        order=2,
+        scoring_type=Item.SCORING_POLYTOMOUS,
+    )
+    for item, n_subq in [(dich, 1), (poly, 3)]:
+        for order in range(n_subq):
+            subq = SubQuestionFactory(item=item, order=order)
+            OptionFactory(subquestion=subq, label="a", order=1, is_correct=True)
+            OptionFactory(subquestion=subq, label="b", order=2)
+    return exam
+
+
+def _pick(key, exam, pattern):
+    """Respuesta por subpregunta: True correcta, False incorrecta, None vacía"""
+    options = {
+        subq_id: dict(
+            Option.objects.filter(subquestion_id=subq_id).values_list(
+                "is_correct",
+                "id",
+            ),
+        )
+        for subq_id in key.subquestion_ids.tolist()
+    }
+    return [
+        NO_ANSWER if p is None else options[subq_id][p]
+        for subq_id, p in zip(key.subquestion_ids.tolist(), pattern, strict=True)
+    ]
+
+
+def test_compile_answer_key(exam, django_assert_num_queries):
+    with django_assert_num_queries(2):
+        key = compile_answer_key(exam)
+
+    assert key.item_codes == ["EA01", "EA02"]
+    assert key.subquestion_counts.tolist() == [1, 3]
+    assert key.item_starts.tolist() == [0, 1]
+    assert key.max_scores.tolist() == [1, 2]
+    assert (key.correct_option_ids > 0).all()
+
+
+def test_get_answer_key_two_levels(exam, django_assert_num_queries):
+    with django_assert_num_queries(3):  # versión y las 2 de la clave
+        key = get_answer_key(exam.pk)
+    with django_assert_num_queries(0):
+        assert get_answer_key(exam.pk) is key
+
+    # Otro proceso: LRU vacío, la clave sale de la caché compartida
+    forget_answer_key()
+    with django_assert_num_queries(0):
+        other = get_answer_key(exam.pk)
+    assert other is not key
+    assert other.correct_option_ids.tolist() == key.correct_option_ids.tolist()
+
+
+def test_get_answer_key_follows_content_version(
+    exam,
+    django_capture_on_commit_callbacks,
+):
+    key = get_answer_key(exam.pk)
+    option = Option.objects.filter(subquestion__item__code="EA01").last()
+    Option.objects.filter(subquestion__item__code="EA01").update(is_correct=False)
+    option.is_correct = True
+    with django_capture_on_commit_callbacks(execute=True):
+        option.save()
+
+    new_key = get_answer_key(exam.pk)
+    assert new_key.version > key.version
+    assert new_key.correct_option_ids[0] == option.pk
+    assert get_answer_key(0) is None
+
+
+def test_get_answer_key_lru_is_bounded(monkeypatch):
+    monkeypatch.setattr("core.exams.scoring.ANSWER_KEY_CACHE_SIZE", 2)
+    exams = ExamFactory.create_batch(3)
+    keys = [get_answer_key(exam.pk) for exam in exams]
+
+    assert get_answer_key(exams[2].pk) is keys[2]
+    assert get_answer_key(exams[0].pk) is not keys[0]
+
+
+def test_score_matrix(exam):
+    key = compile_answer_key(exam)
+    responses = np.array(
+        [
+            _pick(key, exam, [True, True, True, True]),
+            _pick(key, exam, [False, True, True, False]),
+            _pick(key, exam, [True, True, False, False]),
+            _pick(key, exam, [None, None, None, None]),
+        ],
+    )
+
+    scores = score_matrix(key, responses)
+
+    assert scores.tolist() == [
+        [1, 2],
+        [0, 1],
+        [1, 0],
+        [MISSING_SCORE, MISSING_SCORE],
+    ]
+
+
+def test_iter_person_scores_uses_latest_response(exam):
+    key = compile_answer_key(exam)
+    examinee = ExamineeFactory(administration__exam=exam, code="ALU-1")
+    first_subq = key.subquestion_ids[0].item()
+    wrong = _pick(key, exam, [False] * 4)[0]
+    right = _pick(key, exam, [True] * 4)[0]
+    for option_id in [wrong, right]:
+        Response.objects.create(
+            examinee=examinee,
+            subquestion_id=first_subq,
+            option_id=option_id,
+        )
+
+    persons = list(iter_person_scores(key, Examinee.objects.all(), chunk_size=1))
+
+    assert persons == [("ALU-1", [1, None])]
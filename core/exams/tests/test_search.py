@@ -0,0 +1,137 @@
+from http import HTTPStatus
+from importlib import import_module
+
+import pytest
+from django.apps import apps as django_apps
+from django.urls import reverse
+
+from core.exams.models import SearchDocument
+from core.exams.search import index_exam
+from core.exams.search import normalize
+from core.exams.search import search
+from core.exams.search import search_exam_ids
+from core.exams.tests.factories import ExamFactory
+from core.exams.tests.factories import ItemFactory
+from core.exams.tests.factories import OptionFactory
+from core.exams.tests.factories import SubQuestionFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def exams():
+    fractions = ExamFactory(name="Matemática: fracciones")
+    item = ItemFactory(
+        exam=fractions,
+        code="MA01",
+        instruction="<p>Resuelve la <strong>ecuación</strong> &amp; marca</p>",
+    )
+    subq = SubQuestionFactory(item=item, context_text="Un tren recorre 120 km")
+    OptionFactory(subquestion=subq, text="Velocidad constante")
+    reading = ExamFactory(name="Comprensión lectora")
+    ItemFactory(exam=reading, code="CL01", instruction="Lee el texto sobre fracciones")
+    for exam in (fractions, reading):
+        index_exam(exam.pk)
+    return fractions, reading
+
+
+def test_normalize_strips_accents():
+    assert normalize("Ecuación de\n  año") == "Ecuacion de ano"
+
+
+def test_search_is_accent_insensitive(exams):
+    fractions, reading = exams
+
+    assert search_exam_ids("ECUACION") == [fractions.pk]
+    assert search_exam_ids("comprension") == [reading.pk]
+    assert search_exam_ids("velocidad tren") == [fractions.pk]
+    assert search_exam_ids("veloc") == [fractions.pk]
+    assert search_exam_ids('"; DROP') == []
+
+
+def test_title_matches_rank_first(exams):
+    fractions, reading = exams
+
+    hits = search("fracciones")
+
+    assert [hit.exam_id for hit in hits] == [fractions.pk, reading.pk]
+    assert hits[0].score > hits[1].score
+
+
+def test_index_exam_rewrites_only_changed_documents(exams):
+    fractions, _ = exams
+    item = fractions.items.get()
+
+    assert index_exam(fractions.pk) == 0
+
+    item.instruction = "Calcula el perímetro"
+    item.save()
+    assert index_exam(fractions.pk) == 1
+    assert search_exam_ids("perimetro") == [fractions.pk]
+    assert search_exam_ids("ecuacion") == []
+
+    item.delete()
+    index_exam(fractions.pk)
+    assert search_exam_ids("perimetro") == []
+
+
+def test_changes_are_indexed_on_commit(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        exam = ExamFactory(name="Ciencias")
+    with django_capture_on_commit_callbacks(execute=True):
+        ItemFactory(exam=exam, code="CI01", instruction="Fotosíntesis")
+
+    assert search_exam_ids("fotosintesis") == [exam.pk]
+
+    exam.delete()
+    assert not SearchDocument.objects.exists()
+    assert search_exam_ids("fotosintesis") == []
+
+
+def test_exam_list_uses_the_index(client, exams):
+    fractions, reading = exams
+    client.force_login(fractions.created_by)
+
+    response = client.get(reverse("exams:list"), {"search": "fracciones"})
+
+    assert response.status_code == HTTPStatus.OK
+    assert list(response.context["exams"]) == [fractions, reading]
+
+
+def test_exam_list_paginates_every_match(client, exams):
+    fractions, _ = exams
+    for number in range(11):
+        index_exam(ExamFactory(name=f"Fracciones {number}").pk)
+    client.force_login(fractions.created_by)
+
+    response = client.get(reverse("exams:list"), {"search": "fracciones", "page": 2})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.context["paginator"].count == 13  # noqa: PLR2004
+    assert len(response.context["exams"]) == 3  # noqa: PLR2004
+
+
+def test_exam_ids_are_grouped_and_bounded_in_the_query(exams):
+    fractions, reading = exams
+    # Varios documentos del mismo examen cuentan una sola vez
+    ItemFactory(exam=fractions, code="MA02", instruction="Suma de fracciones")
+    index_exam(fractions.pk)
+
+    assert search_exam_ids("fracciones") == [fractions.pk, reading.pk]
+    assert search_exam_ids("fracciones", limit=1) == [fractions.pk]
+
+
+def test_migration_indexes_existing_exams(exams):
+    fractions, _ = exams
+    backfill = import_module(
+        "core.exams.migrations.0015_backfill_search_documents",
+    ).backfill
+    expected = set(SearchDocument.objects.values_list("exam", "item", "checksum"))
+    SearchDocument.objects.filter(exam=fractions).delete()
+
+    backfill(django_apps, None)
+
+    assert (
+        set(SearchDocument.objects.values_list("exam", "item", "checksum")) == expected
+    )
+    assert search_exam_ids("velocidad") == [fractions.pk]
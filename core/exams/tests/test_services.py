@@ -0,0 +1,210 @@
+import pytest
+from django.core.exceptions import ValidationError
+
+from core.exams.ingestion import ingest_responses
+from core.exams.models import Item
+from core.exams.models import Option
+from core.exams.models import Response
+from core.exams.models import SubQuestion
+from core.exams.ordering import ORDER_GAP
+from core.exams.services import clone_exam
+from core.exams.services import save_item_tree
+from core.exams.services import serialize_exam
+from core.exams.tests.factories import AdministrationFactory
+from core.exams.tests.factories import ExamFactory
+from core.exams.tests.factories import OptionFactory
+from core.exams.tests.factories import SubQuestionFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def _tree_payload(subquestions=4, options=4):
+    return {
+        "code": "EA01",
+        "instruction": "<p>Marca la palabra correcta</p>",
+        "scoring_type": Item.SCORING_POLYTOMOUS,
+        "subquestions": [
+            {
+                "id": None,
+                "context_text": f"<p>Subpregunta {s}</p>",
+                "options": [
+                    {
+                        "id": None,
+                        "label": "abcdef"[o],
+                        "text": f"op {o}",
+                        "is_correct": o == 0,
+                    }
+                    for o in range(options)
+                ],
+            }
+            for s in range(subquestions)
+        ],
+    }
+
+
+class TestSaveItemTree:
+    def test_create_tree(self):
+        exam = ExamFactory()
+
+        item, tree = save_item_tree(exam, _tree_payload())
+
+        assert item.order == ORDER_GAP
+        assert SubQuestion.objects.filter(item=item).count() == 4  # noqa: PLR2004
+        assert Option.objects.filter(subquestion__item=item).count() == 16  # noqa: PLR2004
+        assert all(subq.pk for subq, _ in tree)
+        assert all(option.pk for _, options in tree for option in options)
+        assert [s.order for s in item.subquestions.all()] == [
+            n * ORDER_GAP for n in (1, 2, 3, 4)
+        ]
+
+    def test_query_count_does_not_grow_with_tree(self, django_assert_max_num_queries):
+        exam = ExamFactory()
+
+        with django_assert_max_num_queries(9):
+            save_item_tree(exam, _tree_payload(subquestions=10, options=6))
+
+    def test_diff_updates_and_deletes(self, django_assert_max_num_queries):
+        exam = ExamFactory()
+        item, tree = save_item_tree(exam, _tree_payload(subquestions=2, options=2))
+        (first, first_options), (second, _) = tree
+        payload = {
+            "id": item.pk,
+            "code": "EA01",
+            "subquestions": [
+                {
+                    "id": first.pk,
+                    "context_text": "<p>Editada</p>",
+                    "options": [
+                        {
+                            "id": first_options[1].pk,
+                            "text": "nueva",
+                            "is_correct": True,
+                        },
+                        {"id": None, "label": "b", "text": "otra"},
+                    ],
+                },
+            ],
+        }
+
+        with django_assert_max_num_queries(20):
+            save_item_tree(exam, payload)
+
+        first.refresh_from_db()
+        assert first.context_text == "<p>Editada</p>"
+        assert not SubQuestion.objects.filter(pk=second.pk).exists()
+        assert not Option.objects.filter(pk=first_options[0].pk).exists()
+        assert list(first.options.values_list("text", "is_correct", "order")) == [
+            ("nueva", True, ORDER_GAP),
+            ("otra", False, 2 * ORDER_GAP),
+        ]
+
+    def test_keeps_rows_with_responses(self):
+        exam = ExamFactory()
+        item, tree = save_item_tree(exam, _tree_payload(subquestions=2, options=2))
+        (first, first_options), (second, second_options) = tree
+        rows = [
+            {"examinee": "A", "subquestion": first.pk, "option": first_options[0].pk},
+            {"examinee": "A", "subquestion": second.pk, "option": None},
+        ]
+        ingest_responses(AdministrationFactory(exam=exam), rows)
+
+        def edited(*subquestions):
+            return {"id": item.pk, "code": "EA01", "subquestions": list(subquestions)}
+
+        kept_first = {"id": first.pk, "options": [{"id": o.pk} for o in first_options]}
+        with pytest.raises(ValidationError):
+            save_item_tree(exam, edited(kept_first))
+        with pytest.raises(ValidationError):
+            save_item_tree(
+                exam,
+                edited({"id": first.pk, "options": [{"id": first_options[1].pk}]}),
+            )
+        assert list(
+            Response.objects.order_by("id").values_list("subquestion", "option"),
+        ) == [(first.pk, first_options[0].pk), (second.pk, None)]
+
+        # Las opciones sin respuestas sí se pueden quitar
+        save_item_tree(
+            exam,
+            edited(kept_first, {"id": second.pk, "options": []}),
+        )
+        assert not Option.objects.filter(pk__in=[o.pk for o in second_options])
+
+    def test_rejects_foreign_rows(self):
+        exam = ExamFactory()
+        item, _ = save_item_tree(exam, _tree_payload(subquestions=1, options=1))
+        foreign_subq = SubQuestionFactory()
+        foreign_option = OptionFactory()
+
+        with pytest.raises(ValidationError):
+            save_item_tree(
+                exam,
+                {"id": item.pk, "subquestions": [{"id": foreign_subq.pk}]},
+            )
+        new_subq = {"id": None, "options": [{"id": foreign_option.pk}]}
+        with pytest.raises(ValidationError):
+            save_item_tree(exam, {"id": item.pk, "subquestions": [new_subq]})
+
+    def test_rejects_a_code_taken_by_another_item(self):
+        exam = ExamFactory()
+        item, _ = save_item_tree(exam, _tree_payload())
+        other, _ = save_item_tree(exam, {**_tree_payload(), "code": "EA02"})
+
+        with pytest.raises(ValidationError, match="código"):
+            save_item_tree(exam, {"id": other.pk, "code": item.code})
+        # Conservar el propio código no es un conflicto
+        save_item_tree(exam, {"id": item.pk, "code": item.code, "order": 5})
+
+    def test_validates_order(self):
+        exam = ExamFactory()
+        item, _ = save_item_tree(exam, {**_tree_payload(), "order": None})
+
+        # Sin orden se conserva el actual
+        save_item_tree(exam, {"id": item.pk, "order": None, "subquestions": []})
+        item.refresh_from_db()
+        assert item.order == ORDER_GAP
+        # Las filas anteriores a los huecos tienen orden 0
+        save_item_tree(exam, {"id": item.pk, "order": 0})
+        item.refresh_from_db()
+        assert item.order == 0
+        for order in ("2", 1.5, -1, True):
+            with pytest.raises(ValidationError, match="orden"):
+                save_item_tree(exam, {"id": item.pk, "order": order})
+        with pytest.raises(ValidationError, match="orden"):
+            save_item_tree(exam, {"subquestions": [{"order": "x"}]})
+
+
+class TestCloneExam:
+    def _tree(self, exam):
+        data = serialize_exam(exam)
+        for item in data["items"]:
+            del item["id"]
+            for subq in item["subquestions"]:
+                del subq["id"]
+                for option in subq["options"]:
+                    del option["id"]
+        return data["items"]
+
+    def test_clone_copies_tree(self):
+        exam = ExamFactory(name="Forma A")
+        for item_data in [_tree_payload(2, 3), {**_tree_payload(1, 2), "code": "EA02"}]:
+            save_item_tree(exam, item_data)
+        Item.objects.filter(exam=exam, code="EA01").update(image="exams/items/a.png")
+
+        clone = clone_exam(exam)
+
+        assert clone.pk != exam.pk
+        assert clone.name == "Forma A (copia)"
+        assert self._tree(clone) == self._tree(exam)
+        assert clone.items.get(code="EA01").image.name == "exams/items/a.png"
+        assert Option.objects.filter(subquestion__item__exam=exam).count() == 8  # noqa: PLR2004
+
+    @pytest.mark.parametrize("size", [1, 20])
+    def test_query_count_does_not_grow_with_exam(self, size, django_assert_num_queries):
+        exam = ExamFactory()
+        for n in range(size):
+            save_item_tree(exam, {**_tree_payload(2, 2), "code": f"EA{n:02}"})
+
+        # Savepoint, examen, y una lectura y un INSERT por nivel
+        with django_assert_num_queries(9):
+            clone_exam(exam, name="Forma B")
@@ -0,0 +1,72 @@
+import pytest
+from django.core.cache import cache
+
+from core.exams.cache import get_content_version
+from core.exams.cache import version_key
+from core.exams.models import Exam
+from core.exams.signals import batch_content_changes
+from core.exams.tests.factories import ItemFactory
+from core.exams.tests.factories import OptionFactory
+from core.exams.tests.factories import SubQuestionFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def _version(exam_id):
+    return Exam.objects.get(pk=exam_id).content_version
+
+
+def test_child_save_and_delete_bump_version():
+    subq = SubQuestionFactory()
+    exam_id = subq.item.exam_id
+    before = _version(exam_id)
+
+    OptionFactory(subquestion=subq)
+    assert _version(exam_id) == before + 1
+
+    subq.delete()
+    assert _version(exam_id) == before + 2
+
+
+def test_item_cascade_bumps_once():
+    option = OptionFactory()
+    item = option.subquestion.item
+    before = _version(item.exam_id)
+
+    item.delete()
+
+    assert _version(item.exam_id) == before + 1
+
+
+def test_batch_bumps_once():
+    item = ItemFactory()
+    before = _version(item.exam_id)
+
+    with batch_content_changes(item.exam_id):
+        for order in range(3):
+            SubQuestionFactory(item=item, order=order)
+
+    assert _version(item.exam_id) == before + 1
+
+
+def test_exam_delete():
+    exam = OptionFactory().subquestion.item.exam
+    exam.delete()
+    assert not Exam.objects.filter(pk=exam.pk).exists()
+
+
+def test_stale_stamp_read_before_commit_is_not_cached(
+    django_capture_on_commit_callbacks,
+):
+    item = ItemFactory()
+    stale = Exam.objects.values_list("content_version", "updated_at").get(
+        pk=item.exam_id,
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        item.code = "EA99"
+        item.save()
+    # Un lector que leyó antes del commit intenta guardar lo que leyó
+    cache.add(version_key(item.exam_id), stale)
+
+    assert get_content_version(item.exam_id) == stale[0] + 1
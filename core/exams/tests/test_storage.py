@@ -0,0 +1,143 @@
+from datetime import timedelta
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+
+from core.exams import media
+from core.exams.itembank import import_item_bank
+from core.exams.media import collect_unreferenced
+from core.exams.media import with_reference_counts
+from core.exams.models import Item
+from core.exams.models import MediaBlob
+from core.exams.models import exam_media_storage
+from core.exams.services import clone_exam
+from core.exams.storage import BLOB_PREFIX
+from core.exams.tests.factories import ExamFactory
+from core.exams.tests.factories import ItemFactory
+from core.exams.tests.factories import SubQuestionFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def _png(color, name="foto.png"):
+    buffer = BytesIO()
+    Image.new("RGB", (40, 20), color).save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+def test_identical_uploads_share_one_blob():
+    first = ItemFactory(image=_png("red", "a.png"))
+    second = SubQuestionFactory(image=_png("red", "otra.PNG"))
+    other = ItemFactory(image=_png("blue"))
+
+    assert first.image.name == second.image.name
+    assert first.image.name.startswith(f"{BLOB_PREFIX}/")
+    assert other.image.name != first.image.name
+    assert MediaBlob.objects.count() == 2  # noqa: PLR2004
+    assert exam_media_storage().exists(first.image.name)
+    counts = dict(with_reference_counts().values_list("name", "references"))
+    assert counts == {first.image.name: 2, other.image.name: 1}
+
+
+
+def test_deleting_a_field_file_keeps_the_shared_blob():
+    item = ItemFactory(image=_png("yellow"))
+    clone = clone_exam(item.exam).items.get()
+    name = item.image.name
+
+    item.image.delete()
+
+    assert clone.image.name == name
+    assert exam_media_storage().exists(name)
+
+def test_clones_and_imports_reuse_blobs():
+    item = ItemFactory(image=_png("green"))
+    clone = clone_exam(item.exam)
+    target = ExamFactory()
+
+    created, errors = import_item_bank(
+        target,
+        [
+            (1, _record("IM01", item.image.url)),
+            (2, _record("IM02", "exams/blobs/00/desconocida.png")),
+        ],
+    )
+
+    assert clone.items.get().image.name == item.image.name
+    assert created == 1
+    assert target.items.get().image.name == item.image.name
+    assert errors[0]["row"] == 2  # noqa: PLR2004
+    assert MediaBlob.objects.count() == 1
+
+
+def test_import_resolves_images_once_per_batch():
+    item = ItemFactory(image=_png("green"))
+    renditions = {"source": item.image.name, "width": 40, "webp": [], "jpeg": []}
+    Item.objects.filter(pk=item.pk).update(image_renditions=renditions)
+    MediaBlob.objects.update(used_at=timezone.now() - timedelta(days=2))
+
+    counts = []
+    for size in (1, 30):
+        records = []
+        for n in range(size):
+            record = _record(f"IM{size}-{n}", item.image.url)
+            record["subquestions"][0]["image"] = item.image.name
+            records.append((n + 1, record))
+        with CaptureQueriesContext(connection) as queries:
+            created, errors = import_item_bank(ExamFactory(), records)
+        assert (created, errors) == (size, [])
+        counts.append(len(queries))
+
+    assert counts[0] == counts[1]
+    imported = Item.objects.get(code="IM30-0")
+    assert imported.image_renditions == renditions
+    assert imported.subquestions.get().image_renditions == renditions
+    assert MediaBlob.objects.get().used_at > timezone.now() - timedelta(hours=1)
+
+
+def _record(code, image):
+    return {
+        "code": code,
+        "instruction": "Observa la imagen",
+        "image": image,
+        "subquestions": [{"options": [{"label": "a", "is_correct": True}]}],
+    }
+
+
+def test_collect_unreferenced_blobs():
+    kept = ItemFactory(image=_png("red"))
+    dropped = ItemFactory(image=_png("blue"))
+    name = dropped.image.name
+    dropped.delete()
+
+    assert collect_unreferenced() == []
+    MediaBlob.objects.update(used_at=timezone.now() - timedelta(days=2))
+    collected = collect_unreferenced()
+
+    assert [blob.name for blob in collected] == [name]
+    assert not exam_media_storage().exists(name)
+    assert exam_media_storage().exists(kept.image.name)
+    assert list(MediaBlob.objects.values_list("name", flat=True)) == [kept.image.name]
+
+
+def test_blob_reused_during_collection_is_kept():
+    dropped = ItemFactory(image=_png("blue"))
+    name = dropped.image.name
+    dropped.delete()
+    MediaBlob.objects.update(used_at=timezone.now() - timedelta(days=2))
+    cutoff = timezone.now() - media.COLLECT_GRACE
+    (candidate,) = collect_unreferenced(dry_run=True)
+
+    # Una subida del mismo contenido llega después de listar los candidatos
+    reused = ItemFactory(image=_png("blue"))
+    storage = exam_media_storage()
+
+    assert not media._collect(candidate, cutoff, storage.backend)  # noqa: SLF001
+    assert reused.image.name == name
+    assert storage.exists(name)
+    assert MediaBlob.objects.filter(name=name).exists()
@@ -0,0 +1,151 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from core.exams.models import Option
+from core.exams.services import DUPLICATE_CODE_ERROR
+from core.exams.tests.factories import ExamFactory
+from core.exams.tests.factories import ItemFactory
+from core.exams.tests.factories import OptionFactory
+
+pytestmark = pytest.mark.django_db
+
+
+class TestItemTreeSaveAPI:
+    def test_save_returns_new_ids(self, client, user):
+        client.force_login(user)
+        exam = ExamFactory()
+        payload = {
+            "exam_id": exam.pk,
+            "id": None,
+            "code": "EA01",
+            "instruction": "<p>Instrucción</p>",
+            "subquestions": [
+                {
+                    "id": None,
+                    "options": [{"id": None, "label": "a", "is_correct": True}],
+                },
+            ],
+        }
+
+        response = client.post(
+            reverse("exams:api-item-tree-save"),
+            data=json.dumps(payload),
+            content_type="application/json",
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        body = response.json()
+        option_id = body["item"]["subquestions"][0]["options"][0]["id"]
+        assert Option.objects.get(pk=option_id).is_correct
+
+    def test_duplicate_code(self, client, user):
+        client.force_login(user)
+        item = ItemFactory(code="EA01")
+
+        response = client.post(
+            reverse("exams:api-item-tree-save"),
+            data=json.dumps({"exam_id": item.exam_id, "code": "EA01"}),
+            content_type="application/json",
+        )
+
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json() == {
+            "success": False,
+            "errors": [DUPLICATE_CODE_ERROR],
+        }
+
+
+class TestExamPreviewView:
+    def test_repeat_preview_hits_cache(self, client, user, django_assert_num_queries):
+        client.force_login(user)
+        option = OptionFactory(text="respuesta")
+        exam = option.subquestion.item.exam
+        url = reverse("exams:preview", kwargs={"pk": exam.pk})
+
+        assert "respuesta" in client.get(url).content.decode()
+        # Sesión y usuario, más el savepoint de ATOMIC_REQUESTS
+        with django_assert_num_queries(4):
+            response = client.get(url)
+        assert "respuesta" in response.content.decode()
+
+    def test_child_change_invalidates(
+        self,
+        client,
+        user,
+        django_capture_on_commit_callbacks,
+    ):
+        client.force_login(user)
+        option = OptionFactory(text="antes")
+        exam_id = option.subquestion.item.exam_id
+        url = reverse("exams:preview", kwargs={"pk": exam_id})
+        client.get(url)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            option.text = "después"
+            option.save()
+
+        assert "después" in client.get(url).content.decode()
+
+    def test_missing_exam(self, client, user):
+        client.force_login(user)
+        response = client.get(reverse("exams:preview", kwargs={"pk": 0}))
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+class TestConditionalGet:
+    @pytest.mark.parametrize("name", ["exams:preview", "exams:editor"])
+    def test_not_modified(self, client, user, name, django_assert_max_num_queries):
+        client.force_login(user)
+        exam = OptionFactory().subquestion.item.exam
+        url = reverse(name, kwargs={"pk": exam.pk})
+        # La primera visita fija la cookie CSRF, que forma parte del ETag
+        client.get(url)
+        etag = client.get(url).headers["ETag"]
+
+        with django_assert_max_num_queries(4):
+            response = client.get(url, headers={"if-none-match": etag})
+
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    def test_export_changes_etag(
+        self,
+        client,
+        user,
+        django_capture_on_commit_callbacks,
+    ):
+        client.force_login(user)
+        option = OptionFactory(text="uno")
+        exam_id = option.subquestion.item.exam_id
+        url = reverse("exams:api-exam-export", kwargs={"pk": exam_id})
+        response = client.get(url)
+        etag = response.headers["ETag"]
+        items = response.json()["exam"]["items"]
+        assert items[0]["subquestions"][0]["options"][0]["text"] == "uno"
+
+        with django_capture_on_commit_callbacks(execute=True):
+            option.text = "dos"
+            option.save()
+
+        response = client.get(url, headers={"if-none-match": etag})
+        assert response.status_code == HTTPStatus.OK
+        assert response.headers["ETag"] != etag
+
+
+class TestExamCloneView:
+    def test_clone(self, client, user):
+        client.force_login(user)
+        option = OptionFactory()
+        exam = option.subquestion.item.exam
+
+        response = client.post(
+            reverse("exams:clone", kwargs={"pk": exam.pk}),
+            headers={"x-requested-with": "XMLHttpRequest"},
+        )
+
+        data = response.json()
+        assert data["success"]
+        assert data["id"] != exam.pk
+        assert Option.objects.filter(subquestion__item__exam_id=data["id"]).count() == 1
@@ -0,0 +1,81 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from core.exams.models import Item
+from core.exams.tests.factories import ExamFactory
+from core.exams.tests.factories import ItemFactory
+from core.exams.winsteps import ITEM1_COLUMN
+from core.exams.winsteps import iter_chunks
+from core.exams.winsteps import iter_winsteps_lines
+from core.exams.winsteps import person_line
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def exam():
+    exam = ExamFactory(name="Lectura 3er grado")
+    ItemFactory(
+        exam=exam,
+        code="EA01",
+        order=1,
+        instruction="<p>Lee el <b>texto</b></p>",
+    )
+    ItemFactory(
+        exam=exam,
+        code="EA02",
+        order=2,
+        instruction="Une",
+        scoring_type=Item.SCORING_POLYTOMOUS,
+    )
+    ItemFactory(exam=exam, code="EA03", order=3, instruction="")
+    return exam
+
+
+def test_control_file(exam):
+    text = "".join(iter_winsteps_lines(exam, [("ALU-001", [1, 2, None])]))
+
+    assert text.startswith("&INST\n")
+    assert "NI = 3\n" in text
+    assert "CODES = 012\n" in text
+    assert "ISGROUPS = D0D\n" in text
+    assert "&END\nEA01 Lee el texto\nEA02 Une\nEA03\nEND NAMES\n" in text
+    data_line = text.splitlines()[-1]
+    assert data_line[ITEM1_COLUMN - 1 :] == "12."
+
+
+def test_dichotomous_only_has_no_groups():
+    exam = ExamFactory()
+    ItemFactory(exam=exam)
+
+    text = "".join(iter_winsteps_lines(exam))
+
+    assert "CODES = 01\n" in text
+    assert "ISGROUPS" not in text
+
+
+def test_chunks_preserve_content():
+    lines = [person_line(f"P{n}", [1, 0]) for n in range(500)]
+    chunks = list(iter_chunks(lines, chunk_size=1024))
+    assert len(chunks) > 1
+    assert "".join(chunks) == "".join(lines)
+
+
+def test_streaming_view(client, user, exam):
+    client.force_login(user)
+
+    response = client.get(reverse("exams:export-winsteps", kwargs={"pk": exam.pk}))
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.streaming
+    assert b"NI = 3" in b"".join(response.streaming_content)
+
+
+def test_command(exam):
+    out = StringIO()
+    call_command("export_winsteps", exam.pk, stdout=out)
+    assert "END NAMES" in out.getvalue()
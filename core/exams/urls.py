@@ -10,9 +10,53 @@ urlpatterns = [
     path("create/", views.ExamCreateView.as_view(), name="create"),
     path("<int:pk>/edit/", views.ExamEditorView.as_view(), name="editor"),
     path("<int:pk>/preview/", views.ExamPreviewView.as_view(), name="preview"),
+    path(
+        "<int:pk>/export/winsteps/",
+        views.ExamWinstepsExportView.as_view(),
+        name="export-winsteps",
+    ),
+    path("<int:pk>/booklet/", views.ExamBookletView.as_view(), name="booklet"),
+    path(
+        "<int:pk>/answer-sheet/",
+        views.ExamAnswerSheetView.as_view(),
+        name="answer-sheet",
+    ),
+    path("<int:pk>/clone/", views.ExamCloneView.as_view(), name="clone"),
     path("<int:pk>/delete/", views.ExamDeleteView.as_view(), name="delete"),
     # API endpoints para AJAX
+    path("api/exams/<int:pk>/", views.ExamExportAPI.as_view(), name="api-exam-export"),
+    path(
+        "api/exams/<int:pk>/delivery/",
+        views.ExamDeliveryAPI.as_view(),
+        name="api-exam-delivery",
+    ),
+    path(
+        "api/exams/<int:pk>/statistics/",
+        views.ExamStatisticsAPI.as_view(),
+        name="api-exam-statistics",
+    ),
+    path(
+        "api/exams/<int:pk>/import/",
+        views.ItemBankImportAPI.as_view(),
+        name="api-item-bank-import",
+    ),
+    path(
+        "api/exams/<int:pk>/items/order/",
+        views.ItemReorderAPI.as_view(),
+        name="api-item-reorder",
+    ),
+    path(
+        "api/items/<int:pk>/subquestions/order/",
+        views.SubQuestionReorderAPI.as_view(),
+        name="api-subq-reorder",
+    ),
+    path(
+        "api/subquestions/<int:pk>/options/order/",
+        views.OptionReorderAPI.as_view(),
+        name="api-option-reorder",
+    ),
     path("api/items/", views.ItemCreateAPI.as_view(), name="api-item-create"),
+    path("api/items/tree/", views.ItemTreeSaveAPI.as_view(), name="api-item-tree-save"),
     path("api/items/<int:pk>/", views.ItemUpdateAPI.as_view(), name="api-item-update"),
     path("api/items/<int:pk>/delete/", views.ItemDeleteAPI.as_view(), name="api-item-delete"),
     path("api/subquestions/", views.SubQuestionCreateAPI.as_view(), name="api-subq-create"),
@@ -21,4 +65,24 @@ urlpatterns = [
     path("api/options/", views.OptionCreateAPI.as_view(), name="api-option-create"),
     path("api/options/<int:pk>/", views.OptionUpdateAPI.as_view(), name="api-option-update"),
     path("api/options/<int:pk>/delete/", views.OptionDeleteAPI.as_view(), name="api-option-delete"),
+    path(
+        "api/administrations/<int:pk>/responses/",
+        views.ResponseIngestAPI.as_view(),
+        name="api-response-ingest",
+    ),
+    path(
+        "api/administrations/<int:pk>/autosave/",
+        views.AutosaveAPI.as_view(),
+        name="api-autosave",
+    ),
+    path(
+        "api/administrations/<int:pk>/heartbeat/",
+        views.HeartbeatAPI.as_view(),
+        name="api-heartbeat",
+    ),
+    path(
+        "api/administrations/<int:pk>/submit/",
+        views.SubmitAPI.as_view(),
+        name="api-submit",
+    ),
 ]
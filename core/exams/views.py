@@ -1,22 +1,114 @@
+import hashlib
 import json
+from http import HTTPStatus
 
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Max
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import RestrictedError
+from django.http import Http404
+from django.http import HttpResponse
 from django.http import JsonResponse
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.shortcuts import redirect
+from django.shortcuts import render
+from django.template.loader import render_to_string
 from django.urls import reverse_lazy
+from django.utils.cache import get_conditional_response
+from django.utils.cache import patch_cache_control
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.utils.safestring import mark_safe
 from django.views import View
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from django.views.generic import DeleteView
 from django.views.generic import DetailView
 from django.views.generic import ListView
 
+from .answer_sheets import render_answer_sheet
+from .autosave import BufferBusyError
+from .autosave import aflush
+from .autosave import aheartbeat
+from .autosave import arecord_answers
+from .booklets import render_booklet
+from .cache import get_content_stamp
+from .cache import get_content_version
+from .cache import get_or_render
+from .classical import get_classical_statistics
+from .delivery import aget_payload
+from .ingestion import CODE_MAX_LENGTH
+from .ingestion import INGEST_MAX_ROWS
+from .ingestion import ingest_responses
+from .itembank import ImportFormatError
+from .itembank import detect_format
+from .itembank import import_item_bank_file
+from .models import Administration
 from .models import Exam
 from .models import Item
 from .models import Option
 from .models import SubQuestion
+from .omr import SheetLayoutError
+from .ordering import next_order
+from .ordering import order_after
+from .ordering import reorder
+from .pagination import KeysetPaginationMixin
+from .renditions import image_srcset
+from .search import search_exam_ids
+from .services import ANSWERED_DELETE_ERROR
+from .services import clone_exam
+from .services import save_item_tree
+from .services import serialize_exam
+from .services import serialize_item_tree
+from .winsteps import exam_persons
+from .winsteps import iter_chunks
+from .winsteps import iter_winsteps_lines
 
+# =============================================================================
+# GET condicional (ETag / Last-Modified)
+# =============================================================================
+# Ambos valores salen de la versión de contenido del examen, que está en la
+# caché, así que un 304 no consulta las tablas de ítems, subpreguntas u
+# opciones.
+
+
+def _exam_etag(request, pk, *, per_session=True):
+    stamp = get_content_stamp(pk)
+    if stamp is None:
+        return None
+    parts = [str(pk), str(stamp[0])]
+    if per_session:
+        # El HTML incluye datos del usuario y el token CSRF de su sesión
+        parts += [
+            str(request.user.pk),
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+        ]
+    return hashlib.sha256(":".join(parts).encode()).hexdigest()[:32]
+
+
+def _exam_last_modified(request, pk):
+    stamp = get_content_stamp(pk)
+    return stamp[1] if stamp is not None else None
+
+
+def _exam_json_etag(request, pk):
+    return _exam_etag(request, pk, per_session=False)
 
-class ExamListView(LoginRequiredMixin, ListView):
+
+exam_html_condition = [
+    cache_control(private=True, no_cache=True),
+    condition(etag_func=_exam_etag, last_modified_func=_exam_last_modified),
+]
+exam_json_condition = [
+    cache_control(private=True, no_cache=True),
+    condition(etag_func=_exam_json_etag, last_modified_func=_exam_last_modified),
+]
+
+
+class ExamListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     """Lista de exámenes"""
 
     model = Exam
@@ -24,14 +116,26 @@ class ExamListView(LoginRequiredMixin, ListView):
     context_object_name = "exams"
     paginate_by = 10
 
-    def get_queryset(self):
-        queryset = Exam.objects.select_related("created_by")
-        search = self.request.GET.get("search")
+    def use_keyset(self, queryset):
+        # La búsqueda ordena por relevancia: se pagina por número
+        return not self.request.GET.get("search")
 
-        if search:
-            queryset = queryset.filter(name__icontains=search)
+    def get_queryset(self):
+        return Exam.objects.select_related("created_by")
 
-        return queryset
+    def paginate_queryset(self, queryset, page_size):
+        search = self.request.GET.get("search")
+        if not search:
+            return super().paginate_queryset(queryset, page_size)
+        # Se paginan los ids ordenados por relevancia (exámenes cuyo nombre o
+        # ítems coinciden) y se cargan solo los de la página
+        paginator, page, exam_ids, is_paginated = super().paginate_queryset(
+            search_exam_ids(search),
+            page_size,
+        )
+        exams = queryset.in_bulk(exam_ids)
+        page.object_list = [exams[pk] for pk in exam_ids if pk in exams]
+        return paginator, page, page.object_list, is_paginated
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -71,6 +175,7 @@ class ExamCreateView(LoginRequiredMixin, View):
         return redirect("exams:editor", pk=exam.pk)
 
 
+@method_decorator(exam_html_condition, name="get")
 class ExamEditorView(LoginRequiredMixin, DetailView):
     """Editor de ítems del examen"""
 
@@ -85,21 +190,149 @@ class ExamEditorView(LoginRequiredMixin, DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["items"] = self.object.items.all().order_by("order")
+        # Ya vienen ordenados (Meta.ordering); un order_by() descartaría el
+        # prefetch y volvería a consultar cada nivel
+        context["items"] = self.object.items.all()
         return context
 
 
-class ExamPreviewView(LoginRequiredMixin, DetailView):
-    """Vista previa del examen"""
+@method_decorator(exam_html_condition, name="get")
+class ExamPreviewView(LoginRequiredMixin, View):
+    """
+    Vista previa del examen
+
+    El contenido se renderiza una vez por versión del examen y se guarda en
+    la caché; las visitas repetidas no consultan la base de datos.
+    """
 
-    model = Exam
     template_name = "pages/exam-preview.html"
-    context_object_name = "exam"
+    fragment_template_name = "pages/exam-preview-content.html"
+
+    def get(self, request, pk):
+        version = get_content_version(pk)
+        if version is None:
+            raise Http404
+        fragment = get_or_render(
+            "preview",
+            pk,
+            version,
+            lambda: self.render_fragment(pk),
+        )
+        return render(request, self.template_name, {
+            "exam_name": fragment["name"],
+            "preview_html": mark_safe(fragment["html"]),  # noqa: S308
+        })
 
-    def get_queryset(self):
-        return Exam.objects.prefetch_related(
-            "items__subquestions__options",
-        ).select_related("created_by")
+    def render_fragment(self, pk):
+        exam = get_object_or_404(
+            Exam.objects.prefetch_related("items__subquestions__options"),
+            pk=pk,
+        )
+        # Cada ítem y subpregunta con los srcset de sus imágenes
+        items = [
+            {
+                "item": item,
+                "srcset": image_srcset(item.image, item.image_renditions),
+                "subquestions": [
+                    {
+                        "subquestion": subq,
+                        "srcset": image_srcset(subq.image, subq.image_renditions),
+                    }
+                    for subq in item.subquestions.all()
+                ],
+            }
+            for item in exam.items.all()
+        ]
+        html = render_to_string(self.fragment_template_name, {
+            "exam": exam,
+            "items": items,
+            "item_count": len(items),
+        })
+        return {"name": exam.name, "html": html}
+
+
+@method_decorator(exam_json_condition, name="get")
+class ExamExportAPI(LoginRequiredMixin, View):
+    """Exportación JSON de solo lectura del examen completo"""
+
+    def get(self, request, pk):
+        exam = get_object_or_404(
+            Exam.objects.prefetch_related("items__subquestions__options"),
+            pk=pk,
+        )
+        return JsonResponse({"success": True, "exam": serialize_exam(exam)})
+
+
+class ExamStatisticsAPI(LoginRequiredMixin, View):
+    """
+    Estadísticos de teoría clásica del examen
+
+    Salen de sumas que se actualizan al ingerir respuestas; no recorren la
+    tabla de respuestas.
+    """
+
+    def get(self, request, pk):
+        statistics = get_classical_statistics(pk)
+        if statistics is None:
+            raise Http404
+        return JsonResponse(
+            {
+                "success": True,
+                "statistics": {
+                    **statistics._asdict(),
+                    "items": [item._asdict() for item in statistics.items],
+                },
+            },
+        )
+
+
+@method_decorator(exam_json_condition, name="get")
+class ExamBookletView(LoginRequiredMixin, View):
+    """
+    Cuadernillo PDF para imprimir
+
+    Solo se dibujan los ítems que cambiaron desde la última impresión.
+    """
+
+    def get(self, request, pk):
+        exam = get_object_or_404(Exam, pk=pk)
+        response = HttpResponse(render_booklet(exam), content_type="application/pdf")
+        response["Content-Disposition"] = (
+            f'inline; filename="examen-{exam.pk}-cuadernillo.pdf"'
+        )
+        return response
+
+
+@method_decorator(exam_json_condition, name="get")
+class ExamAnswerSheetView(LoginRequiredMixin, View):
+    """Hoja de respuestas en blanco para lectura óptica"""
+
+    def get(self, request, pk):
+        exam = get_object_or_404(Exam, pk=pk)
+        try:
+            pdf = render_answer_sheet(exam)
+        except SheetLayoutError as exc:
+            return HttpResponse(str(exc), status=400, content_type="text/plain")
+        response = HttpResponse(pdf, content_type="application/pdf")
+        response["Content-Disposition"] = (
+            f'inline; filename="examen-{exam.pk}-hoja-respuestas.pdf"'
+        )
+        return response
+
+
+class ExamWinstepsExportView(LoginRequiredMixin, View):
+    """Descarga del archivo de control y datos de Winsteps"""
+
+    def get(self, request, pk):
+        exam = get_object_or_404(Exam, pk=pk)
+        response = StreamingHttpResponse(
+            iter_chunks(iter_winsteps_lines(exam, exam_persons(exam))),
+            content_type="text/plain; charset=utf-8",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="examen-{exam.pk}-winsteps.txt"'
+        )
+        return response
 
 
 class ExamDeleteView(LoginRequiredMixin, DeleteView):
@@ -116,6 +349,19 @@ class ExamDeleteView(LoginRequiredMixin, DeleteView):
         return super().delete(request, *args, **kwargs)
 
 
+class ExamCloneView(LoginRequiredMixin, View):
+    """Duplicar un examen completo como punto de partida de otra forma"""
+
+    def post(self, request, pk):
+        exam = get_object_or_404(Exam, pk=pk)
+        clone = clone_exam(exam, created_by=request.user)
+        if request.headers.get("X-Requested-With") == "XMLHttpRequest":
+            return JsonResponse(
+                {"success": True, "id": clone.pk, "url": clone.get_absolute_url()},
+            )
+        return redirect(clone)
+
+
 # =============================================================================
 # API Views para AJAX
 # =============================================================================
@@ -131,6 +377,29 @@ class BaseAPIView(LoginRequiredMixin, View):
             return {}
 
 
+def _new_order(parent, data):
+    """Orden de un hijo nuevo: al final, o después del hermano ``after``"""
+    if "after" in data:
+        return order_after(parent, data["after"])
+    return next_order(parent)
+
+
+def _invalid(exc):
+    return JsonResponse({"success": False, "errors": exc.messages}, status=400)
+
+
+def _delete(obj):
+    """Elimina una fila del árbol salvo que ya tenga respuestas"""
+    try:
+        obj.delete()
+    except RestrictedError:
+        return JsonResponse(
+            {"success": False, "errors": [ANSWERED_DELETE_ERROR]},
+            status=400,
+        )
+    return JsonResponse({"success": True})
+
+
 class ItemCreateAPI(BaseAPIView):
     """Crear nuevo ítem"""
 
@@ -138,15 +407,17 @@ class ItemCreateAPI(BaseAPIView):
         data = self.get_json_data()
         exam = get_object_or_404(Exam, pk=data.get("exam_id"))
 
-        # Obtener el siguiente orden
-        max_order = exam.items.aggregate(Max("order"))["order__max"] or 0
+        try:
+            order = _new_order(exam, data)
+        except ValidationError as exc:
+            return _invalid(exc)
 
         item = Item.objects.create(
             exam=exam,
             code=data.get("code", ""),
             instruction=data.get("instruction", ""),
             scoring_type=data.get("scoring_type", Item.SCORING_DICHOTOMOUS),
-            order=max_order + 1,
+            order=order,
             correct_criteria=data.get("correct_criteria", ""),
             partial_criteria=data.get("partial_criteria", ""),
             incorrect_criteria=data.get("incorrect_criteria", ""),
@@ -191,13 +462,72 @@ class ItemUpdateAPI(BaseAPIView):
         })
 
 
+class ReorderAPI(BaseAPIView):
+    """
+    Reordenar en una sola petición todos los hijos de un padre.
+
+    Recibe ``{"ids": [...]}`` con los ids de los hermanos en el nuevo orden.
+    Cada subclase indica el modelo del padre.
+    """
+
+    parent_model: type[Exam | Item | SubQuestion]
+
+    def post(self, request, pk):
+        parent = get_object_or_404(self.parent_model, pk=pk)
+        ids = self.get_json_data().get("ids")
+        if not isinstance(ids, list):
+            return JsonResponse(
+                {"success": False, "errors": ["Se esperaba la lista de ids"]},
+                status=400,
+            )
+        try:
+            changed = reorder(parent, ids)
+        except ValidationError as exc:
+            return _invalid(exc)
+        return JsonResponse({"success": True, "changed": changed})
+
+
+class ItemReorderAPI(ReorderAPI):
+    """Reordenar los ítems de un examen"""
+
+    parent_model = Exam
+
+
+class SubQuestionReorderAPI(ReorderAPI):
+    """Reordenar las subpreguntas de un ítem"""
+
+    parent_model = Item
+
+
+class OptionReorderAPI(ReorderAPI):
+    """Reordenar las opciones de una subpregunta"""
+
+    parent_model = SubQuestion
+
+
+class ItemTreeSaveAPI(BaseAPIView):
+    """Guardar ítem completo (subpreguntas y opciones) en una sola petición"""
+
+    def post(self, request):
+        data = self.get_json_data()
+        exam = get_object_or_404(Exam, pk=data.get("exam_id"))
+
+        try:
+            item, tree = save_item_tree(exam, data)
+        except ValidationError as exc:
+            return JsonResponse({"success": False, "errors": exc.messages}, status=400)
+
+        return JsonResponse({
+            "success": True,
+            "item": serialize_item_tree(item, tree),
+        })
+
+
 class ItemDeleteAPI(BaseAPIView):
     """Eliminar ítem"""
 
     def delete(self, request, pk):
-        item = get_object_or_404(Item, pk=pk)
-        item.delete()
-        return JsonResponse({"success": True})
+        return _delete(get_object_or_404(Item, pk=pk))
 
 
 class SubQuestionCreateAPI(BaseAPIView):
@@ -207,12 +537,14 @@ class SubQuestionCreateAPI(BaseAPIView):
         data = self.get_json_data()
         item = get_object_or_404(Item, pk=data.get("item_id"))
 
-        # Obtener el siguiente orden
-        max_order = item.subquestions.aggregate(Max("order"))["order__max"] or 0
+        try:
+            order = _new_order(item, data)
+        except ValidationError as exc:
+            return _invalid(exc)
 
         subq = SubQuestion.objects.create(
             item=item,
-            order=max_order + 1,
+            order=order,
             context_text=data.get("context_text", ""),
         )
 
@@ -250,9 +582,7 @@ class SubQuestionDeleteAPI(BaseAPIView):
     """Eliminar subpregunta"""
 
     def delete(self, request, pk):
-        subq = get_object_or_404(SubQuestion, pk=pk)
-        subq.delete()
-        return JsonResponse({"success": True})
+        return _delete(get_object_or_404(SubQuestion, pk=pk))
 
 
 class OptionCreateAPI(BaseAPIView):
@@ -262,17 +592,20 @@ class OptionCreateAPI(BaseAPIView):
         data = self.get_json_data()
         subq = get_object_or_404(SubQuestion, pk=data.get("subquestion_id"))
 
-        # Obtener el siguiente orden y label
-        max_order = subq.options.aggregate(Max("order"))["order__max"] or 0
+        try:
+            order = _new_order(subq, data)
+        except ValidationError as exc:
+            return _invalid(exc)
+        # Siguiente label según cuántas opciones hay (el orden tiene huecos)
         labels = ["a", "b", "c", "d", "e", "f"]
-        next_label = labels[min(max_order, len(labels) - 1)]
+        next_label = labels[min(subq.options.count(), len(labels) - 1)]
 
         option = Option.objects.create(
             subquestion=subq,
             label=data.get("label", next_label),
             text=data.get("text", ""),
             is_correct=data.get("is_correct", False),
-            order=max_order + 1,
+            order=order,
         )
 
         return JsonResponse({
@@ -315,6 +648,208 @@ class OptionDeleteAPI(BaseAPIView):
     """Eliminar opción"""
 
     def delete(self, request, pk):
-        option = get_object_or_404(Option, pk=pk)
-        option.delete()
-        return JsonResponse({"success": True})
+        return _delete(get_object_or_404(Option, pk=pk))
+
+
+class ResponseIngestAPI(BaseAPIView):
+    """Recibir un lote de respuestas de una aplicación"""
+
+    def post(self, request, pk):
+        administration = get_object_or_404(Administration, pk=pk)
+        if not administration.is_open:
+            return JsonResponse(
+                {"success": False, "errors": ["La aplicación está cerrada"]},
+                status=400,
+            )
+
+        data = self.get_json_data()
+        rows = data.get("responses") if isinstance(data, dict) else data
+        if not isinstance(rows, list):
+            return JsonResponse(
+                {"success": False, "errors": ["Se esperaba una lista de respuestas"]},
+                status=400,
+            )
+        if len(rows) > INGEST_MAX_ROWS:
+            return JsonResponse(
+                {
+                    "success": False,
+                    "errors": [f"Máximo {INGEST_MAX_ROWS} respuestas por petición"],
+                },
+                status=400,
+            )
+
+        created, errors = ingest_responses(administration, rows)
+        return JsonResponse({"success": True, "created": created, "errors": errors})
+
+
+class ItemBankImportAPI(BaseAPIView):
+    """Importar un banco de ítems (JSON Lines, JSON, CSV o XLSX) al examen"""
+
+    def post(self, request, pk):
+        exam = get_object_or_404(Exam, pk=pk)
+        upload = request.FILES.get("file")
+        if upload is None:
+            return JsonResponse(
+                {"success": False, "errors": ["No se recibió ningún archivo"]},
+                status=400,
+            )
+        try:
+            created, errors = import_item_bank_file(
+                exam,
+                upload,
+                detect_format(upload.name),
+            )
+        except ImportFormatError as exc:
+            return JsonResponse({"success": False, "errors": [str(exc)]}, status=400)
+        return JsonResponse({"success": True, "created": created, "errors": errors})
+
+
+# =============================================================================
+# API async de los alumnos
+# =============================================================================
+# Durante una aplicación miles de alumnos mantienen conexiones lentas desde
+# el celular. Estas vistas son async: servidas por ``config/asgi.py`` una
+# conexión lenta no retiene un worker, y solo la escritura de respuestas al
+# entregar pasa a un hilo. No corren dentro de ATOMIC_REQUESTS, que Django
+# no admite en vistas async.
+
+
+class StudentAPIView(View):
+    """Base async de la API de los alumnos: exige sesión como ``BaseAPIView``"""
+
+    @transaction.non_atomic_requests
+    async def dispatch(self, request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await super().dispatch(request, *args, **kwargs)
+
+    def get_json_data(self):
+        try:
+            return json.loads(self.request.body)
+        except json.JSONDecodeError:
+            return {}
+
+    async def check_open(self, pk):
+        """Respuesta de error si la aplicación no existe o está cerrada"""
+        is_open = await (
+            Administration.objects.filter(pk=pk)
+            .values_list("is_open", flat=True)
+            .afirst()
+        )
+        if is_open is None:
+            raise Http404
+        if not is_open:
+            return JsonResponse(
+                {"success": False, "errors": ["La aplicación está cerrada"]},
+                status=400,
+            )
+        return None
+
+
+class ExamDeliveryAPI(StudentAPIView):
+    """
+    Contenido del examen para los alumnos
+
+    Se sirve ya serializado y comprimido desde la caché; ni la respuesta
+    completa ni un 304 consultan las tablas del examen.
+    """
+
+    async def get(self, request, pk):
+        payload = await aget_payload(pk)
+        if payload is None:
+            raise Http404
+        # Débil: el mismo contenido se sirve con distintas codificaciones
+        etag = f'W/"{payload.digest}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            coding, body = payload.encode(request.headers.get("Accept-Encoding"))
+            response = HttpResponse(body, content_type="application/json")
+            if coding != "identity":
+                response["Content-Encoding"] = coding
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ["Accept-Encoding"])
+        return response
+
+
+def _answer_changes(data):
+    """``(código, [(subpregunta, opción)], error)`` del cuerpo de la petición"""
+    if not isinstance(data, dict):
+        return None, None, "Formato inválido"
+    code = str(data.get("examinee") or "").strip()
+    if not code:
+        return None, None, "Falta el código del examinado"
+    if CODE_MAX_LENGTH is not None and len(code) > CODE_MAX_LENGTH:
+        return None, None, "El código del examinado es muy largo"
+    rows = data.get("answers", [])
+    if not isinstance(rows, list) or len(rows) > INGEST_MAX_ROWS:
+        error = f"Se esperaba una lista de hasta {INGEST_MAX_ROWS} respuestas"
+        return None, None, error
+    answers = []
+    for row in rows:
+        subquestion_id = row.get("subquestion") if isinstance(row, dict) else None
+        option_id = row.get("option") if isinstance(row, dict) else None
+        if not isinstance(subquestion_id, int) or not (
+            option_id is None or isinstance(option_id, int)
+        ):
+            return None, None, "Respuesta con formato inválido"
+        answers.append((subquestion_id, option_id))
+    return code, answers, None
+
+
+class AutosaveAPI(StudentAPIView):
+    """
+    Guardar los cambios de respuesta de un alumno durante la aplicación
+
+    Los cambios van al búfer de guardado automático; no se escribe en la
+    tabla de respuestas hasta el siguiente vaciado.
+    """
+
+    async def post(self, request, pk):
+        closed = await self.check_open(pk)
+        if closed:
+            return closed
+        code, answers, error = _answer_changes(self.get_json_data())
+        if error:
+            return JsonResponse({"success": False, "errors": [error]}, status=400)
+        buffered = await arecord_answers(pk, code, answers)
+        return JsonResponse({"success": True, "buffered": buffered})
+
+
+class HeartbeatAPI(StudentAPIView):
+    """Señal periódica del alumno; responde si la aplicación sigue abierta"""
+
+    async def post(self, request, pk):
+        data = self.get_json_data()
+        code = str(data.get("examinee") or "").strip() if isinstance(data, dict) else ""
+        if not code:
+            return JsonResponse(
+                {"success": False, "errors": ["Falta el código del examinado"]},
+                status=400,
+            )
+        closed = await self.check_open(pk)
+        if not closed:
+            await aheartbeat(pk, code)
+        return JsonResponse({"success": True, "open": closed is None})
+
+
+class SubmitAPI(AutosaveAPI):
+    """Entregar el examen: guarda los últimos cambios y vacía el búfer"""
+
+    async def post(self, request, pk):
+        response = await super().post(request, pk)
+        if response.status_code != HTTPStatus.OK:
+            return response
+        # El vaciado confirma su transacción antes de descartar el búfer
+        try:
+            created, errors = await aflush(pk, complete=True)
+        except BufferBusyError:
+            # Los cambios quedan en el búfer; el cliente reintenta la entrega
+            response = JsonResponse(
+                {"success": False, "errors": ["Entrega en espera, reintenta"]},
+                status=HTTPStatus.SERVICE_UNAVAILABLE,
+            )
+            response["Retry-After"] = "5"
+            return response
+        return JsonResponse({"success": True, "created": created, "errors": errors})
@@ -0,0 +1,112 @@
+"""
+Exportación del archivo de control y datos de Winsteps.
+
+El archivo se genera línea a línea para poder enviarlo con
+``StreamingHttpResponse`` o escribirlo a disco sin armarlo en memoria.
+"""
+
+from .models import Examinee
+from .models import Item
+from .scoring import get_answer_key
+from .scoring import iter_person_scores
+
+MISSING_CODE = "."
+PERSON_LABEL_WIDTH = 20
+# Etiqueta de ítem: el código y el comienzo de la instrucción en texto plano
+ITEM_LABEL_WIDTH = 60
+# Las respuestas empiezan después de la etiqueta de la persona y un espacio
+ITEM1_COLUMN = PERSON_LABEL_WIDTH + 2
+# Tamaño aproximado de cada bloque enviado al cliente
+CHUNK_SIZE = 64 * 1024
+
+# Grupo compartido para los ítems dicotómicos; "0" hace que cada ítem
+# politómico tenga su propia estructura de categorías (Partial Credit).
+DICHOTOMOUS_GROUP = "D"
+POLYTOMOUS_GROUP = "0"
+
+
+def _quote(value):
+    return '"{}"'.format(value.replace('"', "'"))
+
+
+def control_lines(exam, items):
+    """Líneas de la sección de control, terminando en ``END NAMES``"""
+    polytomous = any(i.scoring_type == Item.SCORING_POLYTOMOUS for i in items)
+    yield "&INST\n"
+    yield f"TITLE = {_quote(exam.name)}\n"
+    yield f"NI = {len(items)}\n"
+    yield f"ITEM1 = {ITEM1_COLUMN}\n"
+    yield "NAME1 = 1\n"
+    yield f"NAMLEN = {PERSON_LABEL_WIDTH}\n"
+    yield "XWIDE = 1\n"
+    yield f"CODES = {'012' if polytomous else '01'}\n"
+    if polytomous:
+        groups = "".join(
+            POLYTOMOUS_GROUP
+            if item.scoring_type == Item.SCORING_POLYTOMOUS
+            else DICHOTOMOUS_GROUP
+            for item in items
+        )
+        yield f"ISGROUPS = {groups}\n"
+    yield "&END\n"
+    for item in items:
+        yield f"{item_label(item)}\n"
+    yield "END NAMES\n"
+
+
+def item_label(item):
+    """Código del ítem seguido del texto de su instrucción"""
+    label = f"{item.code} {item.instruction_plain}".strip()
+    return label[:ITEM_LABEL_WIDTH].rstrip()
+
+
+def person_line(label, scores):
+    """
+    Línea de datos de una persona.
+
+    ``scores`` tiene un valor por ítem en el orden del examen; ``None``
+    se exporta como respuesta faltante.
+    """
+    codes = "".join(MISSING_CODE if s is None else str(s) for s in scores)
+    return f"{str(label)[:PERSON_LABEL_WIDTH]:<{PERSON_LABEL_WIDTH}} {codes}\n"
+
+
+def exam_persons(exam):
+    """Puntajes de todos los examinados de todas las aplicaciones del examen"""
+    key = get_answer_key(exam.pk)
+    examinees = Examinee.objects.filter(administration__exam=exam)
+    return iter_person_scores(key, examinees)
+
+
+def iter_winsteps_lines(exam, persons=()):
+    """
+    Archivo completo: control, etiquetas de ítems y datos de personas.
+
+    ``persons`` es un iterable de ``(etiqueta, puntajes)``; se consume de
+    forma perezosa para que el tamaño de la exportación no dependa de la
+    memoria disponible.
+    """
+    # Mismo orden que la clave de respuestas (ver scoring._answer_key_rows)
+    items = list(
+        exam.items.order_by("order", "id").only(
+            "code",
+            "scoring_type",
+            "instruction_plain",
+        ),
+    )
+    yield from control_lines(exam, items)
+    for label, scores in persons:
+        yield person_line(label, scores)
+
+
+def iter_chunks(lines, chunk_size=CHUNK_SIZE):
+    """Agrupa líneas en bloques de ~``chunk_size`` caracteres"""
+    buffer, size = [], 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)